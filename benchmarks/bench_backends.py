@@ -0,0 +1,104 @@
+"""Execution backends benchmark.
+
+Runs the shipped examples and a few hot-loop workloads on every backend
+listed in ``moon.interpreter.BACKENDS``.
+
+Usage: python benchmarks/bench_backends.py
+"""
+from pathlib import Path
+from timeit import repeat
+
+from moon.lexer import build_lexer
+from moon.parser import build_parser
+from moon.interpreter import BACKENDS, execute_program
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+EXAMPLE_NAMES = ["fizz_buzz.mn", "is_prime.mn"]
+
+WORKLOADS = {
+	"count_loop": (
+		"x is 0\n"
+		"while x < 20000\n"
+		"\tx is x + 1\n"
+	),
+	"float_loop": (
+		"x is 0.5\n"
+		"total is 0.0\n"
+		"while x < 20000.0\n"
+		"\ttotal is total + x * 1.5\n"
+		"\tx is x + 1.0\n"
+	),
+	"call_loop": (
+		"action square n\n"
+		"\tresult n * n\n"
+		"x is 0\n"
+		"total is 0\n"
+		"while x < 20000\n"
+		"\ttotal is total + call square x\n"
+		"\tx is x + 1\n"
+	),
+	"prime_sieve": (
+		"action isPrime number\n"
+		"\tif number < 2\n"
+		"\t\tresult false\n"
+		"\tdivisor is 2\n"
+		"\twhile divisor * divisor <= number\n"
+		"\t\tif number % divisor is 0\n"
+		"\t\t\tresult false\n"
+		"\t\tdivisor is divisor + 1\n"
+		"\tresult true\n"
+		"count is 0\n"
+		"primes is 0\n"
+		"while count < 2000\n"
+		"\tif call isPrime count\n"
+		"\t\tprimes is primes + 1\n"
+		"\tcount is count + 1\n"
+	),
+	"recursion": (
+		"action total n\n"
+		"\tif n is 0\n"
+		"\t\tresult 0\n"
+		"\tprevious is call total n - 1\n"
+		"\tresult previous + n\n"
+		"action countdown n\n"
+		"\tif n is 0\n"
+		"\t\tresult 0\n"
+		"\tresult call countdown n - 1\n"
+		"runs is 0\n"
+		"while runs < 50\n"
+		"\tcall total 100\n"
+		"\tcall countdown 100\n"
+		"\truns is runs + 1\n"
+	),
+}
+
+RUNS_NUMBER = 5
+REPEAT_NUMBER = 3
+
+
+def parse_code(code: str):
+	return build_parser().parse(code+'\n', lexer=build_lexer())
+
+def best_of(statement, number: int) -> float:
+	return min(repeat(statement, number=number, repeat=REPEAT_NUMBER)) / number
+
+def programs():
+	for name in EXAMPLE_NAMES:
+		yield name, parse_code((EXAMPLES / name).read_text())
+	for name, code in WORKLOADS.items():
+		yield name, parse_code(code)
+
+def main():
+	print(f"{'program (ms / run)':<20}" + "".join(f"{backend:>14}" for backend in BACKENDS))
+	for name, program in programs():
+		timings = [
+			best_of(
+				lambda: execute_program(program, output_callback=lambda *args: None, backend=backend),
+				RUNS_NUMBER,
+			)
+			for backend in BACKENDS
+		]
+		print(f"{name:<20}" + "".join(f"{timing*1e3:>14.3f}" for timing in timings))
+
+if __name__ == "__main__":
+	main()
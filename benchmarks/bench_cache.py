@@ -0,0 +1,51 @@
+"""Program cache benchmark.
+
+Parses generated scripts of growing size from their source, then loads them
+from a warm __mooncache__ entry, and compares the two.
+
+Usage: python benchmarks/bench_cache.py
+"""
+import tempfile
+
+from pathlib import Path
+from timeit import repeat
+
+from moon.cache import ProgramCache
+from moon.lexer import StreamingLexer
+from moon.parser import build_parser
+
+REPEAT_NUMBER = 5
+
+BLOCK = (
+	"action isPrime number\n"
+	"\tif number < 2\n"
+	"\t\tresult false\n"
+	"\tresult true\n"
+	"count is 0\n"
+	"while count <= 25\n"
+	"\tprint count \"Is prime:\" call isPrime count\n"
+	"\tcount is count + 1\n"
+)
+
+def parse(path: Path):
+	with open(path, encoding="utf-8") as file:
+		return build_parser().parse(lexer=StreamingLexer(file))
+
+def load(cache: ProgramCache, path: Path):
+	with open(path, encoding="utf-8") as file:
+		return cache.parse(file)
+
+def main():
+	cache = ProgramCache()
+	print(f"{'lines':<12}{'parse (ms)':>12}{'cached (ms)':>12}")
+	with tempfile.TemporaryDirectory() as directory:
+		for blocks in (10, 100, 1000):
+			path = Path(directory) / f"script_{blocks}.mn"
+			path.write_text(BLOCK * blocks, encoding="utf-8")
+			load(cache, path)
+			parsed = min(repeat(lambda: parse(path), number=1, repeat=REPEAT_NUMBER))
+			cached = min(repeat(lambda: load(cache, path), number=1, repeat=REPEAT_NUMBER))
+			print(f"{blocks * BLOCK.count(chr(10)):<12}{parsed * 1000:>12.2f}{cached * 1000:>12.2f}")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,45 @@
+"""Incremental re-parsing benchmark.
+
+Edits one statement in the middle of generated sources of growing size and
+compares a full re-lex and re-parse with IncrementalDocument.edit().
+
+Usage: python benchmarks/bench_incremental.py
+"""
+from timeit import repeat
+
+from moon.incremental import IncrementalDocument
+from moon.lexer import build_lexer
+from moon.parser import build_parser
+
+REPEAT_NUMBER = 5
+
+BLOCK = (
+	"action isPrime number\n"
+	"\tif number < 2\n"
+	"\t\tresult false\n"
+	"\tresult true\n"
+	"count is 0\n"
+	"while count <= 25\n"
+	"\tprint count \"Is prime:\" call isPrime count\n"
+	"\tcount is count + 1\n"
+)
+
+def full_parse(code: str):
+	lexer = build_lexer()
+	lexer.input(code)
+	return build_parser().parse(code + "\n", lexer=lexer)
+
+def main():
+	print(f"{'lines':<12}{'full (ms)':>12}{'edit (ms)':>12}")
+	for blocks in (10, 100, 1000):
+		code = BLOCK * blocks
+		document = IncrementalDocument(code)
+		position = len(BLOCK) * (blocks // 2) + BLOCK.index("0")
+		# Each edit is undone by the next one, the document keeps its size
+		edits = iter([(position, position + 1, "1"), (position, position + 1, "0")] * REPEAT_NUMBER)
+		full = min(repeat(lambda: full_parse(code), number=1, repeat=REPEAT_NUMBER))
+		edit = min(repeat(lambda: document.edit(*next(edits)), number=1, repeat=REPEAT_NUMBER))
+		print(f"{code.count(chr(10)):<12}{full * 1000:>12.2f}{edit * 1000:>12.2f}")
+
+if __name__ == "__main__":
+	main()
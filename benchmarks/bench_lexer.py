@@ -0,0 +1,95 @@
+"""Lexer throughput benchmark.
+
+Tokenizes large generated sources with the default IndentLexer and with
+the fused tokenizer (``build_lexer(fused=True)``), then compares the peak
+memory of keeping a 100k-line token stream as a list of tokens and as a
+TokenBuffer, and of lexing a 100k-line file read whole or streamed.
+
+Usage: python benchmarks/bench_lexer.py
+"""
+import os
+import tempfile
+import tracemalloc
+
+from time import perf_counter
+
+from moon.lexer import StreamingLexer, TokenBuffer, build_lexer
+
+REPEAT_NUMBER = 3
+
+BLOCK = (
+	"action isPrime number\n"
+	"\tif number < 2\n"
+	"\t\tresult false\n"
+	"\tdivisor is 2\n"
+	"\twhile divisor * divisor <= number\n"
+	"\t\tif number % divisor is 0\n"
+	"\t\t\tresult false\n"
+	"\t\tdivisor is divisor + 1\n"
+	"\tresult true\n"
+	"# Comment\n"
+	"count is 0\n"
+	"while count <= 25\n"
+	"\tprint count \"Is prime:\" call isPrime count\n"
+	"\tcount is count + 1\n"
+)
+
+def generate(blocks: int) -> str:
+	return BLOCK * blocks
+
+def tokens_per_second(code: str, fused: bool) -> float:
+	best = float("inf")
+	for _ in range(REPEAT_NUMBER):
+		lexer = build_lexer(fused=fused)
+		start = perf_counter()
+		lexer.input(code)
+		count = sum(1 for _ in lexer)
+		best = min(best, perf_counter() - start)
+	return count / best
+
+def peak_memory(build) -> int:
+	tracemalloc.start()
+	stream = build()
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	del stream
+	return peak
+
+def token_list(code: str) -> list:
+	lexer = build_lexer(fused=True)
+	lexer.input(code)
+	return list(lexer)
+
+def lex_file(path: str, streaming: bool) -> int:
+	with open(path) as file:
+		if streaming:
+			return sum(1 for _ in StreamingLexer(file))
+		lexer = build_lexer(fused=True)
+		lexer.input(file.read() + "\n")
+		return sum(1 for _ in lexer)
+
+def main():
+	print(f"{'source':<20}{'tokens':>10}{'default (tok/s)':>18}{'fused (tok/s)':>18}")
+	for blocks in (100, 1000, 5000):
+		code = generate(blocks)
+		lexer = build_lexer()
+		lexer.input(code)
+		count = sum(1 for _ in lexer)
+		default, fused = tokens_per_second(code, False), tokens_per_second(code, True)
+		print(f"{f'{len(code) // 1024} KiB':<20}{count:>10}{default:>18,.0f}{fused:>18,.0f}")
+
+	code = generate(100_000 // BLOCK.count("\n"))
+	print(f"\n{'100k lines':<20}{'peak (MiB)':>10}")
+	for name, build in (("list", lambda: token_list(code)), ("TokenBuffer", lambda: TokenBuffer.from_code(code))):
+		print(f"{name:<20}{peak_memory(build) / 2**20:>10.1f}")
+
+	with tempfile.NamedTemporaryFile("w", suffix=".mn", delete=False) as file:
+		file.write(code)
+	try:
+		for name, streaming in (("read()", False), ("StreamingLexer", True)):
+			print(f"{name:<20}{peak_memory(lambda: lex_file(file.name, streaming)) / 2**20:>10.1f}")
+	finally:
+		os.remove(file.name)
+
+if __name__ == "__main__":
+	main()
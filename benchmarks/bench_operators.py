@@ -0,0 +1,57 @@
+"""Operator engine micro-benchmark.
+
+Compares the native operator table against the former
+``eval(f"{repr(left)} {operator} {repr(right)}")`` evaluation, then times the
+shipped examples end to end.
+
+Usage: python benchmarks/bench_operators.py
+"""
+from pathlib import Path
+from timeit import repeat
+
+from moon.lexer import build_lexer
+from moon.parser import build_parser
+from moon.interpreter import BINARY_OPERATORS, execute_program
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+EXAMPLE_NAMES = ["fizz_buzz.mn", "is_prime.mn"]
+
+OPERATIONS_NUMBER = 100_000
+PROGRAM_RUNS_NUMBER = 20
+REPEAT_NUMBER = 5
+
+
+def eval_operator(operator, leftvalue, rightvalue):
+	return eval(f"{repr(leftvalue)} {operator} {repr(rightvalue)}")
+
+def table_operator(operator, leftvalue, rightvalue):
+	return BINARY_OPERATORS[operator](leftvalue, rightvalue)
+
+def parse_file(path: Path):
+	code = path.read_text()
+	lexer = build_lexer()
+	return build_parser().parse(code+'\n', lexer=lexer)
+
+def best_of(statement, number: int) -> float:
+	return min(repeat(statement, number=number, repeat=REPEAT_NUMBER)) / number
+
+def bench_operators():
+	print(f"{'operator':<10}{'eval (us)':>12}{'table (us)':>12}{'speedup':>10}")
+	for operator in BINARY_OPERATORS:
+		legacy = best_of(lambda: eval_operator(operator, 7, 3), OPERATIONS_NUMBER)
+		native = best_of(lambda: table_operator(operator, 7, 3), OPERATIONS_NUMBER)
+		print(f"{operator:<10}{legacy*1e6:>12.3f}{native*1e6:>12.3f}{legacy/native:>9.1f}x")
+
+def bench_examples():
+	print(f"\n{'example':<16}{'ms / run':>12}")
+	for name in EXAMPLE_NAMES:
+		program = parse_file(EXAMPLES / name)
+		elapsed = best_of(
+			lambda: execute_program(program, output_callback=lambda *args: None),
+			PROGRAM_RUNS_NUMBER,
+		)
+		print(f"{name:<16}{elapsed*1e3:>12.3f}")
+
+if __name__ == "__main__":
+	bench_operators()
+	bench_examples()
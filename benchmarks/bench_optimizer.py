@@ -0,0 +1,76 @@
+"""Optimization passes benchmark.
+
+Runs loops over constants and loop-invariant expressions on every backend,
+parsed as they are and after moon.optimizer's passes, and prints the time
+spent in each pass.
+
+Usage: python benchmarks/bench_optimizer.py
+"""
+from timeit import repeat
+
+from moon.lexer import build_lexer
+from moon.parser import build_parser
+from moon.interpreter import BACKENDS, execute_program
+from moon.optimizer import PassManager
+
+WORKLOADS = {
+	"constants": (
+		"x is 0\n"
+		"total is 0\n"
+		"while x < 20000\n"
+		"\ttotal is total + 60 * 60 * 24 - 1000 / 10\n"
+		"\tif 1 > 2\n"
+		"\t\tprint total\n"
+		"\tx is x + 1\n"
+	),
+	"invariants": (
+		"width is 120\n"
+		"height is 80\n"
+		"x is 0\n"
+		"total is 0\n"
+		"while x < width * height * 2\n"
+		"\tarea is width * height + width * 2 + height * 2\n"
+		"\ttotal is total + area\n"
+		"\tx is x + 1\n"
+	),
+	"action": (
+		"action scale n factor\n"
+		"\ti is 0\n"
+		"\ttotal is 0\n"
+		"\twhile i < n\n"
+		"\t\tstep is factor * factor + factor * 3 - 1\n"
+		"\t\ttotal is total + step\n"
+		"\t\ti is i + 1\n"
+		"\tresult total\n"
+		"print call scale 20000 7\n"
+	),
+}
+
+RUNS_NUMBER = 3
+REPEAT_NUMBER = 3
+
+
+def parse_code(code: str):
+	return build_parser().parse(code+'\n', lexer=build_lexer())
+
+def best_of(statement, number: int) -> float:
+	return min(repeat(statement, number=number, repeat=REPEAT_NUMBER)) / number
+
+def run(program, backend: str) -> float:
+	return best_of(
+		lambda: execute_program(program, output_callback=lambda *args: None, backend=backend),
+		RUNS_NUMBER,
+	)
+
+def main():
+	print(f"{'program (ms / run)':<24}" + "".join(f"{backend:>14}" for backend in BACKENDS))
+	for name, code in WORKLOADS.items():
+		program = parse_code(code)
+		passes = PassManager()
+		optimized = passes.run(program)
+		for label, version in (("", program), (" -O", optimized)):
+			print(f"{name + label:<24}" + "".join(f"{run(version, backend)*1e3:>14.3f}" for backend in BACKENDS))
+		print(f"{'  passes (ms)':<24}" + ", ".join(f"{pass_name} {seconds*1e3:.3f}" for pass_name, seconds in passes.timings.items()))
+
+if __name__ == "__main__":
+	main()
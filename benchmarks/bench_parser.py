@@ -0,0 +1,34 @@
+"""Parser scaling benchmark.
+
+Parses generated programs of 1k, 10k and 100k statements, and prints with
+as many arguments: with linear-time grammar actions, the time per statement
+(or argument) stays flat as the program grows.
+
+Usage: python benchmarks/bench_parser.py
+"""
+from timeit import repeat
+
+from moon.lexer import build_lexer
+from moon.parser import build_parser
+
+REPEAT_NUMBER = 3
+
+def statements(count: int) -> str:
+	return "".join(f"x{index % 100} is {index} + 1\n" for index in range(count))
+
+def arguments(count: int) -> str:
+	return "print " + " ".join(map(str, range(count))) + "\n"
+
+def parse_seconds(code: str) -> float:
+	parser = build_parser()
+	return min(repeat(lambda: parser.parse(code, lexer=build_lexer(fused=True)), number=1, repeat=REPEAT_NUMBER))
+
+def main():
+	print(f"{'program':<24}{'total (ms)':>12}{'per item (us)':>16}")
+	for name, generate in (("statements", statements), ("arguments", arguments)):
+		for count in (1_000, 10_000, 100_000):
+			seconds = parse_seconds(generate(count))
+			print(f"{f'{count:,} {name}':<24}{seconds * 1000:>12.1f}{seconds / count * 1e6:>16.2f}")
+
+if __name__ == "__main__":
+	main()
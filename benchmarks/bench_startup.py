@@ -0,0 +1,63 @@
+"""Cold start benchmark.
+
+Runs a generated script in a fresh interpreter, from its source (without
+__mooncache__) and from the program `moon compile` wrote for it, and reports
+the wall time and the peak memory of the process.
+
+Usage: python benchmarks/bench_startup.py
+"""
+import subprocess
+import sys
+import tempfile
+
+from pathlib import Path
+
+REPEAT_NUMBER = 5
+
+BLOCK = (
+	"action isPrime number\n"
+	"\tif number < 2\n"
+	"\t\tresult false\n"
+	"\tresult true\n"
+	"count is 0\n"
+	"while count <= 1\n"
+	"\tprint count \"Is prime:\" call isPrime count\n"
+	"\tcount is count + 1\n"
+)
+
+# Prints the wall time (ms) and the peak memory (KiB) of a `moon` invocation
+RUNNER = """
+import resource, sys, time
+start = time.perf_counter()
+from moon.cli import cli
+sys.argv = ["moon"] + sys.argv[1:]
+try:
+	cli()
+except SystemExit:
+	pass
+sys.stderr.write(f"{(time.perf_counter() - start) * 1000} {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}\\n")
+"""
+
+def measure(*arguments: str):
+	runs = []
+	for _ in range(REPEAT_NUMBER):
+		process = subprocess.run([sys.executable, "-c", RUNNER, *arguments], capture_output=True, text=True, check=True)
+		runs.append(tuple(map(float, process.stderr.split())))
+	return min(runs)
+
+def main():
+	print(f"{'lines':<10}{'source (ms)':>14}{'compiled (ms)':>14}{'source (MiB)':>14}{'compiled (MiB)':>16}")
+	with tempfile.TemporaryDirectory() as directory:
+		for blocks in (10, 100, 1000):
+			path = Path(directory) / f"script_{blocks}.mn"
+			path.write_text(BLOCK * blocks, encoding="utf-8")
+			subprocess.run([sys.executable, "-m", "moon", "compile", str(path)], capture_output=True, check=True)
+			source_time, source_memory = measure("--no-cache", str(path))
+			compiled_time, compiled_memory = measure(str(path.with_suffix(".mnc")))
+			print(
+				f"{blocks * BLOCK.count(chr(10)):<10}{source_time:>14.1f}{compiled_time:>14.1f}"
+				f"{source_memory / 1024:>14.1f}{compiled_memory / 1024:>16.1f}"
+			)
+
+if __name__ == "__main__":
+	main()
@@ -14,6 +14,20 @@ except PackageNotFoundError:
 __path__ = extend_path(__path__, __name__)
 
 
-from .lexer import build_lexer, tokens, print_tokens
-from .parser import build_parser
-from .interpreter import execute_program
\ No newline at end of file
+# Exports are imported on first use: running a compiled program never loads the front end (PLY)
+_EXPORTS = {
+    "build_lexer": "lexer",
+    "tokens": "lexer",
+    "print_tokens": "lexer",
+    "build_parser": "parser",
+    "to_tuples": "nodes",
+    "from_tuples": "nodes",
+    "execute_program": "interpreter",
+    "Hooks": "hooks",
+}
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        from importlib import import_module
+        return getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
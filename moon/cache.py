@@ -0,0 +1,159 @@
+import hashlib
+import os
+import pickle
+
+from functools import cache
+from pathlib import Path
+from typing import IO, Any, Optional, TextIO, Tuple, Union
+
+from . import __version__ as moon_version
+from . import nodes
+from .interpreter import TProgram
+
+# Cache types
+TPath = Union[str, "os.PathLike[str]"]
+# (format version, Moon version, grammar version, source hash)
+THeader = Tuple[int, str, str, str]
+
+CACHE_DIRECTORY = "__mooncache__"
+CACHE_SUFFIX = ".mnc"
+MAGIC = b"MOON"
+# Bumped whenever the pickled form of the program changes
+FORMAT_VERSION = 1
+
+@cache
+def grammar_version() -> str:
+	"""Hash of the grammar the parse tables were generated from."""
+	from .parsetab import _lr_signature
+	return hashlib.sha256(_lr_signature.encode()).hexdigest()[:16]
+
+def source_hash(source: str) -> str:
+	return hashlib.sha256(source.encode()).hexdigest()
+
+def file_hash(file: TextIO, chunk_size: int = 1 << 16) -> str:
+	"""Hash of a seekable text file, read in chunks, then rewound."""
+	digest = hashlib.sha256()
+	while chunk := file.read(chunk_size):
+		digest.update(chunk.encode())
+	file.seek(0)
+	return digest.hexdigest()
+
+class ProgramUnpickler(pickle.Unpickler):
+	"""Unpickles the nodes of moon.nodes and plain data only, never other objects.
+
+	A program may come from anywhere, unpickling must not run code a Moon
+	script could not."""
+
+	def find_class(self, module: str, name: str) -> Any:
+		if module == nodes.__name__:
+			node = getattr(nodes, name, None)
+			if isinstance(node, type) and issubclass(node, nodes.Node):
+				return node
+		raise pickle.UnpicklingError(f"{module}.{name} is not part of a Moon program")
+
+def dump_program(program: TProgram, file: IO[bytes], digest: str):
+	"""Writes a parsed program after a header identifying its source and this version of Moon."""
+	file.write(MAGIC)
+	header: THeader = (FORMAT_VERSION, moon_version, grammar_version(), digest)
+	pickle.dump(header, file, pickle.HIGHEST_PROTOCOL)
+	pickle.dump(program, file, pickle.HIGHEST_PROTOCOL)
+
+def load_program(file: IO[bytes], digest: Optional[str] = None) -> Optional[TProgram]:
+	"""Reads a program written by dump_program().
+
+	Returns None if it was written by another version of Moon. Given the digest
+	of a source, also if it was written for another source or by another grammar,
+	which only matters to tell whether a source would parse the same. The program
+	itself is not unpickled then.
+
+	Raises pickle.UnpicklingError if the program holds anything but nodes and data,
+	or if it is truncated or corrupt."""
+	if file.read(len(MAGIC)) != MAGIC:
+		return None
+	try:
+		format, version, grammar, stored_digest = ProgramUnpickler(file).load()
+	except Exception:
+		return None
+	if (format, version) != (FORMAT_VERSION, moon_version):
+		return None
+	elif digest is not None and (grammar, stored_digest) != (grammar_version(), digest):
+		return None
+	try:
+		return ProgramUnpickler(file).load()
+	except pickle.UnpicklingError:
+		raise
+	except Exception as error:
+		# A program cut short raises EOFError, a corrupt one about anything else
+		raise pickle.UnpicklingError(f"Truncated or corrupt program: {error!r}") from error
+
+class ProgramCache:
+	"""Parsed programs of Moon scripts, stored next to each script in __mooncache__.
+
+	An entry is only used for the exact source it was written for, by the same
+	version of Moon and of its grammar: anything else is a miss, and the entry
+	is overwritten. Sources with lexing or syntax errors are never stored, so
+	their errors are reported on every run."""
+
+	def __init__(self) -> None:
+		self.hits = 0
+		self.misses = 0
+
+	def path(self, script: TPath) -> Path:
+		script = Path(script)
+		return script.parent / CACHE_DIRECTORY / (script.name + CACHE_SUFFIX)
+
+	def load(self, script: TPath, digest: str) -> Optional[TProgram]:
+		try:
+			with open(self.path(script), "rb") as file:
+				program = load_program(file, digest)
+		except (OSError, pickle.UnpicklingError):
+			program = None
+
+		if program is None:
+			self.misses += 1
+		else:
+			self.hits += 1
+		return program
+
+	def store(self, script: TPath, digest: str, program: TProgram) -> bool:
+		"""Writes an entry, returns False if it could not be written, e.g. in a read-only directory."""
+		path = self.path(script)
+		temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+		try:
+			path.parent.mkdir(exist_ok=True)
+			with open(temporary, "wb") as file:
+				dump_program(program, file, digest)
+			# Concurrent runs of a script never read a partial entry
+			os.replace(temporary, path)
+		except (OSError, RecursionError, pickle.PicklingError):
+			# Pickling recurses on the depth of the AST
+			try:
+				os.remove(temporary)
+			except OSError:
+				pass
+			return False
+		return True
+
+	def parse(self, file: TextIO) -> Any:
+		"""Parses an open script, or loads it from the cache. The file must be seekable."""
+		digest = file_hash(file)
+		program = self.load(file.name, digest)
+		if program is not None:
+			return program
+
+		program, clean = parse_file(file)
+		if clean:
+			self.store(file.name, digest, program)
+		return program
+
+def parse_file(file: TextIO) -> Tuple[Any, bool]:
+	"""Parses an open script as it is read. Returns the program and whether it
+	was free of lexing and syntax errors."""
+	from . import parser as parser_module
+	from .lexer import StreamingLexer
+
+	errors = parser_module.syntax_error_count
+	lexer = StreamingLexer(file)
+	program = parser_module.build_parser().parse(lexer=lexer)
+	clean = program is not None and not lexer.errors and parser_module.syntax_error_count == errors
+	return program, clean
@@ -1,14 +1,44 @@
-from typing import Optional
-from typer import Argument, FileText, Option, Typer
-from pprint import pprint
+from pickle import UnpicklingError
+from pathlib import Path
+from typing import IO, List, Optional, TextIO
+from click import Choice, Context
+from typer import Argument, FileText, Option, Typer, echo
+from typer.core import TyperGroup
 
 from . import __version__ as moon_version
-from .lexer import build_lexer, print_tokens
-from .parser import build_parser
-from .interpreter import TEnvironment, execute_program
+from .cache import (
+    CACHE_DIRECTORY,
+    CACHE_SUFFIX,
+    MAGIC,
+    ProgramCache,
+    dump_program,
+    load_program,
+    parse_file,
+    source_hash,
+)
+from .interpreter import BACKENDS, TBackend, TEnvironment, TProgram, execute_program
+from .optimizer import PassManager
+from .profiler import PROFILE_SUFFIX, Profiler
+from .resolver import UndefinedNameError, check_program
+
+# The lexer and the parser are imported where source code is read:
+# running a compiled program does not load the front end (PLY) at all
+
+
+class MoonGroup(TyperGroup):
+    """Runs `moon FILE` as `moon run FILE`."""
+
+    def resolve_command(self, ctx: Context, args: List[str]):
+        # A lone "-" is not an option but the script read from stdin
+        if args and args[0] not in self.commands and (args[0] == "-" or not args[0].startswith("-")):
+            return "run", self.commands["run"], args
+        return super().resolve_command(ctx, args)
+
 
+BACKEND_HELP = "Execution backend. With closure and python, recursions cannot go deeper than Python's recursion limit."
 
 cli = Typer(
+    cls=MoonGroup,
     help="Moon CLI",
     add_completion=False,
 )
@@ -17,8 +47,14 @@ cli = Typer(
 def run_code(
         source_code: str, 
         debug: bool,
-        environment: Optional[TEnvironment] = None
+        environment: Optional[TEnvironment] = None,
+        backend: TBackend = "tiered",
+        optimize: bool = False,
+        profile: Optional[Path] = None,
     ):
+    from .lexer import build_lexer, print_tokens
+    from .parser import build_parser
+
     lexer = build_lexer()
     lexer.input(source_code)
 
@@ -30,14 +66,141 @@ def run_code(
     parser = build_parser()
     parsed_code = parser.parse(source_code+'\n', lexer=lexer)
 
+    run_program(parsed_code, debug, environment, backend, optimize, profile, source_code)
+
+def run_program(
+        parsed_code: TProgram,
+        debug: bool,
+        environment: Optional[TEnvironment] = None,
+        backend: TBackend = "tiered",
+        optimize: bool = False,
+        profile: Optional[Path] = None,
+        source_code: Optional[str] = None,
+    ):
+    """Runs a parsed program. With a profile path, the run is profiled: its report
+    is printed once it ends and its JSON profile written to that path."""
+    if optimize:
+        passes = PassManager()
+        parsed_code = passes.run(parsed_code)
+
+    if debug and optimize:
+        print("===== Passes =====")
+        for name, seconds in passes.timings.items():
+            print(f"{name:<12} {seconds * 1000:.3f} ms")
+        print("==================")
+
     if debug:
+        from .parser import print_ast
         print("=====  AST   =====")
-        pprint(parsed_code)
+        print_ast(parsed_code)
         print("==================")
 
-    execute_program(parsed_code, environment=environment)
+    try:
+        check_program(parsed_code, environment or ())
+    except UndefinedNameError as error:
+        # The program still runs: a name is only an error once it is read
+        echo(f"[warning] {error}", err=True)
+
+    if debug and backend == "vm":
+        from .vm import compile_bytecode, disassemble
+        print("===== Bytecode =====")
+        print(disassemble(compile_bytecode(parsed_code)))
+        print("====================")
+
+    tiers = None
+    if debug and backend == "tiered":
+        from .tiered import Tiers
+        # Tier-up and deopt events are printed as they happen
+        tiers = Tiers(log=print)
+
+    if profile is None:
+        execute_program(parsed_code, environment=environment, backend=backend, tiers=tiers)
+        return
+
+    profiler = Profiler(source_code)
+    profiler.start(parsed_code)
+    try:
+        execute_program(parsed_code, environment=environment, backend=backend, tiers=tiers, hooks=profiler.hooks)
+    finally:
+        profiler.stop()
+        print("===== Profile =====")
+        print(profiler.report())
+        print("===================")
+        profiler.write(profile)
+        print(f"Profile written to {profile}")
+
+def run_file(
+        file: TextIO,
+        debug: bool,
+        backend: TBackend = "tiered",
+        cache: bool = True,
+        optimize: bool = False,
+        profile: Optional[Path] = None,
+    ):
+    if debug:
+        # Debugging prints the whole source anyway
+        run_code(file.read(), debug, backend=backend, optimize=optimize, profile=profile)
+        return
 
-def start_playground(debug: bool):
+    if cache and file.seekable():
+        # Parsed once per version of the script, see ProgramCache
+        parsed_code = ProgramCache().parse(file)
+    else:
+        # The source is lexed as it is read, never held as a single string
+        parsed_code, _ = parse_file(file)
+
+    source_code = None
+    if profile is not None and file.seekable():
+        # The report shows the source of its lines
+        file.seek(0)
+        source_code = file.read()
+
+    run_program(parsed_code, debug, backend=backend, optimize=optimize, profile=profile, source_code=source_code)
+
+def is_compiled(buffer: IO[bytes]) -> bool:
+    """Tells whether a binary stream holds a compiled program, without consuming it."""
+    if hasattr(buffer, "peek"):
+        return buffer.peek(len(MAGIC))[:len(MAGIC)] == MAGIC # type: ignore
+    position = buffer.tell()
+    header = buffer.read(len(MAGIC))
+    buffer.seek(position)
+    return header == MAGIC
+
+def run_compiled(
+        file: IO[bytes],
+        debug: bool,
+        backend: TBackend = "tiered",
+        profile: Optional[Path] = None,
+    ):
+    """Runs a program written by `moon compile`, nothing is lexed nor parsed."""
+    try:
+        parsed_code = load_program(file)
+    except UnpicklingError as error:
+        raise SystemExit(f"{file.name} is not a compiled Moon program: {error}")
+    if parsed_code is None:
+        raise SystemExit(f"{file.name} was compiled by another version of Moon, compile it again.")
+
+    run_program(parsed_code, debug, backend=backend, profile=profile)
+
+def compile_file(file: TextIO, output: IO[bytes], optimize: bool = True) -> bool:
+    """Writes the program of a script to output, returns False if it has lexing or syntax errors."""
+    parsed_code, clean = parse_file(file)
+    if not clean:
+        return False
+
+    try:
+        check_program(parsed_code)
+    except UndefinedNameError as error:
+        echo(f"[warning] {error}", err=True)
+
+    if optimize:
+        parsed_code = PassManager().run(parsed_code)
+
+    file.seek(0)
+    dump_program(parsed_code, output, source_hash(file.read()))
+    return True
+
+def start_playground(debug: bool, backend: TBackend = "tiered", optimize: bool = False):
     print(f"Moon interactive playground (v{moon_version})")
     print("Type Moon code. Finish a block with an empty line. Ctrl+C to exit.\n")
 
@@ -57,24 +220,69 @@ def start_playground(debug: bool):
                 lines.append(line)
 
             code_block = "\n".join(lines)
-            run_code(code_block, debug, environment)
+            run_code(code_block, debug, environment, backend, optimize)
 
         except KeyboardInterrupt:
             print("\nGoodbye!")
             break
         except Exception as e:
             print(f"[error] {e}")
-            environment = env_backup
+            # Restored in place: actions keep a reference to this environment
+            environment.clear()
+            environment.update(env_backup)
 
 
 @cli.callback(invoke_without_command=True)
 def main(
-    filename: Optional[FileText] = Argument(None, help="Path to the Moon script file."),
-    debug: bool = Option(False, "-d", "--debug", help="Enable debugging mode.")
+    ctx: Context,
+    debug: bool = Option(False, "-d", "--debug", help="Enable debugging mode."),
+    backend: str = Option("tiered", "-b", "--backend", click_type=Choice(BACKENDS), help=BACKEND_HELP),
+    no_cache: bool = Option(False, "--no-cache", help=f"Neither read nor write {CACHE_DIRECTORY}."),
+    optimize: bool = Option(False, "-O", "--optimize", help="Run the optimization passes before executing."),
+    profile: bool = Option(False, "--profile", help=f"Profile the script, its JSON profile is written to the script's path with a {PROFILE_SUFFIX} suffix."),
 ):
-    if filename:
-        with filename as f:
-            source_code = f.read()
-        run_code(source_code, debug)
-    else:
-        start_playground(debug)
\ No newline at end of file
+    if ctx.invoked_subcommand is None:
+        start_playground(debug, backend, optimize) # type: ignore
+
+@cli.command("run")
+def run_command(
+    ctx: Context,
+    filename: FileText = Argument(..., help=f"Path to a Moon script, or to a program compiled to {CACHE_SUFFIX}."),
+    debug: bool = Option(False, "-d", "--debug", help="Enable debugging mode."),
+    backend: Optional[str] = Option(None, "-b", "--backend", click_type=Choice(BACKENDS), help=BACKEND_HELP),
+    no_cache: bool = Option(False, "--no-cache", help=f"Neither read nor write {CACHE_DIRECTORY}."),
+    optimize: bool = Option(False, "-O", "--optimize", help="Run the optimization passes before executing."),
+    profile: bool = Option(False, "--profile", help=f"Profile the script, its JSON profile is written to the script's path with a {PROFILE_SUFFIX} suffix."),
+):
+    """Run a Moon script or a compiled program."""
+    # Options given before the file, as in `moon -b vm script.mn`, apply too
+    options = ctx.parent.params if ctx.parent else dict()
+    debug = debug or options.get("debug", False)
+    backend = backend or options.get("backend", "tiered")
+    # A script read from stdin has no directory to be cached in
+    no_cache = no_cache or options.get("no_cache", False) or filename.name == "<stdin>"
+    optimize = optimize or options.get("optimize", False)
+    profile_path = Path(filename.name).with_suffix(PROFILE_SUFFIX) if profile or options.get("profile", False) else None
+
+    with filename as f:
+        if is_compiled(f.buffer): # type: ignore
+            run_compiled(f.buffer, debug, backend=backend, profile=profile_path) # type: ignore
+        else:
+            # A compiled program is optimized when it is compiled
+            run_file(f, debug, backend=backend, cache=not no_cache, optimize=optimize, profile=profile_path) # type: ignore
+
+@cli.command("compile")
+def compile_command(
+    filename: FileText = Argument(..., help="Path to the Moon script file."),
+    output: Optional[Path] = Option(None, "-o", "--output", help=f"Compiled program, the script's path with a {CACHE_SUFFIX} suffix by default."),
+    no_optimize: bool = Option(False, "--no-optimize", help="Skip the optimization passes."),
+):
+    """Compile a Moon script to a program that runs without lexing nor parsing."""
+    path = output or Path(filename.name).with_suffix(CACHE_SUFFIX)
+    with filename as f, open(path, "wb") as output_file:
+        compiled = compile_file(f, output_file, optimize=not no_optimize)
+
+    if not compiled:
+        path.unlink()
+        raise SystemExit(f"{filename.name} has errors, it was not compiled.")
+    print(f"Compiled {filename.name} to {path}")
@@ -0,0 +1,600 @@
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from . import nodes
+from .interpreter import (
+	BINARY_OPERATORS,
+	MISSING,
+	SKIP,
+	STOP,
+	Action,
+	ResultType,
+	Scope,
+	Signal,
+	TailCallType,
+	TEnvironment,
+	TInputCallback,
+	TOutputCallback,
+	TProgram,
+	TStatement,
+	autocast,
+	can_signal,
+	custom_repr,
+	operator_chain,
+)
+from .resolver import Layout, Resolver
+
+if TYPE_CHECKING:
+	from .hooks import Hooks
+	from .memo import ActionCache
+
+# Compiler types
+TFrame = Union[TEnvironment, List[Any]]
+TClosure = Callable[[TFrame], Any]
+TStore = Callable[[TFrame, Any], None]
+# Compiled action body: (slotted, body, number of params, initial value of the locals)
+TActionCode = Tuple[bool, TClosure, int, Tuple[Any, ...]]
+
+class Unbound:
+	"""Value of a frame slot that has not been assigned yet."""
+	__slots__ = ()
+
+	def __repr__(self) -> str:
+		return "<unbound>"
+
+UNBOUND = Unbound()
+
+def unbound(name: str):
+	raise KeyError(name)
+
+class Compiler:
+	"""Turns the AST into a tree of specialized closures, once.
+
+	Every closure takes the frame it runs in and returns the value of its node,
+	or a Signal (STOP, SKIP or a ResultType) for statements. Top-level code
+	runs on the environment dictionary. Action bodies run on a list frame whose
+	slots are assigned by the resolver, unless there is a statement or a loop
+	hook: they then run on a Scope, so that the hook can inspect their variables.
+
+	Only the hooks registered when the compiler is created are compiled in."""
+
+	def __init__(
+			self,
+			hooks: Optional["Hooks"] = None,
+			output_callback: TOutputCallback = print,
+			input_callback: TInputCallback = input,
+			layouts: Optional[Dict[int, Layout]] = None,
+			action_cache: Optional["ActionCache"] = None,
+	) -> None:
+		self.hooks = hooks
+		self.on_statement = hooks.on_statement if hooks is not None else None
+		self.on_loop = hooks.on_loop if hooks is not None else None
+		self.action_cache = action_cache
+		self.output_callback = output_callback
+		self.input_callback = input_callback
+		self.slotted = self.on_statement is None and self.on_loop is None
+		if hooks is not None and hooks.calls():
+			self.call_action = self.hooked_call_action # type: ignore
+		# id(block) -> layout of the action owning that block
+		self.layouts: Dict[int, Layout] = layouts or dict()
+		# Layout of the action being compiled, None for top-level code
+		self.layout: Optional[Layout] = None
+		# id(block) -> (block, code), the block is kept alive so its id stays unique
+		self.blocks: Dict[int, Tuple[List[TStatement], TActionCode]] = dict()
+		# Node kind -> compile method
+		self.compilers: Dict[int, Callable[[Any], TClosure]] = {
+			nodes.LITERAL: self.compile_literal,
+			nodes.NAME: self.compile_variable,
+			nodes.LIST_COMPOSITE: self.compile_list_composite,
+			nodes.DICT_COMPOSITE: self.compile_dict_composite,
+			nodes.VARIABLE_DECLARATION: self.compile_variable_declaration_statement,
+			nodes.BINARY_EXPRESSION: self.compile_expression,
+			nodes.NOT_EXPRESSION: self.compile_not_expression,
+			nodes.IF_ELSE: self.compile_ifelse_statements,
+			nodes.WHILE: self.compile_while_statements,
+			nodes.STOP: self.compile_stop_statement,
+			nodes.SKIP: self.compile_skip_statement,
+			nodes.ACTION_DEFINITION: self.compile_action_statements,
+			nodes.CALL: self.compile_call,
+			nodes.RESULT: self.compile_result_statement,
+			nodes.PRINT: self.compile_print_statement,
+			nodes.ASK: self.compile_ask,
+		}
+
+	def compile(self, statement: TStatement) -> TClosure:
+		method = self.compilers.get(statement.kind)
+		return method(statement) if method else self.compile_unknown(statement)
+
+	def compile_statement(self, statement: TStatement) -> TClosure:
+		"""Compiles a statement of a block, reported to the statement hook if there is one."""
+		closure = self.compile(statement)
+		on_statement = self.on_statement
+		if on_statement is None:
+			return closure
+
+		def traced(frame: TFrame):
+			on_statement(statement, frame) # type: ignore
+			return closure(frame)
+
+		return traced
+
+	def compile_block(self, block: List[TStatement]) -> TClosure:
+		"""Compiles a suite of statements, returning the first signal raised by one of them."""
+		statements = [self.compile_statement(statement) for statement in block]
+
+		if not can_signal(block):
+			def execute_block(frame: TFrame):
+				for statement in statements:
+					statement(frame)
+		else:
+			def execute_block(frame: TFrame):
+				for statement in statements:
+					result = statement(frame)
+					if isinstance(result, Signal):
+						return result
+
+		return execute_block
+
+	def compile_action(self, params: List[str], block: List[TStatement]) -> TActionCode:
+		"""Returns the compiled body of an action, compiling it on first use."""
+		key = id(block)
+		if key not in self.blocks:
+			enclosing, self.layout = self.layout, self.layouts.get(key) if self.slotted else None
+			statements = [self.compile_statement(statement) for statement in block]
+			layout, self.layout = self.layout, enclosing
+
+			if not can_signal(block):
+				def execute_action(frame: TFrame):
+					result = None
+					for statement in statements:
+						result = statement(frame)
+					return result
+			else:
+				def execute_action(frame: TFrame):
+					result = None
+					for statement in statements:
+						result = statement(frame)
+						if isinstance(result, ResultType):
+							return result.value
+						elif isinstance(result, TailCallType):
+							return result
+					if result is STOP or result is SKIP:
+						return None
+					return result
+
+			if layout is None:
+				code = (False, execute_action, len(params), ())
+			else:
+				code = (True, execute_action, len(params), (UNBOUND,) * (layout.size - 1 - len(params)))
+			self.blocks[key] = (block, code)
+		return self.blocks[key][1]
+
+	def compile_foreign_action(self, action: Action) -> TActionCode:
+		"""Compiles an action created by another backend, as if it was defined at top level."""
+		if self.slotted and id(action.block) not in self.blocks:
+			known, scope = set(), action.scope
+			while scope is not None:
+				known.update(scope)
+				scope = getattr(scope, "parent", None)
+			resolver = Resolver(known)
+			resolver.resolve_action(action.params, action.block, None)
+			self.layouts.update(resolver.layouts)
+
+		enclosing, self.layout = self.layout, None
+		action.code = self.compile_action(action.params, action.block)
+		self.layout = enclosing
+		return action.code
+
+	# Frames
+
+	def resolve(self, name: str) -> List[Tuple[int, Optional[int]]]:
+		"""Returns where a name may be bound, see Layout.chain(), as (frames to walk up, slot)
+		pairs. The slot is None in the environment dictionary."""
+		if self.layout is None:
+			return [(0, None)]
+		return self.layout.chain(name)
+
+	def compile_load(self, name: str) -> TClosure:
+		chain = self.resolve(name)
+		if len(chain) > 1:
+			return self.compile_chained_load(name, chain)
+		depth, slot = chain[0]
+
+		if slot is None:
+			if depth == 0:
+				return lambda frame: frame[name]
+			elif depth == 1:
+				return lambda frame: frame[0][name]
+
+			def load_global(frame: TFrame):
+				for _ in range(depth):
+					frame = frame[0] # type: ignore
+				return frame[name] # type: ignore
+
+			return load_global
+
+		if depth == 0:
+			def load_local(frame: TFrame):
+				value = frame[slot] # type: ignore
+				return value if value is not UNBOUND else unbound(name)
+
+			return load_local
+
+		def load_enclosing(frame: TFrame):
+			for _ in range(depth):
+				frame = frame[0] # type: ignore
+			value = frame[slot] # type: ignore
+			return value if value is not UNBOUND else unbound(name)
+
+		return load_enclosing
+
+	def compile_chained_load(self, name: str, chain: List[Tuple[int, Optional[int]]]) -> TClosure:
+		"""Loads a name from the first of several scopes binding it."""
+		def load_bound(frame: TFrame):
+			for depth, slot in chain:
+				scope = frame
+				for _ in range(depth):
+					scope = scope[0] # type: ignore
+				if slot is None:
+					return scope[name] # type: ignore
+				value = scope[slot] # type: ignore
+				if value is not UNBOUND:
+					return value
+			return unbound(name)
+
+		depth, slot = chain[0]
+		if depth != 0:
+			return load_bound
+
+		def load_local(frame: TFrame):
+			value = frame[slot] # type: ignore
+			return value if value is not UNBOUND else load_bound(frame)
+
+		return load_local
+
+	def compile_store(self, name: str) -> TStore:
+		chain = self.resolve(name)
+		if len(chain) > 1:
+			return self.compile_chained_store(name, chain)
+		depth, slot = chain[0]
+		key = slot if slot is not None else name
+
+		if depth == 0:
+			def store(frame: TFrame, value: Any):
+				frame[key] = value # type: ignore
+		else:
+			def store(frame: TFrame, value: Any):
+				for _ in range(depth):
+					frame = frame[0] # type: ignore
+				frame[key] = value # type: ignore
+
+		return store
+
+	def compile_chained_store(self, name: str, chain: List[Tuple[int, Optional[int]]]) -> TStore:
+		"""Stores a name in the first of several scopes binding it, in the innermost one if none does."""
+		def store_bound(frame: TFrame, value: Any):
+			for depth, slot in chain:
+				scope = frame
+				for _ in range(depth):
+					scope = scope[0] # type: ignore
+				if slot is None:
+					if name in scope: # type: ignore
+						scope[name] = value # type: ignore
+						return
+				elif scope[slot] is not UNBOUND: # type: ignore
+					scope[slot] = value # type: ignore
+					return
+			depth, slot = chain[0]
+			for _ in range(depth):
+				frame = frame[0] # type: ignore
+			frame[slot] = value # type: ignore
+
+		depth, slot = chain[0]
+		if depth != 0:
+			return store_bound
+
+		def store(frame: TFrame, value: Any):
+			if frame[slot] is not UNBOUND: # type: ignore
+				frame[slot] = value # type: ignore
+			else:
+				store_bound(frame, value)
+
+		return store
+
+	# Primitive Types
+
+	def compile_literal(self, literal: nodes.Literal) -> TClosure:
+		value = literal.value
+		return lambda frame: value
+
+	# Composite Types
+
+	def compile_list_composite(self, composite: nodes.ListComposite) -> TClosure:
+		def list_composite(frame: TFrame):
+			raise NotImplementedError("Lists are not yet implemented.")
+		return list_composite
+
+	def compile_dict_composite(self, composite: nodes.DictComposite) -> TClosure:
+		def dict_composite(frame: TFrame):
+			raise NotImplementedError("Dictionaries are not yet implemented.")
+		return dict_composite
+
+	# Variable Declaration and Initialization
+
+	def compile_variable_declaration_statement(self, declaration: nodes.VariableDeclaration) -> TClosure:
+		varname = declaration.name
+		value = self.compile(declaration.value)
+		chain = self.resolve(varname)
+		depth, slot = chain[0]
+
+		if len(chain) == 1 and depth == 0:
+			key = slot if slot is not None else varname
+
+			def variable_declaration(frame: TFrame):
+				frame[key] = value(frame) # type: ignore
+		else:
+			store = self.compile_store(varname)
+
+			def variable_declaration(frame: TFrame):
+				store(frame, value(frame))
+
+		return variable_declaration
+
+	# Expressions
+
+	def compile_not_expression(self, expression: nodes.NotExpression) -> TClosure:
+		operand = self.compile(expression.operand)
+		return lambda frame: not operand(frame)
+
+	def compile_expression(self, expression: nodes.BinaryExpression) -> TClosure:
+		operator, left, right = expression.operator, expression.left, expression.right
+		if left.kind == nodes.BINARY_EXPRESSION:
+			first, links = operator_chain(expression)
+			return self.compile_chain(first, links)
+
+		leftvalue = self.compile(left)
+		rightvalue = self.compile(right)
+
+		if operator == "and":
+			return lambda frame: leftvalue(frame) and rightvalue(frame)
+		elif operator == "or":
+			return lambda frame: leftvalue(frame) or rightvalue(frame)
+
+		function = BINARY_OPERATORS[operator]
+
+		# Specialize the common `variable <operator> variable|literal` shapes
+		in_environment = self.layout is None
+		left_is_name = left.kind == nodes.NAME
+		right_is_literal = right.kind == nodes.LITERAL
+		if in_environment and left_is_name and right.kind == nodes.NAME:
+			left_name, right_name = left.name, right.name
+			return lambda frame: function(frame[left_name], frame[right_name])
+		elif in_environment and left_is_name and right_is_literal:
+			left_name, constant = left.name, right.value
+			return lambda frame: function(frame[left_name], constant)
+		elif right_is_literal:
+			constant = right.value
+			return lambda frame: function(leftvalue(frame), constant)
+
+		return lambda frame: function(leftvalue(frame), rightvalue(frame))
+
+	def compile_chain(self, first: TStatement, links: List[Tuple[str, TStatement]]) -> TClosure:
+		"""Folds a chain of binary operators in a loop, instead of nesting one closure per operator."""
+		start = self.compile(first)
+		steps = [(operator, self.compile(right)) for operator, right in links]
+
+		if not any(operator in ("and", "or") for operator, _ in steps):
+			functions = [(BINARY_OPERATORS[operator], right) for operator, right in steps]
+
+			def chain(frame: TFrame):
+				value = start(frame)
+				for function, right in functions:
+					value = function(value, right(frame))
+				return value
+
+			return chain
+
+		def logical_chain(frame: TFrame):
+			value = start(frame)
+			for operator, right in steps:
+				if operator == "and":
+					if value:
+						value = right(frame)
+				elif operator == "or":
+					if not value:
+						value = right(frame)
+				else:
+					value = BINARY_OPERATORS[operator](value, right(frame))
+			return value
+
+		return logical_chain
+
+	# Control Structures
+
+	def compile_ifelse_statements(self, statement: nodes.IfElse) -> TClosure:
+		test = self.compile(statement.condition)
+		if_branch = self.compile_block(statement.if_block)
+		else_branch = self.compile_block(statement.else_block) if statement.else_block else None
+
+		def ifelse_statements(frame: TFrame):
+			if test(frame):
+				return if_branch(frame)
+			elif else_branch:
+				return else_branch(frame)
+
+		return ifelse_statements
+
+	# Loop structure
+
+	def compile_while_statements(self, statement: nodes.While) -> TClosure:
+		block = statement.block
+		test = self.compile(statement.condition)
+		body = self.compile_block(block)
+		on_loop = self.on_loop
+
+		if on_loop is not None:
+			def while_statements(frame: TFrame):
+				while test(frame):
+					on_loop(statement, frame) # type: ignore
+					result = body(frame)
+					if result is None or result is SKIP:
+						continue
+					elif result is STOP:
+						break
+					return result
+		elif not can_signal(block):
+			def while_statements(frame: TFrame):
+				while test(frame):
+					body(frame)
+		else:
+			def while_statements(frame: TFrame):
+				while test(frame):
+					result = body(frame)
+					if result is None or result is SKIP:
+						continue
+					elif result is STOP:
+						break
+					return result
+
+		return while_statements
+
+	def compile_stop_statement(self, statement: nodes.Stop) -> TClosure:
+		return lambda frame: STOP
+
+	def compile_skip_statement(self, statement: nodes.Skip) -> TClosure:
+		return lambda frame: SKIP
+
+	# Functions
+
+	def compile_action_statements(self, statement: nodes.ActionDefinition) -> TClosure:
+		params, block = statement.params, statement.block
+		code = self.compile_action(params, block)
+		store = self.compile_store(statement.name)
+
+		def action_statements(frame: TFrame):
+			action = Action(params, block, frame) # type: ignore
+			action.code = code
+			store(frame, action)
+
+		return action_statements
+
+	def compile_call(self, statement: nodes.Call) -> TClosure:
+		arguments = [self.compile(arg) for arg in statement.args]
+		load = self.compile_load(statement.name)
+		call_action = self.cached_call_action if self.action_cache is not None else self.call_action
+
+		def call(frame: TFrame):
+			param_values = [argument(frame) for argument in arguments]
+			return call_action(load(frame), param_values)
+
+		return call
+
+	def cached_call_action(self, action: Action, param_values: List[Any]) -> Any:
+		key = self.action_cache.key(action, param_values) if self.action_cache is not None else None
+		if key is None:
+			return self.call_action(action, param_values)
+
+		result = self.action_cache.get(key) # type: ignore
+		if result is MISSING:
+			result = self.call_action(action, param_values)
+			self.action_cache.put(key, result) # type: ignore
+		return result
+
+	def call_action(self, action: Action, param_values: List[Any]) -> Any:
+		"""Runs an action call. Tail calls loop here instead of nesting Python frames."""
+		while True:
+			slotted, body, params_number, locals = action.code or self.compile_foreign_action(action)
+
+			if not slotted:
+				result = body(Scope(action.scope, zip(action.params, param_values)))
+			else:
+				if len(param_values) != params_number:
+					# Missing arguments stay unbound, extra ones are dropped
+					param_values = (param_values + [UNBOUND] * params_number)[:params_number]
+				result = body([action.scope, *param_values, *locals])
+
+			if not isinstance(result, TailCallType):
+				return result
+			action, param_values = result.action, result.param_values
+
+	def hooked_call_action(self, action: Action, param_values: List[Any]) -> Any:
+		"""call_action() reporting its calls to the call and return hooks, see Hooks.run_action()."""
+		return self.hooks.run_action(self.run_body, action, param_values) # type: ignore
+
+	def run_body(self, action: Action, param_values: List[Any]) -> Any:
+		"""Runs the body of an action once, a tail call is returned."""
+		slotted, body, params_number, locals = action.code or self.compile_foreign_action(action)
+		if not slotted:
+			return body(Scope(action.scope, zip(action.params, param_values)))
+		if len(param_values) != params_number:
+			param_values = (param_values + [UNBOUND] * params_number)[:params_number]
+		return body([action.scope, *param_values, *locals])
+
+	def compile_result_statement(self, statement: nodes.Result) -> TClosure:
+		expression = statement.expressions[0]
+		if expression.kind == nodes.CALL:
+			arguments = [self.compile(arg) for arg in expression.args]
+			load = self.compile_load(expression.name)
+
+			def tail_call(frame: TFrame):
+				param_values = [argument(frame) for argument in arguments]
+				return TailCallType(load(frame), param_values)
+
+			return tail_call
+
+		value = self.compile(expression)
+		return lambda frame: ResultType(value(frame))
+
+	# Built-in
+
+	def compile_print_statement(self, statement: nodes.Print) -> TClosure:
+		arguments = [self.compile(expression) for expression in statement.expressions]
+		output_callback = self.output_callback
+
+		def print_statement(frame: TFrame):
+			output_callback(*[custom_repr(argument(frame)) for argument in arguments])
+
+		return print_statement
+
+	def compile_ask(self, statement: nodes.Ask) -> TClosure:
+		arguments = [self.compile(expression) for expression in statement.expressions]
+		input_callback = self.input_callback
+
+		def ask(frame: TFrame):
+			prompt = ' '.join([argument(frame) for argument in arguments])
+			return autocast(input_callback(prompt))
+
+		return ask
+
+	# Variable
+
+	def compile_variable(self, name: nodes.Name) -> TClosure:
+		return self.compile_load(name.name)
+
+	def compile_unknown(self, statement: TStatement) -> TClosure:
+		return lambda frame: print(f"Un-case {statement}")
+
+def compile_program(
+		program: TProgram,
+		/,
+		hooks: Optional["Hooks"] = None,
+		output_callback: TOutputCallback = print,
+		input_callback: TInputCallback = input,
+		known: Iterable[str] = (),
+		action_cache: Optional["ActionCache"] = None,
+) -> TClosure:
+	"""Compiles a whole program into a single closure taking the global environment.
+
+	`known` holds the names already defined in that environment, a name that is
+	neither known nor assigned by the program is only looked up when it is read."""
+	layouts = Resolver(known).resolve_program(program)
+	compiler = Compiler(hooks, output_callback, input_callback, layouts, action_cache)
+	statements = [compiler.compile_statement(statement) for statement in program]
+
+	def execute(environment: TEnvironment):
+		for statement in statements:
+			result = statement(environment)
+			if isinstance(result, TailCallType):
+				# `result call ...` at top level still runs the call
+				compiler.cached_call_action(result.action, result.param_values)
+
+	return execute
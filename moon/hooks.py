@@ -0,0 +1,148 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .interpreter import Action, TailCallType, TFrame, TOutputCallback
+
+# Hook types
+THook = Callable[..., None]
+# Runs one action body, returns its value or the TailCallType it ends with
+TBodyRunner = Callable[[Action, List[Any]], Any]
+# Frame running one action body, see run_action_frames()
+TBodyFrames = Callable[[Action, List[Any]], TFrame]
+
+# Events, and the arguments their hooks are called with
+STATEMENT = "statement" # (statement, environment), before a statement of a block runs
+CALL = "call"           # (action, param_values), before the body of an action runs
+RETURN = "return"       # (action, value), once the body of an action, and its tail calls, have run
+LOOP = "loop"           # (statement, environment), before every iteration of a `while` loop
+OUTPUT = "output"       # (*values), the strings a `print` outputs, before they are output
+HOOK_EVENTS = (STATEMENT, CALL, RETURN, LOOP, OUTPUT)
+
+class Sampled:
+	"""Runs a hook on every Nth event only: the Nth, the 2Nth, and so on."""
+	__slots__ = ("callback", "every", "count")
+
+	def __init__(self, callback: THook, every: int) -> None:
+		self.callback = callback
+		self.every = every
+		self.count = 0
+
+	def __call__(self, *args: Any) -> None:
+		self.count += 1
+		if self.count == self.every:
+			self.count = 0
+			self.callback(*args)
+
+class Hooks:
+	"""Callbacks run on the events of a program, registered per event with add().
+
+	on_<event> is the function a backend calls for an event, None when no hook
+	is registered for it. Backends read them once, when a run starts: an event
+	without a hook costs nothing, its check is not even compiled, and a run
+	with no hook at all runs exactly as without Hooks.
+
+	execute_program(..., hooks=hooks) runs a program with them."""
+
+	def __init__(self) -> None:
+		# event -> [(callback, every), ...], in registration order
+		self.hooks: Dict[str, List[Tuple[THook, int]]] = {event: [] for event in HOOK_EVENTS}
+		self.on_statement: Optional[THook] = None
+		self.on_call: Optional[THook] = None
+		self.on_return: Optional[THook] = None
+		self.on_loop: Optional[THook] = None
+		self.on_output: Optional[THook] = None
+
+	def __bool__(self) -> bool:
+		return any(self.hooks.values())
+
+	def add(self, event: str, callback: THook, every: int = 1):
+		"""Runs callback on every event, or on every Nth one only to keep tracing cheap."""
+		if event not in self.hooks:
+			raise ValueError(f"Unknown event '{event}', expected one of {HOOK_EVENTS}")
+		if every < 1:
+			raise ValueError(f"every must be positive, got {every}")
+		self.hooks[event].append((callback, every))
+		self.dispatch(event)
+
+	def remove(self, event: str, callback: THook):
+		self.hooks[event] = [(hook, every) for hook, every in self.hooks[event] if hook != callback]
+		self.dispatch(event)
+
+	def copy(self) -> "Hooks":
+		hooks = Hooks()
+		for event, registered in self.hooks.items():
+			for callback, every in registered:
+				hooks.add(event, callback, every)
+		return hooks
+
+	def dispatch(self, event: str):
+		"""Builds on_<event>, calling the hooks of event in order. Sampling counters restart."""
+		hooks = [callback if every == 1 else Sampled(callback, every) for callback, every in self.hooks[event]]
+
+		if not hooks:
+			dispatcher = None
+		elif len(hooks) == 1:
+			dispatcher = hooks[0]
+		else:
+			def dispatcher(*args: Any) -> None:
+				for hook in hooks:
+					hook(*args)
+
+		setattr(self, f"on_{event}", dispatcher)
+
+	# Backends
+
+	def calls(self) -> bool:
+		"""Whether action calls must be reported, see run_action()."""
+		return self.on_call is not None or self.on_return is not None
+
+	def run_action(self, body: TBodyRunner, action: Action, param_values: List[Any]) -> Any:
+		"""Runs an action call with a backend's body runner, reporting it to the call and return hooks.
+
+		Tail calls loop here too. Each action returns once its tail calls have,
+		in reverse order, as if they were regular calls."""
+		on_call, on_return = self.on_call, self.on_return
+		actions: List[Action] = []
+		while True:
+			if on_call is not None:
+				on_call(action, param_values)
+			actions.append(action)
+			result = body(action, param_values)
+			if not isinstance(result, TailCallType):
+				break
+			action, param_values = result.action, result.param_values
+
+		if on_return is not None:
+			for action in reversed(actions):
+				on_return(action, result)
+		return result
+
+	def run_action_frames(self, body: TBodyFrames, action: Action, param_values: List[Any]) -> TFrame:
+		"""run_action() in a frame of the interpreter, see interpreter.run_frames(): body runs
+		one action body in a frame too."""
+		on_call, on_return = self.on_call, self.on_return
+		actions: List[Action] = []
+		while True:
+			if on_call is not None:
+				on_call(action, param_values)
+			actions.append(action)
+			result = yield from body(action, param_values)
+			if not isinstance(result, TailCallType):
+				break
+			action, param_values = result.action, result.param_values
+
+		if on_return is not None:
+			for action in reversed(actions):
+				on_return(action, result)
+		return result
+
+	def output(self, output_callback: TOutputCallback) -> TOutputCallback:
+		"""output_callback, reporting every output to the output hook first."""
+		on_output = self.on_output
+		if on_output is None:
+			return output_callback
+
+		def output(*values: Any) -> None:
+			on_output(*values) # type: ignore
+			output_callback(*values)
+
+		return output
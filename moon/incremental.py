@@ -0,0 +1,182 @@
+from bisect import bisect_right
+from typing import Any, Iterator, List, Tuple
+
+from .interpreter import TProgram
+from .lexer import Token, TokenBuffer, chunk_ends
+from .nodes import shift_lines
+from .parser import build_parser
+
+class Chunk:
+	"""A top-level statement (or a few glued by comments) with its tokens and AST.
+
+	Tokens and lexing errors keep their line and position in the chunk, the
+	nodes of its program their line in the whole source, the chunk starting on
+	`line`."""
+	__slots__ = ("text", "tokens", "program", "lines", "line")
+
+	def __init__(self, text: str, line: int = 1, last: bool = False) -> None:
+		self.text = text
+		# Like run_code, the end of the source gets a newline
+		source = text + "\n" if last else text
+		self.tokens = TokenBuffer.from_code(source)
+		self.program: TProgram = (build_parser().parse(None, lexer=self.tokens.reader()) or []) if len(self.tokens) else []
+		self.lines = text.count("\n")
+		self.line = 1
+		self.move(line)
+
+	def move(self, line: int):
+		"""Shifts the line numbers of the program for the chunk to start on line."""
+		if line != self.line:
+			shift_lines(self.program, line - self.line)
+			self.line = line
+
+class IncrementalDocument:
+	"""A source kept as top-level chunks, lexed and parsed one at a time.
+
+	edit() only re-lexes and re-parses the chunks around the edited range, every
+	other chunk keeps its tokens and statements. The edited region only grows
+	while the new chunk boundaries do not line up with the old ones, e.g. after
+	indenting the first line of a statement, or when a string or a multi-line
+	comment is left open, in which case the rest of the source is re-scanned.
+
+	`program` is updated in place and, for a valid source, equals the parse of
+	the whole text, line numbers included. The nodes after an edit are only
+	visited when it adds or removes lines. A syntax error is recovered within
+	its own chunk."""
+
+	def __init__(self, text: str = "") -> None:
+		self.chunks: List[Chunk] = []
+		self.program: TProgram = []
+		# Start offset and index of the first statement of every chunk. Entries
+		# from `pending` on lag behind by `shift`, an edit only updates those
+		# between it and the previous one (see catch_up)
+		self.starts: List[int] = []
+		self.indices: List[int] = []
+		self.pending = 0
+		self.shift = (0, 0)
+		self.replace(0, 0, self.split(text))
+
+	@staticmethod
+	def split(text: str, line: int = 1, last: bool = True) -> List[Chunk]:
+		ends, _ = chunk_ends(text)
+		chunks, start = [], 0
+		for index, end in enumerate(ends):
+			if start < end:
+				chunks.append(Chunk(text[start:end], line, last and index == len(ends) - 1))
+				line += chunks[-1].lines
+			start = end
+		return chunks
+
+	@property
+	def text(self) -> str:
+		return "".join(chunk.text for chunk in self.chunks)
+
+	def position(self, index: int) -> Tuple[int, int]:
+		"""Start offset and first statement index of a chunk, or of the end of the source."""
+		if index == len(self.chunks):
+			if not index:
+				return 0, 0
+			start, statement = self.position(index - 1)
+			return start + len(self.chunks[-1].text), statement + len(self.chunks[-1].program)
+		start, statement = self.starts[index], self.indices[index]
+		if index >= self.pending:
+			start, statement = start + self.shift[0], statement + self.shift[1]
+		return start, statement
+
+	def start(self, index: int) -> int:
+		return self.position(index)[0]
+
+	def offsets(self) -> List[int]:
+		"""Start offset of every chunk."""
+		return [self.start(index) for index in range(len(self.chunks))]
+
+	def catch_up(self, stop: int):
+		"""Updates the entries of starts and indices before stop."""
+		length, statements = self.shift
+		for index in range(self.pending, stop):
+			self.starts[index] += length
+			self.indices[index] += statements
+		self.pending = max(self.pending, stop)
+
+	def replace(self, first: int, stop: int, chunks: List[Chunk]):
+		"""Puts chunks, already numbered from the line of chunks[first], in place of chunks[first:stop]."""
+		self.catch_up(stop)
+		start, statement_start = self.position(first)
+		end, statement_end = self.position(stop)
+
+		starts, indices, statements = [], [], []
+		for chunk in chunks:
+			starts.append(start)
+			indices.append(statement_start + len(statements))
+			statements.extend(chunk.program)
+			start += len(chunk.text)
+		length, count = start - end, statement_start + len(statements) - statement_end
+		lines = sum(chunk.lines for chunk in chunks) - sum(chunk.lines for chunk in self.chunks[first:stop])
+
+		# The chunks after the edit move, those not lagging behind yet are moved now
+		for index in range(stop, self.pending):
+			self.starts[index] += length
+			self.indices[index] += count
+		self.shift = (self.shift[0] + length, self.shift[1] + count)
+
+		self.program[statement_start:statement_end] = statements
+		self.chunks[first:stop] = chunks
+		self.starts[first:stop] = starts
+		self.indices[first:stop] = indices
+		self.pending += len(chunks) - (stop - first)
+
+		if lines:
+			# Only the line numbers of the nodes after the edit cannot lag behind
+			for chunk in self.chunks[first + len(chunks):]:
+				chunk.move(chunk.line + lines)
+
+	def edit(self, start: int, end: int, replacement: str) -> TProgram:
+		"""Replaces text[start:end] with replacement, returns the updated program."""
+		length = self.start(len(self.chunks))
+		if not 0 <= start <= end <= length:
+			raise IndexError(f"Edit range {start}:{end} is out of the text bounds 0:{length}")
+		if not self.chunks:
+			self.replace(0, 0, self.split(replacement))
+			return self.program
+
+		indices = range(len(self.chunks))
+		# The chunk before the edit is part of the region: its statement may continue on the edited line
+		first = max(bisect_right(indices, start, key=self.start) - 2, 0)
+		stop = bisect_right(indices, end, key=self.start) if end < length else len(self.chunks)
+		region_start, line = self.start(first), self.chunks[first].line
+		while True:
+			region = "".join(chunk.text for chunk in self.chunks[first:stop])
+			region = region[:start - region_start] + replacement + region[end - region_start:]
+			if stop == len(self.chunks):
+				chunks = self.split(region, line)
+				break
+			# The next chunk tells whether the region end still is a boundary
+			ends, clean = chunk_ends(region + self.chunks[stop].text)
+			if clean and len(region) in ends:
+				chunks = self.split(region, line, last=False)
+				break
+			stop = len(self.chunks) if not clean else stop + 1
+
+		self.replace(first, stop, chunks)
+		return self.program
+
+	@property
+	def errors(self) -> List[List[Any]]:
+		"""Lexing errors of the whole source, as [character, lineno, lexpos]."""
+		errors, offset = [], 0
+		for chunk in self.chunks:
+			for character, lineno, lexpos in chunk.tokens.errors:
+				errors.append([character, lineno + chunk.line - 1, lexpos + offset])
+			offset += len(chunk.text)
+		return errors
+
+	def tokens(self) -> Iterator[Token]:
+		"""Tokens of the whole source, with their line and position in it."""
+		offset = 0
+		for chunk in self.chunks:
+			for token in chunk.tokens:
+				token.lineno += chunk.line - 1
+				if token.type not in ("INDENT", "DEDENT"):
+					token.lexpos += offset
+				yield token
+			offset += len(chunk.text)
@@ -1,7 +1,16 @@
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from operator import add, eq, ge, gt, le, lt, mod, mul, ne, pow, sub, truediv
+from typing import TYPE_CHECKING, Any, Callable, Dict, Generator, List, Literal, Optional, Tuple
+
+from . import nodes
+from .nodes import Node, as_nodes
+
+if TYPE_CHECKING:
+	from .hooks import Hooks
+	from .memo import ActionCache
+	from .tiered import Tiers
 
 # Interpreter types
-TStatement = Tuple[Any]
+TStatement = Node
 TProgram = List[TStatement]
 
 TEnvironment = Dict[str, Any]
@@ -9,17 +18,181 @@ TEnvironment = Dict[str, Any]
 TStatementCallback = Optional[Callable]
 TOutputCallback = Callable[[object], None]
 TInputCallback = Callable[[object], str]
+TOperator = Callable[[Any, Any], Any]
+# Frame of an action call run by run_frames(): yields its calls, returns its value
+TFrame = Generator[Tuple["Action", List[Any]], Any, Any]
+
+TBackend = Literal["interpreter", "closure", "python", "vm", "tiered"]
+# Every backend eliminates tail calls. Other calls run on a frame stack with
+# "interpreter", "vm" and "tiered", so the depth of a recursion is only bounded
+# by memory. "closure" and "python" nest a Python call per Moon call: a recursion
+# deeper than sys.getrecursionlimit() raises RecursionError there
+BACKENDS: Tuple[TBackend, ...] = ("interpreter", "closure", "python", "vm", "tiered")
+
+# Starts the names of the variables the optimizer introduces, no Moon name can
+INTERNAL_PREFIX = "%"
+
+# Operators
+BINARY_OPERATORS: Dict[str, TOperator] = {
+	# Arithmetic
+	"+": add,
+	"-": sub,
+	"*": mul,
+	"/": truediv,
+	"%": mod,
+	"**": pow,
+	# Comparison
+	"<": lt,
+	"<=": le,
+	">": gt,
+	">=": ge,
+	"==": eq,
+	"!=": ne,
+}
+
+def operator_chain(expression: TStatement) -> Tuple[TStatement, List[Tuple[str, TStatement]]]:
+	"""Unfolds the left spine of nested binary expressions, without recursion.
+
+	((a + b) - c) and d is (a, [("+", b), ("-", c), ("and", d)]): evaluating the
+	first operand then applying every link in order gives the same result."""
+	links: List[Tuple[str, TStatement]] = []
+	while expression.kind == nodes.BINARY_EXPRESSION:
+		links.append((expression.operator, expression.right))
+		expression = expression.left
+	links.reverse()
+	return expression, links
+
+class Scope(dict):
+	"""Local variables of an action call, linked to the scope the action was defined in.
+
+	Reading a missing name looks it up in the enclosing scopes. Assigning a name
+	that already exists in an enclosing scope updates it there, otherwise the
+	name is created locally. A call only costs its parameters and locals."""
+	__slots__ = ("parent",)
+
+	def __init__(self, parent: TEnvironment, variables: Any = ()) -> None:
+		super().__init__(variables)
+		self.parent = parent
+
+	def __missing__(self, name: str) -> Any:
+		return self.parent[name]
+
+	def __setitem__(self, name: str, value: Any) -> None:
+		if not dict.__contains__(self, name):
+			scope = self.parent
+			while scope is not None:
+				if name in scope:
+					scope[name] = value
+					return
+				scope = getattr(scope, "parent", None)
+		dict.__setitem__(self, name, value)
+
+class Action:
+	__slots__ = ("params", "block", "scope", "code")
+
+	def __init__(self, params: List[str], block: List[TStatement], scope: TEnvironment) -> None:
+		self.params = params
+		self.block = block
+		self.scope = scope # The environment the action was defined in
+		self.code: Any = None # Compiled body, set by the closure backend
+
+class Signal:
+	"""Control flow leaving a block: returned by a statement instead of its value."""
+	__slots__ = ()
+
+class StopType(Signal):
+	__slots__ = ()
+
+class SkipType(Signal):
+	__slots__ = ()
+
+class ResultType(Signal):
+	__slots__ = ("value",)
 
-class StopType:
-	pass
-
-class SkipType:
-	pass
-
-class ResultType:
 	def __init__(self, value) -> None:
 		self.value = value
 
+class TailCallType(Signal):
+	"""`result call ...` in an action: the caller runs the call in place of the current one."""
+	__slots__ = ("action", "param_values")
+
+	def __init__(self, action: Action, param_values: List[Any]) -> None:
+		self.action = action
+		self.param_values = param_values
+
+# Stop and skip carry nothing, a single instance of each is enough
+STOP = StopType()
+SKIP = SkipType()
+
+class Missing:
+	"""Returned by ActionCache.get() when a call is not cached."""
+	__slots__ = ()
+
+	def __repr__(self) -> str:
+		return "<missing>"
+
+MISSING = Missing()
+
+# id(block) -> (block, flag), the block is kept alive so its id stays unique
+SIGNALLING_BLOCKS: Dict[int, Tuple[List[TStatement], bool]] = dict()
+SIGNALLING_BLOCKS_SIZE = 4096
+
+# id(node) -> (node, flag), see calls_actions()
+CALLING_NODES: Dict[int, Tuple[TStatement, bool]] = dict()
+CALLING_NODES_SIZE = 1 << 16
+
+def can_signal(block: List[TStatement]) -> bool:
+	"""Whether executing a block may return a Signal, the result is cached per block.
+
+	A `stop` or `skip` inside a nested loop is handled by that loop, a `result`
+	leaves every loop. Blocks that cannot signal skip the per-statement checks."""
+	key = id(block)
+	if key not in SIGNALLING_BLOCKS:
+		if len(SIGNALLING_BLOCKS) >= SIGNALLING_BLOCKS_SIZE:
+			SIGNALLING_BLOCKS.clear()
+		SIGNALLING_BLOCKS[key] = (block, any(statement_signals(statement, False) for statement in block))
+	return SIGNALLING_BLOCKS[key][1]
+
+def calls_actions(statement: TStatement) -> bool:
+	"""Whether running a statement or evaluating an expression may call an action, the result is cached per node.
+
+	The body of an action it defines only runs once the action is called, its calls do not count."""
+	key = id(statement)
+	entry = CALLING_NODES.get(key)
+	if entry is None:
+		if len(CALLING_NODES) >= CALLING_NODES_SIZE:
+			CALLING_NODES.clear()
+		entry = CALLING_NODES[key] = (statement, node_calls(statement))
+	return entry[1]
+
+def node_calls(statement: TStatement) -> bool:
+	pending: List[Any] = [statement]
+	while pending:
+		node = pending.pop()
+		if isinstance(node, list):
+			pending += node
+		elif isinstance(node, dict):
+			pending += node.values()
+		elif not isinstance(node, Node) or node.kind == nodes.ACTION_DEFINITION:
+			continue
+		elif node.kind == nodes.CALL:
+			return True
+		else:
+			pending += [getattr(node, field) for field in node.fields]
+	return False
+
+def statement_signals(statement: TStatement, in_loop: bool) -> bool:
+	match statement.kind:
+		case nodes.STOP | nodes.SKIP:
+			return not in_loop
+		case nodes.RESULT:
+			return True
+		case nodes.IF_ELSE:
+			return any(statement_signals(s, in_loop) for s in statement.if_block + (statement.else_block or []))
+		case nodes.WHILE:
+			return any(statement_signals(s, True) for s in statement.block)
+	return False
+
 def custom_repr(value: object):
 	if isinstance(value, bool):
 		return str(value).lower()
@@ -42,132 +215,142 @@ def execute_statement(
 		statement: TStatement,
 		environment: TEnvironment,
 		/,
-		statement_callback: TStatementCallback,
+		hooks: Optional["Hooks"] = None,
 		output_callback: TOutputCallback = print,
 		input_callback: TInputCallback = input,
-		*args,
-		**kwargs,
+		action_cache: Optional["ActionCache"] = None,
+		tiers: Optional["Tiers"] = None,
 ) -> Any:
-	def execute(
-			e_statement: TStatement,
-			e_environment: TEnvironment = environment,
-			call_statement: TStatementCallback = statement_callback,
-			call_output: TOutputCallback = output_callback,
-			call_input: TInputCallback = input_callback,
-			*e_args,
-			**e_kwargs,
-	):
-		return execute_statement(
-			e_statement,
-			e_environment,
-			call_statement,
-			call_output,
-			call_input,
-			*e_args,
-			**e_kwargs,
-		)
-	if statement_callback:
-		statement_callback(environment)
-	statement_type, *next = statement
-
-	match statement_type:
+	"""Runs a statement or evaluates an expression, its children run with the same arguments.
+
+	hooks is None when no hook is registered, blocks and loops then run without
+	any check for them."""
+	match statement.kind:
+		# Variable
+		case nodes.NAME:
+			return environment[statement.name]
+
 		# Primitive Types
-		case "integer_literal" | "float_literal" | "string_literal" | "boolean_literal":
-			return next[0]
-		case "null_literal":
-			return None
-		
+		case nodes.LITERAL:
+			return statement.value
+
 		# Composite Types
-		case "list_composite":
+		case nodes.LIST_COMPOSITE:
 			raise NotImplementedError("Lists are not yet implemented.")
-		case "dict_composite":
+		case nodes.DICT_COMPOSITE:
 			raise NotImplementedError("Dictionaries are not yet implemented.")
 
 		# Variable Declaration and Initialization
-		case "variable_declaration_statement":
-			varname, expressions = next
-			varvalue = execute(expressions)
-			environment[varname] = varvalue
+		case nodes.VARIABLE_DECLARATION:
+			environment[statement.name] = execute_statement(statement.value, environment, hooks, output_callback, input_callback, action_cache, tiers)
 
 		# Expressions
-		case "arithmetic_expression" | "comparison_expression" | "logical_expression":
-			operator, *expressions = next
-			if operator == "not":
-				return not execute(expressions[0])
-
-			left, right = expressions
-			leftvalue = execute(left)
-			rightvalue = execute(right)
-
-			return eval(f"{repr(leftvalue)} {operator} {repr(rightvalue)}")
+		case nodes.BINARY_EXPRESSION:
+			operator, left, right = statement.operator, statement.left, statement.right
+			if left.kind == nodes.BINARY_EXPRESSION:
+				# Long chains are folded in a loop, their depth is not bounded by Python's stack
+				left, links = operator_chain(statement)
+				value = execute_statement(left, environment, hooks, output_callback, input_callback, action_cache, tiers)
+				for operator, right in links:
+					if operator == "and":
+						value = value and execute_statement(right, environment, hooks, output_callback, input_callback, action_cache, tiers)
+					elif operator == "or":
+						value = value or execute_statement(right, environment, hooks, output_callback, input_callback, action_cache, tiers)
+					else:
+						value = BINARY_OPERATORS[operator](value, execute_statement(right, environment, hooks, output_callback, input_callback, action_cache, tiers))
+				return value
+
+			leftvalue = execute_statement(left, environment, hooks, output_callback, input_callback, action_cache, tiers)
+
+			# Short-circuit: the right operand is only evaluated when needed
+			if operator == "and":
+				return leftvalue and execute_statement(right, environment, hooks, output_callback, input_callback, action_cache, tiers)
+			elif operator == "or":
+				return leftvalue or execute_statement(right, environment, hooks, output_callback, input_callback, action_cache, tiers)
+
+			return BINARY_OPERATORS[operator](leftvalue, execute_statement(right, environment, hooks, output_callback, input_callback, action_cache, tiers))
+
+		case nodes.NOT_EXPRESSION:
+			return not execute_statement(statement.operand, environment, hooks, output_callback, input_callback, action_cache, tiers)
 
 		# Control Structures
-		case "ifelse_statements":
+		case nodes.IF_ELSE:
 			# CONTAINS BLOCK
-			condition, if_expressions, else_expressions = next
-			executed_condition = execute(condition)
-			if executed_condition:
-				for expression in if_expressions: # type: ignore
-					result = execute(expression)
-					if isinstance(result, (StopType, SkipType, ResultType)):
-						return result
-			elif else_expressions:
-				for expression in else_expressions: # type: ignore
-					result = execute(expression)
-					if isinstance(result, (StopType, SkipType)):
+			executed_condition = execute_statement(statement.condition, environment, hooks, output_callback, input_callback, action_cache, tiers)
+			block_expressions = statement.if_block if executed_condition else statement.else_block
+			if not block_expressions:
+				return
+			elif hooks is not None:
+				result = execute_hooked_block(block_expressions, environment, hooks, output_callback, input_callback, action_cache, tiers)
+				if isinstance(result, Signal):
+					return result
+			elif not can_signal(block_expressions):
+				for expression in block_expressions:
+					execute_statement(expression, environment, hooks, output_callback, input_callback, action_cache, tiers)
+			else:
+				for expression in block_expressions:
+					result = execute_statement(expression, environment, hooks, output_callback, input_callback, action_cache, tiers)
+					if isinstance(result, Signal):
 						return result
 
 		# Loop structure
-		case "while_statements":
+		case nodes.WHILE:
 			# CONTAINS BLOCK
-			condition, block_expressions = next
-			while execute(condition):
+			condition, block_expressions = statement.condition, statement.block
+			if tiers is not None and (compiled := tiers.loop(statement)) is not None:
+				return compiled(environment)
+			elif hooks is not None:
+				return execute_hooked_loop(statement, environment, hooks, output_callback, input_callback, action_cache, tiers)
+
+			if not can_signal(block_expressions):
+				while execute_statement(condition, environment, hooks, output_callback, input_callback, action_cache, tiers):
+					for expression in block_expressions:
+						execute_statement(expression, environment, hooks, output_callback, input_callback, action_cache, tiers)
+					if tiers is not None and (compiled := tiers.iterated(statement)) is not None:
+						# Hot: the remaining iterations run compiled
+						return compiled(environment)
+				return
+
+			while execute_statement(condition, environment, hooks, output_callback, input_callback, action_cache, tiers):
 				result = None
-				for expression in block_expressions: # type: ignore
-					result = execute(expression)
-					if isinstance(result, (StopType, SkipType, ResultType)):
+				for expression in block_expressions:
+					result = execute_statement(expression, environment, hooks, output_callback, input_callback, action_cache, tiers)
+					if isinstance(result, Signal):
 						break
-				if isinstance(result, StopType):
+				if result is STOP:
 					break
-				elif isinstance(result, ResultType):
+				elif isinstance(result, Signal) and result is not SKIP:
 					return result
-				elif isinstance(result, SkipType):
-					continue 
+				if tiers is not None and (compiled := tiers.iterated(statement)) is not None:
+					return compiled(environment)
 
-		case "stop_statement":
-			return StopType()
+		case nodes.STOP:
+			return STOP
 
-		case "skip_statement":
-			return SkipType()
+		case nodes.SKIP:
+			return SKIP
 
 		# Try-Catch and raise
 
 		# Functions
-		case "action_statements":
+		case nodes.ACTION_DEFINITION:
 			# CONTAINS BLOCK
-			funcname, params, block_expressions = next
-			environment[funcname] = (params, block_expressions)
-
-		case "call":
-			funcname, params = next
-			param_values = [execute(p) for p in params] # type: ignore
-			
-			func_params, block_expressions = environment[funcname]
-
-			sub_environment = environment.copy()
-			sub_environment.update(dict(zip(func_params, param_values)))
-			result = None
-			for expression in block_expressions:
-				result = execute(expression, sub_environment)
-				if isinstance(result, ResultType):
-					result = result.value
-					break
-			environment.update({k: v for k, v in sub_environment.items() if k in environment and v != environment.get(k)})
-			return result
+			environment[statement.name] = Action(statement.params, statement.block, environment)
+
+		case nodes.CALL:
+			param_values = [execute_statement(p, environment, hooks, output_callback, input_callback, action_cache, tiers) for p in statement.args]
+
+			action: Action = environment[statement.name]
+
+			return call_action(action, param_values, hooks, output_callback, input_callback, action_cache, tiers)
 
-		case "result_statement":
-			expressions = next[0]
-			result = execute(expressions[0])
+		case nodes.RESULT:
+			expression = statement.expressions[0]
+			if expression.kind == nodes.CALL:
+				param_values = [execute_statement(p, environment, hooks, output_callback, input_callback, action_cache, tiers) for p in expression.args]
+				return TailCallType(environment[expression.name], param_values)
+
+			result = execute_statement(expression, environment, hooks, output_callback, input_callback, action_cache, tiers)
 			return ResultType(result)
 
 		# Classes
@@ -175,23 +358,365 @@ def execute_statement(
 		# Modules
 
 		# Built-in
-		case "print_statement":
-			output_callback(*[custom_repr(execute(expression)) for expression in next[0]]) # type: ignore
+		case nodes.PRINT:
+			output_callback(*[custom_repr(execute_statement(expression, environment, hooks, output_callback, input_callback, action_cache, tiers)) for expression in statement.expressions])
 
-		case "ask":
-			prompt = ' '.join([execute(expression) for expression in next[0]]) # type: ignore
+		case nodes.ASK:
+			prompt = ' '.join([execute_statement(expression, environment, hooks, output_callback, input_callback, action_cache, tiers) for expression in statement.expressions])
 			return autocast(
 					input_callback(
 					prompt
 				)
 			)
 
-		# Variable
 		case _:
-			if isinstance(statement, str):
-				return environment[statement] # environment.get(statement, None)
-			else:
-				print(f"Un-case {statement}")
+			print(f"Un-case {statement}")
+
+def execute_hooked_block(
+		block: List[TStatement],
+		environment: TEnvironment,
+		/,
+		hooks: "Hooks",
+		output_callback: TOutputCallback = print,
+		input_callback: TInputCallback = input,
+		action_cache: Optional["ActionCache"] = None,
+		tiers: Optional["Tiers"] = None,
+) -> Any:
+	"""Runs a block, reporting each of its statements to the statement hook.
+
+	Returns the first Signal returned by a statement, or the value of the last one."""
+	on_statement = hooks.on_statement
+	result = None
+	for statement in block:
+		if on_statement is not None:
+			on_statement(statement, environment)
+		result = execute_statement(statement, environment, hooks, output_callback, input_callback, action_cache, tiers)
+		if isinstance(result, Signal):
+			break
+	return result
+
+def execute_hooked_loop(
+		statement: nodes.While,
+		environment: TEnvironment,
+		/,
+		hooks: "Hooks",
+		output_callback: TOutputCallback = print,
+		input_callback: TInputCallback = input,
+		action_cache: Optional["ActionCache"] = None,
+		tiers: Optional["Tiers"] = None,
+) -> Any:
+	"""Runs a `while` loop, reporting each of its iterations to the loop hook."""
+	on_loop = hooks.on_loop
+	condition, block_expressions = statement.condition, statement.block
+	while execute_statement(condition, environment, hooks, output_callback, input_callback, action_cache, tiers):
+		if on_loop is not None:
+			on_loop(statement, environment)
+		result = execute_hooked_block(block_expressions, environment, hooks, output_callback, input_callback, action_cache, tiers)
+		if result is STOP:
+			break
+		elif isinstance(result, Signal) and result is not SKIP:
+			return result
+		if tiers is not None and (compiled := tiers.iterated(statement)) is not None:
+			return compiled(environment)
+
+def call_action(
+		action: Action,
+		param_values: List[Any],
+		/,
+		hooks: Optional["Hooks"] = None,
+		output_callback: TOutputCallback = print,
+		input_callback: TInputCallback = input,
+		action_cache: Optional["ActionCache"] = None,
+		tiers: Optional["Tiers"] = None,
+) -> Any:
+	"""Runs an action call, looking its result up first if the action is cached."""
+	key = action_cache.key(action, param_values) if action_cache is not None else None
+	if key is None:
+		return run_action(action, param_values, hooks, output_callback, input_callback, action_cache, tiers)
+
+	result = action_cache.get(key) # type: ignore
+	if result is MISSING:
+		result = run_action(action, param_values, hooks, output_callback, input_callback, action_cache, tiers)
+		action_cache.put(key, result) # type: ignore
+	return result
+
+def run_action(
+		action: Action,
+		param_values: List[Any],
+		/,
+		hooks: Optional["Hooks"] = None,
+		output_callback: TOutputCallback = print,
+		input_callback: TInputCallback = input,
+		action_cache: Optional["ActionCache"] = None,
+		tiers: Optional["Tiers"] = None,
+) -> Any:
+	"""Runs an action call, the calls it makes run on a stack of frames, see run_frames()."""
+	if hooks is None and not calls_actions(action.block):
+		return run_body(action, param_values, hooks, output_callback, input_callback, action_cache, tiers)
+	frame = action_frames(action, param_values, hooks, output_callback, input_callback, action_cache, tiers)
+	return run_frames(frame, hooks, output_callback, input_callback, action_cache, tiers)
+
+def run_frames(
+		frame: TFrame,
+		/,
+		hooks: Optional["Hooks"] = None,
+		output_callback: TOutputCallback = print,
+		input_callback: TInputCallback = input,
+		action_cache: Optional["ActionCache"] = None,
+		tiers: Optional["Tiers"] = None,
+) -> Any:
+	"""Runs an action call on an explicit stack of frames, one per call running.
+
+	A frame yields every call it makes as (action, param_values), and is sent
+	back its value once the frame of that call has returned. Calls do not nest
+	Python calls: the depth of a recursion is only bounded by memory."""
+	frames = [frame]
+	value = None
+	while True:
+		try:
+			action, param_values = frames[-1].send(value)
+		except StopIteration as returned:
+			frames.pop()
+			if not frames:
+				return returned.value
+			value = returned.value
+		else:
+			if hooks is None and action_cache is None and not calls_actions(action.block):
+				# Calls nothing: its body runs without a frame
+				value = run_body(action, param_values, hooks, output_callback, input_callback, action_cache, tiers)
+				continue
+			frames.append(call_frames(action, param_values, hooks, output_callback, input_callback, action_cache, tiers))
+			value = None
+
+def call_frames(
+		action: Action,
+		param_values: List[Any],
+		/,
+		hooks: Optional["Hooks"] = None,
+		output_callback: TOutputCallback = print,
+		input_callback: TInputCallback = input,
+		action_cache: Optional["ActionCache"] = None,
+		tiers: Optional["Tiers"] = None,
+) -> TFrame:
+	"""call_action() in a frame."""
+	key = action_cache.key(action, param_values) if action_cache is not None else None
+	if key is None:
+		return (yield from action_frames(action, param_values, hooks, output_callback, input_callback, action_cache, tiers))
+
+	result = action_cache.get(key) # type: ignore
+	if result is MISSING:
+		result = yield from action_frames(action, param_values, hooks, output_callback, input_callback, action_cache, tiers)
+		action_cache.put(key, result) # type: ignore
+	return result
+
+def action_frames(
+		action: Action,
+		param_values: List[Any],
+		/,
+		hooks: Optional["Hooks"] = None,
+		output_callback: TOutputCallback = print,
+		input_callback: TInputCallback = input,
+		action_cache: Optional["ActionCache"] = None,
+		tiers: Optional["Tiers"] = None,
+) -> TFrame:
+	"""Frame of an action call. Tail calls loop here instead of adding frames."""
+	if hooks is not None:
+		return (yield from hooks.run_action_frames(
+			lambda action, param_values: body_frames(action, param_values, hooks, output_callback, input_callback, action_cache, tiers),
+			action,
+			param_values,
+		))
+
+	while True:
+		result = yield from body_frames(action, param_values, hooks, output_callback, input_callback, action_cache, tiers)
+		if not isinstance(result, TailCallType):
+			return result
+		action, param_values = result.action, result.param_values
+
+def body_frames(
+		action: Action,
+		param_values: List[Any],
+		/,
+		hooks: Optional["Hooks"] = None,
+		output_callback: TOutputCallback = print,
+		input_callback: TInputCallback = input,
+		action_cache: Optional["ActionCache"] = None,
+		tiers: Optional["Tiers"] = None,
+) -> TFrame:
+	"""Runs the body of an action once, a tail call is returned."""
+	if tiers is not None and tiers.hot(action):
+		return tiers.call(action, param_values)
+
+	sub_environment = Scope(action.scope, zip(action.params, param_values))
+	on_statement = hooks.on_statement if hooks is not None else None
+	result = None
+	for expression in action.block:
+		if on_statement is not None:
+			on_statement(expression, sub_environment)
+		if calls_actions(expression):
+			result = yield from execute_frames(expression, sub_environment, hooks, output_callback, input_callback, action_cache, tiers)
+		else:
+			result = execute_statement(expression, sub_environment, hooks, output_callback, input_callback, action_cache, tiers)
+		if isinstance(result, (ResultType, TailCallType)):
+			break
+
+	if isinstance(result, ResultType):
+		return result.value
+	elif result is STOP or result is SKIP:
+		return None
+	return result
+
+def run_body(
+		action: Action,
+		param_values: List[Any],
+		/,
+		hooks: Optional["Hooks"] = None,
+		output_callback: TOutputCallback = print,
+		input_callback: TInputCallback = input,
+		action_cache: Optional["ActionCache"] = None,
+		tiers: Optional["Tiers"] = None,
+) -> Any:
+	"""body_frames() of an action calling no other, which needs no frame."""
+	if tiers is not None and tiers.hot(action):
+		return tiers.call(action, param_values)
+
+	sub_environment = Scope(action.scope, zip(action.params, param_values))
+	result = None
+	if not can_signal(action.block):
+		for expression in action.block:
+			result = execute_statement(expression, sub_environment, hooks, output_callback, input_callback, action_cache, tiers)
+		return result
+
+	for expression in action.block:
+		result = execute_statement(expression, sub_environment, hooks, output_callback, input_callback, action_cache, tiers)
+		if isinstance(result, ResultType):
+			return result.value
+	if result is STOP or result is SKIP:
+		return None
+	return result
+
+def block_frames(
+		block: List[TStatement],
+		environment: TEnvironment,
+		/,
+		hooks: Optional["Hooks"] = None,
+		output_callback: TOutputCallback = print,
+		input_callback: TInputCallback = input,
+		action_cache: Optional["ActionCache"] = None,
+		tiers: Optional["Tiers"] = None,
+) -> TFrame:
+	"""Runs a block in a frame, like execute_hooked_block() with or without hooks."""
+	on_statement = hooks.on_statement if hooks is not None else None
+	result = None
+	for statement in block:
+		if on_statement is not None:
+			on_statement(statement, environment)
+		if calls_actions(statement):
+			result = yield from execute_frames(statement, environment, hooks, output_callback, input_callback, action_cache, tiers)
+		else:
+			result = execute_statement(statement, environment, hooks, output_callback, input_callback, action_cache, tiers)
+		if isinstance(result, Signal):
+			break
+	return result
+
+def execute_frames(
+		statement: TStatement,
+		environment: TEnvironment,
+		/,
+		hooks: Optional["Hooks"] = None,
+		output_callback: TOutputCallback = print,
+		input_callback: TInputCallback = input,
+		action_cache: Optional["ActionCache"] = None,
+		tiers: Optional["Tiers"] = None,
+) -> TFrame:
+	"""execute_statement() in a frame: the calls of the statement are yielded to run_frames().
+
+	Only the nodes that call an action run here, any other runs with execute_statement()."""
+	if not calls_actions(statement):
+		return execute_statement(statement, environment, hooks, output_callback, input_callback, action_cache, tiers)
+
+	match statement.kind:
+		# Variable Declaration and Initialization
+		case nodes.VARIABLE_DECLARATION:
+			environment[statement.name] = yield from execute_frames(statement.value, environment, hooks, output_callback, input_callback, action_cache, tiers)
+
+		# Expressions
+		case nodes.BINARY_EXPRESSION:
+			left, links = operator_chain(statement)
+			value = yield from execute_frames(left, environment, hooks, output_callback, input_callback, action_cache, tiers)
+			for operator, right in links:
+				if operator == "and":
+					if value:
+						value = yield from execute_frames(right, environment, hooks, output_callback, input_callback, action_cache, tiers)
+				elif operator == "or":
+					if not value:
+						value = yield from execute_frames(right, environment, hooks, output_callback, input_callback, action_cache, tiers)
+				else:
+					value = BINARY_OPERATORS[operator](value, (yield from execute_frames(right, environment, hooks, output_callback, input_callback, action_cache, tiers)))
+			return value
+
+		case nodes.NOT_EXPRESSION:
+			return not (yield from execute_frames(statement.operand, environment, hooks, output_callback, input_callback, action_cache, tiers))
+
+		# Control Structures
+		case nodes.IF_ELSE:
+			executed_condition = yield from execute_frames(statement.condition, environment, hooks, output_callback, input_callback, action_cache, tiers)
+			block_expressions = statement.if_block if executed_condition else statement.else_block
+			if block_expressions:
+				result = yield from block_frames(block_expressions, environment, hooks, output_callback, input_callback, action_cache, tiers)
+				if isinstance(result, Signal):
+					return result
+
+		# Loop structure
+		case nodes.WHILE:
+			if tiers is not None and (compiled := tiers.loop(statement)) is not None:
+				return compiled(environment)
+
+			on_loop = hooks.on_loop if hooks is not None else None
+			while (yield from execute_frames(statement.condition, environment, hooks, output_callback, input_callback, action_cache, tiers)):
+				if on_loop is not None:
+					on_loop(statement, environment)
+				result = yield from block_frames(statement.block, environment, hooks, output_callback, input_callback, action_cache, tiers)
+				if result is STOP:
+					break
+				elif isinstance(result, Signal) and result is not SKIP:
+					return result
+				if tiers is not None and (compiled := tiers.iterated(statement)) is not None:
+					return compiled(environment)
+
+		# Functions
+		case nodes.CALL:
+			param_values = []
+			for p in statement.args:
+				param_values.append((yield from execute_frames(p, environment, hooks, output_callback, input_callback, action_cache, tiers)))
+			return (yield environment[statement.name], param_values)
+
+		case nodes.RESULT:
+			expression = statement.expressions[0]
+			if expression.kind == nodes.CALL:
+				param_values = []
+				for p in expression.args:
+					param_values.append((yield from execute_frames(p, environment, hooks, output_callback, input_callback, action_cache, tiers)))
+				return TailCallType(environment[expression.name], param_values)
+
+			result = yield from execute_frames(expression, environment, hooks, output_callback, input_callback, action_cache, tiers)
+			return ResultType(result)
+
+		# Built-in
+		case nodes.PRINT:
+			values = []
+			for expression in statement.expressions:
+				values.append(custom_repr((yield from execute_frames(expression, environment, hooks, output_callback, input_callback, action_cache, tiers))))
+			output_callback(*values)
+
+		case nodes.ASK:
+			values = []
+			for expression in statement.expressions:
+				values.append((yield from execute_frames(expression, environment, hooks, output_callback, input_callback, action_cache, tiers)))
+			return autocast(input_callback(' '.join(values)))
+
+		case _:
+			return execute_statement(statement, environment, hooks, output_callback, input_callback, action_cache, tiers)
 
 def execute_program(
 		program: TProgram,
@@ -200,18 +725,99 @@ def execute_program(
 		output_callback: TOutputCallback = print,
 		input_callback: TInputCallback = input,
 		environment: Optional[TEnvironment] = None,
+		backend: TBackend = "interpreter",
+		action_cache: Optional["ActionCache"] = None,
+		tiers: Optional["Tiers"] = None,
+		hooks: Optional["Hooks"] = None,
 	) -> None:
+	"""Runs a program on one of the BACKENDS.
+
+	hooks are run on the events of the program, statement_callback(environment)
+	is a statement hook in its older form. The "tiered" backend interprets the
+	program and compiles its hot loops and actions, tiers configures it and
+	records its events. Deep recursions need one of the backends running calls
+	on a frame stack, see BACKENDS."""
 	if environment is None:
 		environment = dict()
 
 	if not program:
 		raise ValueError("No instruction")
 
-	for statement in program:
-		execute_statement(
-			statement,
-			environment,
-			statement_callback,
-			output_callback,
-			input_callback
-		)
\ No newline at end of file
+	# Programs in the tuple form are still accepted
+	program = as_nodes(program)
+
+	if action_cache is not None:
+		action_cache.analyze(program, environment)
+
+	if statement_callback is not None:
+		from .hooks import STATEMENT, Hooks
+		hooks = hooks.copy() if hooks is not None else Hooks()
+		hooks.add(STATEMENT, lambda statement, environment: statement_callback(environment)) # type: ignore
+	if hooks is not None and not hooks:
+		# Nothing to report: every backend runs as if there were no hooks
+		hooks = None
+	if hooks is not None:
+		output_callback = hooks.output(output_callback)
+
+	try:
+		if backend == "closure":
+			from .compiler import compile_program
+			compile_program(
+				program,
+				hooks,
+				output_callback,
+				input_callback,
+				known=environment,
+				action_cache=action_cache,
+			)(environment)
+			return
+		elif backend == "python":
+			from .transpiler import transpile_program
+			transpile_program(
+				program,
+				hooks,
+				output_callback,
+				input_callback,
+				action_cache,
+			)(environment)
+			return
+		elif backend == "vm":
+			from .vm import execute_bytecode
+			execute_bytecode(
+				program,
+				hooks,
+				output_callback,
+				input_callback,
+				environment,
+				action_cache,
+			)
+			return
+		elif backend == "tiered":
+			from .tiered import Tiers
+			tiers = tiers if tiers is not None else Tiers()
+			tiers.start(hooks, output_callback, input_callback, action_cache)
+		elif backend != "interpreter":
+			raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+		else:
+			tiers = None
+
+		on_statement = hooks.on_statement if hooks is not None else None
+		for statement in program:
+			if on_statement is not None:
+				on_statement(statement, environment)
+			result = execute_statement(
+				statement,
+				environment,
+				hooks,
+				output_callback,
+				input_callback,
+				action_cache,
+				tiers,
+			)
+			if isinstance(result, TailCallType):
+				# `result call ...` at top level still runs the call
+				call_action(result.action, result.param_values, hooks, output_callback, input_callback, action_cache, tiers)
+	finally:
+		# Variables the optimizer introduces are not part of the program's environment
+		for name in [name for name in environment if name.startswith(INTERNAL_PREFIX)]:
+			del environment[name]
@@ -1,6 +1,11 @@
+import re
 import ply.lex as lex
 
-from typing import Any
+from array import array
+from codecs import getincrementaldecoder
+from functools import cache
+from sys import intern
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
 
 reserved_keywords = [
 	("action",   "ACTION",   '✅'),
@@ -78,6 +83,9 @@ tokens = [
 	"LT", "LE", "GT", "GE", #"EQ", "NE",
 ] + list(reserved.values())
 
+# Small-int code of every token type, as stored by TokenBuffer
+TOKEN_CODES: Dict[str, int] = {name: code for code, name in enumerate(tokens)}
+
 # Boolean literal rule
 def t_BOOLEAN(t):
 	r"\b(true|false)"
@@ -134,8 +142,10 @@ def t_NEWLINE(t):
 
 # Error handling
 def t_error(t):
-	print(f"Error: '{str(t.value).strip()}' at line {t.lineno}:{t.lexpos}")
-	t.lexer.errors.append([t.value[0], t.lexer.lineno, t.lexer.lexpos])
+	# The input may be a piece of a larger source, see StreamingLexer
+	lexpos = t.lexpos + t.lexer.lexoffset
+	print(f"Error: '{str(t.value).strip()}' at line {t.lineno}:{lexpos}")
+	t.lexer.errors.append([t.value[0], t.lexer.lineno, lexpos])
 	t.lexer.skip(1)
 
 # ===== Lexer handling =====
@@ -152,10 +162,18 @@ class LexTokenT(lex.LexToken):
 		self.lexpos = lexpos # lexpos == 0 for (INDENT || DEDENT)
 		self.type = type
 
+@cache
+def lexer_prototype() -> lex.Lexer:
+	"""The PLY lexer of this process: the master regex is compiled once, then cloned per input."""
+	return lex.lex()
+
 class IndentLexer():
 	def __init__(self, **kwargs) -> None:
-		self.lexer: lex.Lexer = lex.lex(**kwargs)
+		# Options need a lexer of their own, the default one is cloned from the prototype
+		self.lexer: lex.Lexer = lex.lex(**kwargs) if kwargs else lexer_prototype().clone()
 		self.lexer.errors = [] # type: ignore
+		# Position of the input in its source, added to the positions of errors
+		self.lexer.lexoffset = 0 # type: ignore
 		self.token_stream = None
 
 	@property
@@ -242,13 +260,309 @@ class IndentLexer():
 		except StopIteration:
 			return None
 
+class FusedIndentLexer(IndentLexer):
+	"""Same token stream as IndentLexer, from a single generator.
+
+	After a NEWLINE, leading tabs are counted straight from the input instead of
+	going through one TABULATION token each, and INDENT / DEDENT tokens are
+	emitted inline, without the filter and wrapper generators."""
+
+	def _fused_tokens(self, lexer: lex.Lexer):
+		next_lexer_token = lexer.token
+		data = lexer.lexdata
+		data_length = len(data)
+		current_indentation = 0
+		is_first_token = True
+		token = None
+
+		while True:
+			next_token = next_lexer_token()
+			if next_token is None:
+				break
+			token = next_token
+
+			if token.type != "NEWLINE":
+				yield token
+				is_first_token = False
+				continue
+			elif is_first_token:  # Skip the first newline
+				continue
+
+			yield token
+
+			indentation_count = 0
+			position = lexer.lexpos
+			while position < data_length and (data[position] == '\t' or data[position] == ' '):
+				if data[position] == '\t':
+					indentation_count += 1
+				position += 1
+
+			lexer.lexpos = position
+
+			# Tabs after a discarded comment or an illegal character still count
+			next_token = next_lexer_token()
+			while next_token and next_token.type == "TABULATION":
+				indentation_count += 1
+				next_token = next_lexer_token()
+
+			if indentation_count > current_indentation:
+				yield LexTokenT(
+					value=indentation_count * '\t',
+					lineno=token.lineno,
+					lexpos=0,
+					type="INDENT",
+				)
+
+			if indentation_count < current_indentation:
+				for i in range(current_indentation - indentation_count):
+					yield LexTokenT(
+						value=(current_indentation-(i+1))*'\t',
+						lineno=token.lineno,
+						lexpos=0,
+						type="DEDENT",
+					)
+
+			current_indentation = indentation_count
+
+			if next_token:
+				yield next_token
+			else:
+				break
+
+		for i in range(current_indentation):
+			yield LexTokenT(
+				value=(current_indentation-i)*'\t',
+				lineno=token.lineno if token else 0,
+				lexpos=0,
+				type="DEDENT",
+			)
+
+	def input(self, data):
+		self.lexer.input(data)
+		self.token_stream = self._fused_tokens(self.lexer)
+
+class Token:
+	"""Token view with the attributes of a LexToken, without a per-instance __dict__."""
+	__slots__ = ("type", "value", "lineno", "lexpos", "lexer")
+
+	def __init__(self, type: str, value: Any, lineno: int, lexpos: int) -> None:
+		self.type = type
+		self.value = value
+		self.lineno = lineno
+		self.lexpos = lexpos
+
+	def __str__(self) -> str:
+		return f"LexToken({self.type},{self.value!r},{self.lineno},{self.lexpos})"
+
+	def __repr__(self) -> str:
+		return str(self)
+
+class TokenBuffer:
+	"""A whole token stream stored in columns.
+
+	Types are small-int codes (see TOKEN_CODES), line numbers and positions
+	live in arrays and values in a list, string values being interned. Tokens
+	only exist while lexing: a buffer holds no object per token."""
+	__slots__ = ("types", "values", "linenos", "lexpositions", "errors")
+
+	def __init__(self) -> None:
+		self.types = array('B')
+		self.values: List[Any] = []
+		self.linenos = array('l')
+		self.lexpositions = array('l')
+		self.errors: List[List[Any]] = []
+
+	@classmethod
+	def from_code(cls, code: str, fused: bool = True) -> "TokenBuffer":
+		lexer = build_lexer(fused=fused)
+		lexer.input(code)
+		buffer = cls()
+		buffer.extend(lexer)
+		buffer.errors = lexer.errors
+		return buffer
+
+	def append(self, token: LexTokenT):
+		value = token.value
+		self.types.append(TOKEN_CODES[token.type])
+		self.values.append(intern(value) if type(value) is str else value)
+		self.linenos.append(token.lineno)
+		self.lexpositions.append(token.lexpos)
+
+	def extend(self, tokens):
+		for token in tokens:
+			self.append(token)
+
+	def __len__(self) -> int:
+		return len(self.types)
+
+	def row(self, index: int) -> Tuple[str, Any, int, int]:
+		"""(type, value, lineno, lexpos) of a token."""
+		return tokens[self.types[index]], self.values[index], self.linenos[index], self.lexpositions[index]
+
+	def __getitem__(self, index: int) -> Token:
+		return Token(*self.row(index))
+
+	def __iter__(self) -> Iterator[Token]:
+		for index in range(len(self.types)):
+			yield Token(*self.row(index))
+
+	def reader(self) -> "TokenReader":
+		return TokenReader(self)
+
+class TokenReader:
+	"""Feeds a TokenBuffer to the parser: parser.parse(lexer=buffer.reader())."""
+	__slots__ = ("buffer", "position", "lineno", "lexpos")
+
+	def __init__(self, buffer: TokenBuffer) -> None:
+		self.buffer = buffer
+		self.position = 0
+		self.lineno = 1
+		self.lexpos = 0
+
+	def input(self, data: str):
+		raise TypeError("A TokenReader reads an already lexed TokenBuffer, use TokenBuffer.from_code()")
+
+	def token(self) -> Optional[Token]:
+		if self.position >= len(self.buffer):
+			return None
+		token = self.buffer[self.position]
+		self.position += 1
+		self.lineno, self.lexpos = token.lineno, token.lexpos
+		return token
+
 def print_tokens(code: str):
-	lexer = build_lexer()
-	lexer.input(code)
+	buffer = TokenBuffer.from_code(code)
+
+	for index in range(len(buffer)):
+		type, value, lineno, lexpos = buffer.row(index)
+		print(f"LexToken({type},{value!r},{lineno},{lexpos})")
+
+# Strings, comments, newlines and unterminated openers: all a chunk boundary depends on.
+# A comment also swallows the newlines following it, like the lexer's t_COMMENT.
+SCANNER = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|\([\s\S]*?\)|\#[^\n]*\n*|\n|(["\'(])')
+
+# Line starts that begin a new top-level statement: any token but `else`, whereas
+# indentation, comments and illegal characters continue the current one
+STATEMENT_STARTS = re.compile(r"(?!else\b)[a-zA-Z_0-9\"'.+\-*/%<>\U0000231A-\U0001FAF8]")
+
+def chunk_ends(text: str, position: int = 0) -> Tuple[List[int], bool]:
+	"""Splits text, from a chunk start, into top-level chunks.
+
+	A chunk ends after a newline followed by a line starting a new top-level
+	statement (see STATEMENT_STARTS). Returns the end
+	offset of every chunk (the last one being len(text)), and whether text was
+	scanned without meeting an unterminated string or multi-line comment, which
+	may be closed past the end of text."""
+	ends: List[int] = []
+	clean = True
+	for match in SCANNER.finditer(text, position):
+		if match.group(1):
+			clean = False
+		elif match.group() == "\n":
+			end = match.end()
+			if STATEMENT_STARTS.match(text, end):
+				ends.append(end)
+	ends.append(len(text))
+	return ends, clean
+
+def scan_chunk_ends(text: str, position: int, ends: List[int]) -> Tuple[int, bool]:
+	"""chunk_ends() of a text still being read, scanned from position on.
+
+	Appends the chunk ends found to ends. Returns where the next scan resumes,
+	before anything the rest of the text may still change (an open string or
+	comment, a comment or a line that may go on), and whether no unterminated
+	string or comment was met."""
+	for match in SCANNER.finditer(text, position):
+		if match.group(1):
+			return match.start(), False
+		end = match.end()
+		if end == len(text):
+			return match.start(), True
+		if match.group() == "\n":
+			# The next line may still be an incomplete `else`, e.g. `el`
+			if len(text) - end <= len("else"):
+				return match.start(), True
+			if STATEMENT_STARTS.match(text, end):
+				ends.append(end)
+	return len(text), True
+
+class StreamingLexer:
+	"""Lexes a source read piece by piece: a text or binary file, or an mmap.
+
+	The source is cut at top-level chunk boundaries (see chunk_ends), where the
+	indentation is back to zero and no string or comment is open, and every
+	piece is lexed on its own: only the current piece is held as a str. Tokens
+	keep the line and position they have in the whole source, which the parser
+	reads with parser.parse(lexer=StreamingLexer(file))."""
+
+	def __init__(self, stream: IO, chunk_size: int = 1 << 16, fused: bool = True) -> None:
+		self.stream = stream
+		self.chunk_size = chunk_size
+		self.fused = fused
+		self.errors: List[List[Any]] = []
+		self.token_stream = self._tokens()
+
+	def input(self, data: str):
+		raise TypeError("A StreamingLexer reads its own stream, use parser.parse(lexer=...) without input")
+
+	def _pieces(self) -> Iterator[str]:
+		decoder = None
+		pending = ""
+		# Scanning resumes where it stopped (see scan_chunk_ends), with the chunk ends found so far
+		scanned, ends = 0, []
+		# An unterminated string or comment is scanned again once pending has grown
+		# as much past it, so a long one is scanned a bounded number of times
+		retry = 0
+		while True:
+			data = self.stream.read(self.chunk_size)
+			if not data:
+				break
+			if isinstance(data, (bytes, bytearray)):
+				decoder = decoder or getincrementaldecoder("utf-8")()
+				data = decoder.decode(data)
+			pending += data
+			if len(pending) < retry:
+				continue
+
+			scanned, clean = scan_chunk_ends(pending, scanned, ends)
+			if not clean:
+				retry = 2 * len(pending) - scanned
+				continue
+			cut = ends[-1] if ends else 0
+			if cut:
+				yield pending[:cut]
+				pending = pending[cut:]
+				scanned -= cut
+				ends.clear()
+
+		if decoder is not None:
+			pending += decoder.decode(b"", final=True)
+		# Like run_code, the end of the source gets a newline
+		yield pending + "\n"
+
+	def _tokens(self) -> Iterator[LexTokenT]:
+		lineno, offset = 1, 0
+		for piece in self._pieces():
+			lexer = build_lexer(fused=self.fused)
+			# Lines go on from the previous piece, errors are reported where they are in the source
+			lexer.lexer.lineno = lineno
+			lexer.lexer.lexoffset = offset
+			lexer.input(piece)
+			for token in lexer:
+				# INDENT and DEDENT have no position
+				if token.type not in ("INDENT", "DEDENT"):
+					token.lexpos += offset
+				yield token
+			self.errors.extend(lexer.errors)
+			lineno = lexer.lexer.lineno
+			offset += len(piece)
 
-	for token in lexer:
-		print(token)
+	def __iter__(self):
+		return self.token_stream
+
+	def token(self):
+		return next(self.token_stream, None)
 
-def build_lexer(**kwargs):
-	lexer = IndentLexer(**kwargs)
+def build_lexer(fused: bool = False, **kwargs):
+	lexer = FusedIndentLexer(**kwargs) if fused else IndentLexer(**kwargs)
 	return lexer
\ No newline at end of file
@@ -0,0 +1,202 @@
+from collections import OrderedDict
+from math import copysign
+from typing import Any, Dict, Hashable, Iterable, List, Literal, Optional, Set, Tuple
+
+from . import nodes
+from .interpreter import MISSING, Action, TProgram, TStatement
+from .resolver import assigned_names
+
+# Memoization types
+TCachePolicy = Literal["lru", "fifo"]
+TCacheKey = Tuple[int, Tuple[Any, ...], Tuple[Tuple[type, float], ...]]
+
+CACHE_POLICIES: Tuple[TCachePolicy, ...] = ("lru", "fifo")
+
+# Statements that never prevent an action from being pure, as long as their operands do not
+PURE_STATEMENTS = (
+	nodes.LITERAL, nodes.NAME, nodes.BINARY_EXPRESSION, nodes.NOT_EXPRESSION,
+	nodes.VARIABLE_DECLARATION, nodes.IF_ELSE, nodes.WHILE,
+	nodes.STOP, nodes.SKIP, nodes.RESULT, nodes.CALL,
+)
+
+class CacheStats:
+	__slots__ = ("name", "hits", "misses")
+
+	def __init__(self, name: str) -> None:
+		self.name = name
+		self.hits = 0
+		self.misses = 0
+
+	def __repr__(self) -> str:
+		return f"CacheStats({self.name!r}, hits={self.hits}, misses={self.misses})"
+
+def definition_counts(block: List[TStatement], counts: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+	"""Number of assignments of every name, in a block and every nested action body."""
+	counts = dict() if counts is None else counts
+	for name in assigned_names(block):
+		counts[name] = counts.get(name, 0) + 1
+	for statement in block:
+		match statement.kind:
+			case nodes.ACTION_DEFINITION:
+				definition_counts(statement.block, counts)
+			case nodes.IF_ELSE:
+				definition_counts(statement.if_block + (statement.else_block or []), counts)
+			case nodes.WHILE:
+				definition_counts(statement.block, counts)
+	return counts
+
+class PurityChecker:
+	"""Finds the actions of a program whose result only depends on their arguments.
+
+	Only actions defined once, at top level, are candidates. A pure action has no
+	`print` or `ask`, defines no action, assigns no variable outside of its own
+	locals, reads nothing but its parameters and locals, and only calls pure
+	actions (itself included)."""
+
+	def __init__(self, program: TProgram, known: Iterable[str] = ()) -> None:
+		counts = definition_counts(program)
+		self.globals: Set[str] = set(assigned_names(program)) | set(known)
+		# name -> (params, block) of the candidate actions
+		self.candidates: Dict[str, Tuple[List[str], List[TStatement]]] = {
+			statement.name: (statement.params, statement.block)
+			for statement in program
+			if statement.kind == nodes.ACTION_DEFINITION
+			and counts[statement.name] == 1
+			and statement.name not in known
+		}
+
+	def pure_actions(self) -> Dict[str, List[TStatement]]:
+		"""Returns name -> block of every pure action."""
+		calls: Dict[str, Set[str]] = dict()
+		for name, (params, block) in self.candidates.items():
+			called = self.check(params, block)
+			if called is not None:
+				calls[name] = called
+
+		# An action calling an impure action is impure, until nothing changes
+		changed = True
+		while changed:
+			changed = False
+			for name in list(calls):
+				if not calls[name] <= calls.keys():
+					del calls[name]
+					changed = True
+
+		return {name: self.candidates[name][1] for name in calls}
+
+	def check(self, params: List[str], block: List[TStatement]) -> Optional[Set[str]]:
+		"""Returns the names called by an action, or None if it is impure on its own."""
+		local_names = set(params)
+		for name in assigned_names(block):
+			if name in self.globals and name not in local_names:
+				return None # Writes a global
+			local_names.add(name)
+
+		called: Set[str] = set()
+		pending: List[Any] = list(block)
+		while pending:
+			statement = pending.pop()
+			if statement.kind not in PURE_STATEMENTS:
+				return None
+			match statement.kind:
+				case nodes.NAME:
+					if statement.name not in local_names:
+						return None # Reads a global
+				case nodes.VARIABLE_DECLARATION:
+					pending.append(statement.value)
+				case nodes.BINARY_EXPRESSION:
+					pending.extend((statement.left, statement.right))
+				case nodes.NOT_EXPRESSION:
+					pending.append(statement.operand)
+				case nodes.IF_ELSE:
+					pending.append(statement.condition)
+					pending.extend(statement.if_block + (statement.else_block or []))
+				case nodes.WHILE:
+					pending.append(statement.condition)
+					pending.extend(statement.block)
+				case nodes.RESULT:
+					pending.extend(statement.expressions)
+				case nodes.CALL:
+					if statement.name in local_names:
+						return None # Calls an action value
+					called.add(statement.name)
+					pending.extend(statement.args)
+		return called
+
+class ActionCache:
+	"""Opt-in memoization of pure action calls, keyed by the argument values.
+
+	analyze() registers the pure actions of a program, execute_program(...,
+	action_cache=cache) then looks every call to one of them up first. At most
+	`maxsize` results are kept, across all actions, and the oldest one is evicted:
+	the least recently used with the "lru" policy, the first cached with "fifo".
+	Hits and misses are counted per action in `stats`, across the runs of a
+	program."""
+
+	def __init__(self, maxsize: int = 128, policy: TCachePolicy = "lru") -> None:
+		if maxsize < 1:
+			raise ValueError(f"maxsize must be positive, got {maxsize}")
+		if policy not in CACHE_POLICIES:
+			raise ValueError(f"Unknown cache policy '{policy}', expected one of {CACHE_POLICIES}")
+		self.maxsize = maxsize
+		self.policy = policy
+		self.results: "OrderedDict[TCacheKey, Any]" = OrderedDict()
+		# id(block) -> (block, stats), the block is kept alive so its id stays unique
+		self.pure: Dict[int, Tuple[List[TStatement], CacheStats]] = dict()
+
+	def analyze(self, program: TProgram, known: Iterable[str] = ()):
+		"""Registers the pure actions of a program in place of those of the previous one.
+
+		Running the same program again keeps its stats and cached results, the
+		actions of any other program are forgotten along with their results."""
+		pure: Dict[int, Tuple[List[TStatement], CacheStats]] = dict()
+		for name, block in PurityChecker(program, known).pure_actions().items():
+			pure[id(block)] = self.pure.get(id(block)) or (block, CacheStats(name))
+
+		if pure.keys() != self.pure.keys():
+			# Once a block is released its id can be reused by another one
+			self.results = OrderedDict((key, value) for key, value in self.results.items() if key[0] in pure)
+		self.pure = pure
+
+	@property
+	def stats(self) -> Dict[str, CacheStats]:
+		return {stats.name: stats for _, stats in self.pure.values()}
+
+	@property
+	def hits(self) -> int:
+		return sum(stats.hits for _, stats in self.pure.values())
+
+	@property
+	def misses(self) -> int:
+		return sum(stats.misses for _, stats in self.pure.values())
+
+	def key(self, action: Action, param_values: List[Any]) -> Optional[TCacheKey]:
+		"""Returns the cache key of a call, None if the action is not pure or an argument is unhashable."""
+		block_id = id(action.block)
+		if block_id not in self.pure:
+			return None
+		values = tuple(param_values)
+		if not all(isinstance(value, Hashable) for value in values):
+			return None
+		# Types are part of the key so that 1, 1.0 and true stay distinct, signs so that 0.0 and -0.0 do
+		return block_id, values, tuple((type(value), copysign(1.0, value) if type(value) is float else 0) for value in values)
+
+	def get(self, key: TCacheKey) -> Any:
+		"""Returns the cached result of a call, or MISSING."""
+		stats = self.pure[key[0]][1]
+		if key in self.results:
+			stats.hits += 1
+			if self.policy == "lru":
+				self.results.move_to_end(key)
+			return self.results[key]
+		stats.misses += 1
+		return MISSING
+
+	def put(self, key: TCacheKey, value: Any):
+		self.results[key] = value
+		if len(self.results) > self.maxsize:
+			self.results.popitem(last=False)
+
+	def clear(self):
+		"""Forgets every cached result, e.g. after redefining an action called by a pure one."""
+		self.results.clear()
@@ -0,0 +1,337 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+# Node kinds, small ints the backends dispatch on
+(
+	LITERAL,
+	NAME,
+	LIST_COMPOSITE,
+	DICT_COMPOSITE,
+	VARIABLE_DECLARATION,
+	BINARY_EXPRESSION,
+	NOT_EXPRESSION,
+	IF_ELSE,
+	WHILE,
+	STOP,
+	SKIP,
+	ACTION_DEFINITION,
+	CALL,
+	RESULT,
+	PRINT,
+	ASK,
+) = range(16)
+
+ARITHMETIC_OPERATORS = ("+", "-", "*", "/", "%", "**")
+LOGICAL_OPERATORS = ("and", "or")
+
+class Node:
+	"""Base of the AST nodes: a kind, the line the node starts on, and its fields.
+
+	Nodes compare equal when their fields do, whatever their line."""
+	__slots__ = ("lineno",)
+	kind: int = -1
+	fields: Tuple[str, ...] = ()
+
+	def __eq__(self, other: object) -> bool:
+		return type(self) is type(other) and all(getattr(self, field) == getattr(other, field) for field in self.fields)
+
+	def __repr__(self) -> str:
+		return f"{type(self).__name__}({', '.join(repr(getattr(self, field)) for field in self.fields)})"
+
+	def __reduce__(self) -> Tuple[Any, ...]:
+		# Pickled as a constructor call, loading does not go through copyreg
+		return type(self), tuple(getattr(self, field) for field in self.fields) + (self.lineno,)
+
+	__hash__ = None # type: ignore
+
+class Literal(Node):
+	__slots__ = ("value",)
+	kind = LITERAL
+	fields = ("value",)
+
+	def __init__(self, value: Any, lineno: int = 0) -> None:
+		self.value = value
+		self.lineno = lineno
+
+class Name(Node):
+	"""A variable read."""
+	__slots__ = ("name",)
+	kind = NAME
+	fields = ("name",)
+
+	def __init__(self, name: str, lineno: int = 0) -> None:
+		self.name = name
+		self.lineno = lineno
+
+class ListComposite(Node):
+	__slots__ = ("items",)
+	kind = LIST_COMPOSITE
+	fields = ("items",)
+
+	def __init__(self, items: List[Node], lineno: int = 0) -> None:
+		self.items = items
+		self.lineno = lineno
+
+class DictComposite(Node):
+	__slots__ = ("entries",)
+	kind = DICT_COMPOSITE
+	fields = ("entries",)
+
+	def __init__(self, entries: Dict[str, Node], lineno: int = 0) -> None:
+		self.entries = entries
+		self.lineno = lineno
+
+class VariableDeclaration(Node):
+	__slots__ = ("name", "value")
+	kind = VARIABLE_DECLARATION
+	fields = ("name", "value")
+
+	def __init__(self, name: str, value: Node, lineno: int = 0) -> None:
+		self.name = name
+		self.value = value
+		self.lineno = lineno
+
+class BinaryExpression(Node):
+	"""Arithmetic, comparison and logical (`and` / `or`) operators alike."""
+	__slots__ = ("operator", "left", "right")
+	kind = BINARY_EXPRESSION
+	fields = ("operator", "left", "right")
+
+	def __init__(self, operator: str, left: Node, right: Node, lineno: int = 0) -> None:
+		self.operator = operator
+		self.left = left
+		self.right = right
+		self.lineno = lineno
+
+class NotExpression(Node):
+	__slots__ = ("operand",)
+	kind = NOT_EXPRESSION
+	fields = ("operand",)
+
+	def __init__(self, operand: Node, lineno: int = 0) -> None:
+		self.operand = operand
+		self.lineno = lineno
+
+class IfElse(Node):
+	__slots__ = ("condition", "if_block", "else_block")
+	kind = IF_ELSE
+	fields = ("condition", "if_block", "else_block")
+
+	def __init__(self, condition: Node, if_block: List[Node], else_block: Optional[List[Node]], lineno: int = 0) -> None:
+		self.condition = condition
+		self.if_block = if_block
+		self.else_block = else_block
+		self.lineno = lineno
+
+class While(Node):
+	__slots__ = ("condition", "block")
+	kind = WHILE
+	fields = ("condition", "block")
+
+	def __init__(self, condition: Node, block: List[Node], lineno: int = 0) -> None:
+		self.condition = condition
+		self.block = block
+		self.lineno = lineno
+
+class Stop(Node):
+	__slots__ = ()
+	kind = STOP
+
+	def __init__(self, lineno: int = 0) -> None:
+		self.lineno = lineno
+
+class Skip(Node):
+	__slots__ = ()
+	kind = SKIP
+
+	def __init__(self, lineno: int = 0) -> None:
+		self.lineno = lineno
+
+class ActionDefinition(Node):
+	__slots__ = ("name", "params", "block")
+	kind = ACTION_DEFINITION
+	fields = ("name", "params", "block")
+
+	def __init__(self, name: str, params: List[str], block: List[Node], lineno: int = 0) -> None:
+		self.name = name
+		self.params = params
+		self.block = block
+		self.lineno = lineno
+
+class Call(Node):
+	__slots__ = ("name", "args")
+	kind = CALL
+	fields = ("name", "args")
+
+	def __init__(self, name: str, args: List[Node], lineno: int = 0) -> None:
+		self.name = name
+		self.args = args
+		self.lineno = lineno
+
+class Result(Node):
+	__slots__ = ("expressions",)
+	kind = RESULT
+	fields = ("expressions",)
+
+	def __init__(self, expressions: List[Node], lineno: int = 0) -> None:
+		self.expressions = expressions
+		self.lineno = lineno
+
+class Print(Node):
+	__slots__ = ("expressions",)
+	kind = PRINT
+	fields = ("expressions",)
+
+	def __init__(self, expressions: List[Node], lineno: int = 0) -> None:
+		self.expressions = expressions
+		self.lineno = lineno
+
+class Ask(Node):
+	__slots__ = ("expressions",)
+	kind = ASK
+	fields = ("expressions",)
+
+	def __init__(self, expressions: List[Node], lineno: int = 0) -> None:
+		self.expressions = expressions
+		self.lineno = lineno
+
+# Tuple form
+
+def literal_tag(value: Any) -> str:
+	if value is None:
+		return "null_literal"
+	elif isinstance(value, bool):
+		return "boolean_literal"
+	elif isinstance(value, int):
+		return "integer_literal"
+	elif isinstance(value, float):
+		return "float_literal"
+	return "string_literal"
+
+def operator_tag(operator: str) -> str:
+	if operator in ARITHMETIC_OPERATORS:
+		return "arithmetic_expression"
+	elif operator in LOGICAL_OPERATORS:
+		return "logical_expression"
+	return "comparison_expression"
+
+def to_tuples(node: Any) -> Any:
+	"""The string-tagged tuple form of a node, a block or a program, as the parser used to emit it.
+
+	Identifiers are bare strings, and line numbers are lost."""
+	if isinstance(node, list):
+		return [to_tuples(child) for child in node]
+
+	kind = node.kind
+	if kind == LITERAL:
+		return (literal_tag(node.value),) if node.value is None else (literal_tag(node.value), node.value)
+	elif kind == NAME:
+		return node.name
+	elif kind == LIST_COMPOSITE:
+		return ("list_composite", to_tuples(node.items))
+	elif kind == DICT_COMPOSITE:
+		return ("dict_composite", {key: to_tuples(value) for key, value in node.entries.items()})
+	elif kind == VARIABLE_DECLARATION:
+		return ("variable_declaration_statement", node.name, to_tuples(node.value))
+	elif kind == BINARY_EXPRESSION:
+		# The left spine is unfolded in a loop, long chains do not recurse
+		links = []
+		while node.kind == BINARY_EXPRESSION:
+			links.append((node.operator, node.right))
+			node = node.left
+		value = to_tuples(node)
+		for operator, right in reversed(links):
+			value = (operator_tag(operator), operator, value, to_tuples(right))
+		return value
+	elif kind == NOT_EXPRESSION:
+		return ("logical_expression", "not", to_tuples(node.operand))
+	elif kind == IF_ELSE:
+		else_block = to_tuples(node.else_block) if node.else_block is not None else None
+		return ("ifelse_statements", to_tuples(node.condition), to_tuples(node.if_block), else_block)
+	elif kind == WHILE:
+		return ("while_statements", to_tuples(node.condition), to_tuples(node.block))
+	elif kind == STOP:
+		return ("stop_statement",)
+	elif kind == SKIP:
+		return ("skip_statement",)
+	elif kind == ACTION_DEFINITION:
+		return ("action_statements", node.name, list(node.params), to_tuples(node.block))
+	elif kind == CALL:
+		return ("call", node.name, to_tuples(node.args))
+	elif kind == RESULT:
+		return ("result_statement", to_tuples(node.expressions))
+	elif kind == PRINT:
+		return ("print_statement", to_tuples(node.expressions))
+	elif kind == ASK:
+		return ("ask", to_tuples(node.expressions))
+	raise TypeError(f"Not an AST node: {node!r}")
+
+def from_tuples(node: Any) -> Any:
+	"""Nodes of a tuple form node, block or program. Line numbers are 0."""
+	if isinstance(node, list):
+		return [from_tuples(child) for child in node]
+	elif isinstance(node, str):
+		return Name(node)
+
+	match node[0]:
+		case "integer_literal" | "float_literal" | "string_literal" | "boolean_literal":
+			return Literal(node[1])
+		case "null_literal":
+			return Literal(None)
+		case "list_composite":
+			return ListComposite(from_tuples(node[1]))
+		case "dict_composite":
+			return DictComposite({key: from_tuples(value) for key, value in node[1].items()})
+		case "variable_declaration_statement":
+			return VariableDeclaration(node[1], from_tuples(node[2]))
+		case "arithmetic_expression" | "comparison_expression" | "logical_expression":
+			if node[1] == "not":
+				return NotExpression(from_tuples(node[2]))
+			links = []
+			while not isinstance(node, str) and node[0] in ("arithmetic_expression", "comparison_expression", "logical_expression") and node[1] != "not":
+				links.append((node[1], node[3]))
+				node = node[2]
+			value = from_tuples(node)
+			for operator, right in reversed(links):
+				value = BinaryExpression(operator, value, from_tuples(right))
+			return value
+		case "ifelse_statements":
+			return IfElse(from_tuples(node[1]), from_tuples(node[2]), from_tuples(node[3]) if node[3] is not None else None)
+		case "while_statements":
+			return While(from_tuples(node[1]), from_tuples(node[2]))
+		case "stop_statement":
+			return Stop()
+		case "skip_statement":
+			return Skip()
+		case "action_statements":
+			return ActionDefinition(node[1], list(node[2]), from_tuples(node[3]))
+		case "call":
+			return Call(node[1], from_tuples(node[2]))
+		case "result_statement":
+			return Result(from_tuples(node[1]))
+		case "print_statement":
+			return Print(from_tuples(node[1]))
+		case "ask":
+			return Ask(from_tuples(node[1]))
+	raise TypeError(f"Not a tuple AST node: {node!r}")
+
+def as_nodes(program: List[Any]) -> List[Node]:
+	"""A program as nodes, converting a tuple form program."""
+	if all(isinstance(statement, Node) for statement in program):
+		return program
+	return from_tuples(program)
+
+def shift_lines(nodes: List[Node], lines: int):
+	"""Adds lines to the line number of nodes and of every node they hold."""
+	# Walked with a stack, long operator chains do not recurse
+	pending = list(nodes)
+	while pending:
+		node = pending.pop()
+		node.lineno += lines
+		for field in node.fields:
+			value = getattr(node, field)
+			if isinstance(value, Node):
+				pending.append(value)
+			elif isinstance(value, list):
+				pending.extend(item for item in value if isinstance(item, Node))
+			elif isinstance(value, dict):
+				pending.extend(value.values())
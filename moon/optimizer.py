@@ -0,0 +1,422 @@
+from itertools import count
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from . import nodes
+from .interpreter import BINARY_OPERATORS, INTERNAL_PREFIX, MISSING, TProgram, TStatement, statement_signals
+from .nodes import (
+	Ask,
+	BinaryExpression,
+	Call,
+	IfElse,
+	Literal,
+	Name,
+	Node,
+	NotExpression,
+	VariableDeclaration,
+	While,
+)
+from .resolver import assigned_names
+
+# Optimizer types
+TExpressionRewrite = Callable[[Node], Node]
+
+# Kinds of block a statement is in
+PROGRAM, BLOCK, ACTION = range(3)
+
+# Folded constants are kept small, the parsed program may be cached or compiled to a file
+MAX_FOLDED_LENGTH = 4096
+MAX_FOLDED_BITS = 4096
+
+SIGNALS = (nodes.STOP, nodes.SKIP, nodes.RESULT)
+# Statements whose value is the result of an action when they come last
+EXPRESSIONS = (
+	nodes.LITERAL, nodes.NAME, nodes.LIST_COMPOSITE, nodes.DICT_COMPOSITE,
+	nodes.BINARY_EXPRESSION, nodes.NOT_EXPRESSION, nodes.CALL, nodes.ASK,
+)
+
+# Variables holding hoisted expressions, unique to the process: programs run in
+# the same environment, like in the playground, never share one. execute_program()
+# removes them from the environment once the program has run
+INVARIANTS = count()
+
+def rewrite_expressions(statement: TStatement, rewrite: TExpressionRewrite) -> TStatement:
+	"""A statement with rewrite applied to each of its own expressions, not to nested blocks.
+
+	The statement itself is returned if nothing changed."""
+	match statement.kind:
+		case nodes.VARIABLE_DECLARATION:
+			value = rewrite(statement.value)
+			if value is not statement.value:
+				return VariableDeclaration(statement.name, value, statement.lineno)
+		case nodes.IF_ELSE:
+			condition = rewrite(statement.condition)
+			if condition is not statement.condition:
+				return IfElse(condition, statement.if_block, statement.else_block, statement.lineno)
+		case nodes.WHILE:
+			condition = rewrite(statement.condition)
+			if condition is not statement.condition:
+				return While(condition, statement.block, statement.lineno)
+		case nodes.RESULT | nodes.PRINT:
+			expressions = [rewrite(expression) for expression in statement.expressions]
+			if changed(expressions, statement.expressions):
+				return type(statement)(expressions, statement.lineno)
+		case _ if statement.kind in EXPRESSIONS:
+			return rewrite(statement)
+	return statement
+
+def changed(new: List[Any], old: Optional[List[Any]]) -> bool:
+	"""Whether a rewritten list holds other nodes, compared by identity, not by value."""
+	return old is None or len(new) != len(old) or any(a is not b for a, b in zip(new, old))
+
+def binary_spine(expression: Node) -> Tuple[Node, List[BinaryExpression]]:
+	"""The first operand of a chain, and its binary expressions from the innermost out."""
+	spine: List[BinaryExpression] = []
+	while expression.kind == nodes.BINARY_EXPRESSION:
+		spine.append(expression) # type: ignore
+		expression = expression.left # type: ignore
+	spine.reverse()
+	return expression, spine
+
+def fold_constant(operator: str, left: Any, right: Any) -> Any:
+	"""Value of a binary operator on two constants, MISSING if it raises or is too large."""
+	if operator == "**" and isinstance(left, int) and isinstance(right, int) and left.bit_length() * right > MAX_FOLDED_BITS:
+		return MISSING
+	elif operator == "*" and isinstance(left, str) and isinstance(right, int) and len(left) * right > MAX_FOLDED_LENGTH:
+		return MISSING
+	elif operator == "*" and isinstance(left, int) and isinstance(right, str) and left * len(right) > MAX_FOLDED_LENGTH:
+		return MISSING
+
+	try:
+		value = BINARY_OPERATORS[operator](left, right)
+	except Exception:
+		# Division by zero, unsupported operand types...: left for the program to raise
+		return MISSING
+	if isinstance(value, str) and len(value) > MAX_FOLDED_LENGTH:
+		return MISSING
+	return value
+
+class Pass:
+	"""A rewrite of a whole program.
+
+	Nodes are never changed in place: a rewritten node is a new node, so that the
+	parsed program, which may be cached, is left as it was. statement() returns
+	the statements replacing a statement, and block() rewrites a block."""
+	name = "pass"
+
+	def run(self, program: TProgram) -> TProgram:
+		return self.block(program, PROGRAM)
+
+	def block(self, block: List[TStatement], context: int) -> List[TStatement]:
+		statements: List[TStatement] = []
+		for index, statement in enumerate(block):
+			statements += self.statement(statement, context, index == len(block) - 1)
+		# Backends expect every block to hold a statement
+		return statements if statements or not block else block
+
+	def statement(self, statement: TStatement, context: int, last: bool) -> List[TStatement]:
+		return [self.nested(statement)]
+
+	def nested(self, statement: TStatement) -> TStatement:
+		"""A statement with its nested blocks rewritten."""
+		match statement.kind:
+			case nodes.IF_ELSE:
+				if_block = self.block(statement.if_block, BLOCK)
+				else_block = self.block(statement.else_block, BLOCK) if statement.else_block else statement.else_block
+				if changed(if_block, statement.if_block) or (else_block is not None and changed(else_block, statement.else_block)):
+					return IfElse(statement.condition, if_block, else_block, statement.lineno)
+			case nodes.WHILE:
+				block = self.block(statement.block, BLOCK)
+				if changed(block, statement.block):
+					return While(statement.condition, block, statement.lineno)
+			case nodes.ACTION_DEFINITION:
+				block = self.block(statement.block, ACTION)
+				if changed(block, statement.block):
+					return nodes.ActionDefinition(statement.name, statement.params, block, statement.lineno)
+		return statement
+
+class ConstantFolding(Pass):
+	"""Computes operators on constants, `1 + 2 * 3` becomes `7`.
+
+	`and` / `or` with a constant first operand become one of their operands, as
+	they evaluate to. Operators raising an error are left for the program to raise."""
+	name = "fold"
+
+	def statement(self, statement: TStatement, context: int, last: bool) -> List[TStatement]:
+		return [self.nested(rewrite_expressions(statement, self.expression))]
+
+	def expression(self, expression: Node) -> Node:
+		match expression.kind:
+			case nodes.BINARY_EXPRESSION:
+				# The left spine is folded in a loop, long chains do not recurse
+				first, spine = binary_spine(expression)
+				value = self.expression(first)
+				for node in spine:
+					value = self.binary(node, value, self.expression(node.right))
+				return value
+			case nodes.NOT_EXPRESSION:
+				operand = self.expression(expression.operand)
+				if operand.kind == nodes.LITERAL:
+					return Literal(not operand.value, expression.lineno)
+				elif operand is not expression.operand:
+					return NotExpression(operand, expression.lineno)
+			case nodes.CALL:
+				args = [self.expression(arg) for arg in expression.args]
+				if changed(args, expression.args):
+					return Call(expression.name, args, expression.lineno)
+			case nodes.ASK:
+				expressions = [self.expression(e) for e in expression.expressions]
+				if changed(expressions, expression.expressions):
+					return Ask(expressions, expression.lineno)
+		return expression
+
+	def binary(self, node: BinaryExpression, left: Node, right: Node) -> Node:
+		operator = node.operator
+		if left.kind == nodes.LITERAL and operator in ("and", "or"):
+			# `a and b` is a if a is false, b otherwise
+			return left if bool(left.value) == (operator == "or") else right
+		elif left.kind == nodes.LITERAL and right.kind == nodes.LITERAL:
+			value = fold_constant(operator, left.value, right.value)
+			if value is not MISSING:
+				return Literal(value, node.lineno)
+
+		if left is node.left and right is node.right:
+			return node
+		return BinaryExpression(operator, left, right, node.lineno)
+
+class BranchFolding(Pass):
+	"""Replaces an `if` on a constant by the branch it takes, and drops `while` loops on a false constant.
+
+	A branch is not spliced into the top level, nor into an action body, if it
+	may stop, skip or result: outside of a loop, these only leave the enclosing
+	statement of the program or of the action. The last statement of an action
+	is kept, its value is the result of the action."""
+	name = "branches"
+
+	def statement(self, statement: TStatement, context: int, last: bool) -> List[TStatement]:
+		statement = self.nested(statement)
+		if statement.kind == nodes.IF_ELSE and statement.condition.kind == nodes.LITERAL:
+			branch = statement.if_block if statement.condition.value else statement.else_block or []
+		elif statement.kind == nodes.WHILE and statement.condition.kind == nodes.LITERAL and not statement.condition.value:
+			branch = []
+		else:
+			return [statement]
+
+		if context == ACTION and last:
+			return [statement]
+		elif context != BLOCK and any(statement_signals(s, False) for s in branch):
+			return [statement]
+		return branch
+
+class DeadCodeElimination(Pass):
+	"""Removes the statements following a `stop`, `skip` or `result` in the same block.
+
+	Top-level statements are all kept: a `stop`, `skip` or `result` there only
+	leaves itself. So does a `stop` or `skip` in an action body."""
+	name = "unreachable"
+
+	def block(self, block: List[TStatement], context: int) -> List[TStatement]:
+		block = super().block(block, context)
+		signals = SIGNALS if context == BLOCK else (nodes.RESULT,) if context == ACTION else ()
+		for index, statement in enumerate(block):
+			if statement.kind in signals:
+				return block[:index + 1] if index + 1 < len(block) else block
+		return block
+
+class InvariantHoisting(Pass):
+	"""Computes loop-invariant expressions once, before the loop.
+
+	An expression is invariant if it only reads names the loop never assigns,
+	and the loop holds no `call` or `ask`. Only expressions evaluated on every
+	iteration before any control flow are hoisted: those of the condition, out
+	of the right operands of `and` / `or`, and those of the leading assignments
+	of the body. The loop is guarded by its own condition, so they are computed
+	exactly when the original loop would compute them:
+
+	    if condition
+	        %invariant0 is expression
+	        while condition
+	            ... %invariant0 ...
+
+	The guard has evaluated the condition once, so nothing in it raises on the
+	first iteration. In the body, hoisting stops at the first operation that
+	could raise before the hoisted ones would have been computed, so a failing
+	loop still reports the same error."""
+	name = "hoist"
+
+	def statement(self, statement: TStatement, context: int, last: bool) -> List[TStatement]:
+		statement = self.nested(statement)
+		if statement.kind != nodes.WHILE or not self.hoistable(statement):
+			return [statement]
+
+		assigned = set(assigned_names(statement.block))
+		hoisted: List[VariableDeclaration] = []
+		self.defined: Optional[set] = None
+		self.raising = False
+		condition = self.hoist(statement.condition, assigned, hoisted)
+		# Names the guard has read, then those assigned by the leading assignments
+		self.defined = read_names(statement.condition)
+		block = list(statement.block)
+		for index, body_statement in enumerate(block):
+			if body_statement.kind != nodes.VARIABLE_DECLARATION or self.raising:
+				break
+			block[index] = rewrite_expressions(body_statement, lambda e: self.hoist(e, assigned, hoisted))
+			self.defined.add(body_statement.name)
+
+		if not hoisted:
+			return [statement]
+		loop = While(condition, block, statement.lineno)
+		return [IfElse(statement.condition, [*hoisted, loop], None, statement.lineno)]
+
+	def hoistable(self, loop: While) -> bool:
+		"""Whether nothing but the loop itself may assign its variables, nor run more than once per evaluation."""
+		pending: List[Any] = [loop.condition, *loop.block]
+		while pending:
+			node = pending.pop()
+			if isinstance(node, list):
+				pending += node
+			elif node is None or not isinstance(node, Node):
+				continue
+			elif node.kind in (nodes.CALL, nodes.ASK, nodes.ACTION_DEFINITION, nodes.LIST_COMPOSITE, nodes.DICT_COMPOSITE):
+				return False
+			else:
+				pending += [getattr(node, field) for field in node.fields]
+		return True
+
+	def invariant(self, expression: Node, assigned: set) -> bool:
+		pending = [expression]
+		while pending:
+			node = pending.pop()
+			match node.kind:
+				case nodes.LITERAL:
+					pass
+				case nodes.NAME:
+					if node.name in assigned:
+						return False
+				case nodes.BINARY_EXPRESSION:
+					pending += [node.left, node.right]
+				case nodes.NOT_EXPRESSION:
+					pending.append(node.operand)
+				case _:
+					return False
+		return True
+
+	def hoist(self, expression: Node, assigned: set, hoisted: List[VariableDeclaration]) -> Node:
+		"""expression with its largest invariant subexpressions replaced by hoisted variables.
+
+		Outside of the condition, self.raising records whether anything left in
+		place so far could raise, after which nothing more is hoisted."""
+		if expression.kind not in (nodes.BINARY_EXPRESSION, nodes.NOT_EXPRESSION):
+			if self.defined is not None and expression.kind == nodes.NAME and expression.name not in self.defined:
+				self.raising = True
+			return expression
+		elif self.raising:
+			return expression
+		elif self.invariant(expression, assigned):
+			return self.variable(expression, hoisted)
+		elif expression.kind == nodes.NOT_EXPRESSION:
+			operand = self.hoist(expression.operand, assigned, hoisted)
+			return expression if operand is expression.operand else NotExpression(operand, expression.lineno)
+
+		# Along the left spine, the invariant part is the innermost chain, found in a loop
+		first, spine = binary_spine(expression)
+		invariant = self.invariant(first, assigned)
+		value = first if invariant else self.hoist(first, assigned, hoisted)
+		for node in spine:
+			if invariant and self.invariant(node.right, assigned):
+				value = node
+				continue
+			elif invariant and value.kind in (nodes.BINARY_EXPRESSION, nodes.NOT_EXPRESSION):
+				value = self.variable(value, hoisted)
+			invariant = False
+			# The right operand of `and` / `or` is not always evaluated
+			right = node.right if node.operator in ("and", "or") or self.raising else self.hoist(node.right, assigned, hoisted)
+			if value is node.left and right is node.right:
+				value = node
+			else:
+				value = BinaryExpression(node.operator, value, right, node.lineno)
+			if self.defined is not None:
+				self.raising = True
+		return value
+
+	def variable(self, expression: Node, hoisted: List[VariableDeclaration]) -> Name:
+		key = expression_key(expression)
+		for declaration in hoisted:
+			if expression_key(declaration.value) == key:
+				return Name(declaration.name, expression.lineno)
+		name = f"{INTERNAL_PREFIX}invariant{next(INVARIANTS)}"
+		hoisted.append(VariableDeclaration(name, expression, expression.lineno))
+		return Name(name, expression.lineno)
+
+def expression_key(expression: Node) -> Tuple[Any, ...]:
+	"""A key equal for the invariant expressions that always evaluate the same.
+
+	Unlike with ==, literals only match literals of the same type and repr:
+	1, 1.0 and true, or 0.0 and -0.0, are told apart."""
+	key: List[Any] = []
+	pending = [expression]
+	while pending:
+		node = pending.pop()
+		match node.kind:
+			case nodes.LITERAL:
+				key.append((type(node.value), repr(node.value)))
+			case nodes.NAME:
+				key.append(("name", node.name))
+			case nodes.BINARY_EXPRESSION:
+				key.append(("binary", node.operator))
+				pending += [node.right, node.left]
+			case nodes.NOT_EXPRESSION:
+				key.append(("not",))
+				pending.append(node.operand)
+	return tuple(key)
+
+def read_names(expression: Node) -> set:
+	"""Names an expression always reads, leaving out the right operands of `and` / `or`."""
+	names = set()
+	pending = [expression]
+	while pending:
+		node = pending.pop()
+		match node.kind:
+			case nodes.NAME:
+				names.add(node.name)
+			case nodes.BINARY_EXPRESSION:
+				pending.append(node.left)
+				if node.operator not in ("and", "or"):
+					pending.append(node.right)
+			case nodes.NOT_EXPRESSION:
+				pending.append(node.operand)
+	return names
+
+def default_passes() -> List[Pass]:
+	return [ConstantFolding(), BranchFolding(), DeadCodeElimination(), InvariantHoisting()]
+
+class PassManager:
+	"""Runs optimization passes over a parsed program, in order, timing each of them.
+
+	Passes are turned off by name, e.g. PassManager(disabled={"hoist"})."""
+
+	def __init__(self, passes: Optional[Iterable[Pass]] = None, disabled: Iterable[str] = ()) -> None:
+		self.passes: List[Pass] = list(passes) if passes is not None else default_passes()
+		self.disabled = set(disabled)
+		# Pass name -> seconds spent in its last run
+		self.timings: Dict[str, float] = dict()
+
+	def enable(self, name: str, enabled: bool = True):
+		if name not in {optimization.name for optimization in self.passes}:
+			raise KeyError(f"No optimization pass named {name!r}")
+		if enabled:
+			self.disabled.discard(name)
+		else:
+			self.disabled.add(name)
+
+	def run(self, program: TProgram) -> TProgram:
+		for optimization in self.passes:
+			if optimization.name in self.disabled:
+				continue
+			start = perf_counter()
+			program = optimization.run(program)
+			self.timings[optimization.name] = perf_counter() - start
+		return program
+
+def optimize_program(program: TProgram, disabled: Iterable[str] = ()) -> TProgram:
+	return PassManager(disabled=disabled).run(program)
@@ -1,7 +1,30 @@
 import ply.yacc as yacc
+from functools import cache
+from os import path
+from typing import Any, List, Tuple
 from ply.yacc import YaccProduction as TYP
 
 from .lexer import tokens, LexTokenT
+from .nodes import (
+	ActionDefinition,
+	Ask,
+	BinaryExpression,
+	Call,
+	DictComposite,
+	IfElse,
+	ListComposite,
+	Literal,
+	Name,
+	Node,
+	NotExpression,
+	Print,
+	Result,
+	Skip,
+	Stop,
+	VariableDeclaration,
+	While,
+	to_tuples,
+)
 
 # REMINDER: (value) in Python is not a tuple; (value,) is a tuple
 
@@ -27,7 +50,8 @@ def p_statements(p: TYP):
 	"""statements : statements statement
 				  | statement"""
 	if len(p) == 3:
-		p[0] = p[1] + [p[2]]
+		p[1].append(p[2])
+		p[0] = p[1]
 	else:
 		p[0] = [p[1]]
 
@@ -39,7 +63,7 @@ def p_suite(p: TYP):
 
 def p_ifelse_statements(p: TYP):
 	"""ifelse_statements : IF expression suite optional_else"""
-	p[0] = ("ifelse_statements", p[2], p[3], (p[4] if len(p) == 5 else None))
+	p[0] = IfElse(p[2], p[3], p[4], p.lineno(1))
 
 def p_optional_else(p: TYP):
 	"""optional_else : ELSE suite
@@ -53,21 +77,23 @@ def p_optional_else(p: TYP):
 
 def p_while_statements(p: TYP):
 	"""while_statements : WHILE expression suite"""
-	p[0] = ("while_statements", p[2], p[3])
+	p[0] = While(p[2], p[3], p.lineno(1))
 
 ## Action
 
 def p_optional_inline_params(p: TYP):
 	"""optional_inline_params : IDENTIFIER optional_inline_params
 							  | empty"""
+	# Right-recursive: appended last to first, reversed by the rule using it
 	if len(p) == 3:
-		p[0] = [p[1]] + p[2]
+		p[2].append(p[1])
+		p[0] = p[2]
 	else:
 		p[0] = []
 
 def p_action_statements(p: TYP):
 	"""action_statements : ACTION IDENTIFIER optional_inline_params suite"""
-	p[0] = ("action_statements", p[2], p[3], p[4])
+	p[0] = ActionDefinition(p[2], p[3][::-1], p[4], p.lineno(1))
 
 ## Composite
 
@@ -75,7 +101,7 @@ def p_list_composite(p: TYP):
 	"""list_composite : LIST suite
 					  | LIST NEWLINE"""
 
-	p[0] = ("list_composite", p[2] if not p[2] == '\n' else [])
+	p[0] = ListComposite(p[2] if not p[2] == '\n' else [], p.lineno(1))
 
 def p_dict_entry(p: TYP):
     """dict_entry : dict_key IS expression NEWLINE"""
@@ -93,7 +119,8 @@ def p_dict_entries(p: TYP):
     """dict_entries : dict_entries dict_entry
                     | dict_entry"""
     if len(p) == 3:
-        p[0] = p[1] + [p[2]]
+        p[1].append(p[2])
+        p[0] = p[1]
     else:
         p[0] = [p[1]]
 
@@ -101,9 +128,9 @@ def p_dict_composite(p: TYP):
     """dict_composite : DICT dict_suite
                       | DICT NEWLINE"""
     if len(p) == 3 and isinstance(p[2], list):
-        p[0] = ("dict_composite", dict(p[2]))
+        p[0] = DictComposite(dict(p[2]), p.lineno(1))
     else:
-        p[0] = ("dict_composite", {})
+        p[0] = DictComposite({}, p.lineno(1))
 
 # Statement
 
@@ -124,31 +151,33 @@ def p_statement(p: TYP):
 def p_optional_inline_args(p: TYP):
 	"""optional_inline_args : expression optional_inline_args
 							| empty"""
+	# Right-recursive: appended last to first, reversed by the rule using it
 	if len(p) == 3:
-		p[0] = [p[1]] + p[2]
+		p[2].append(p[1])
+		p[0] = p[2]
 	else:
 		p[0] = []
 
 def p_variable_declaration_statement(p: TYP):
 	"""variable_declaration_statement : IDENTIFIER IS expression NEWLINE
 									  | IDENTIFIER IS list_composite"""
-	p[0] = ("variable_declaration_statement", p[1], p[3])
+	p[0] = VariableDeclaration(p[1], p[3], p.lineno(1))
 
 def p_stop_statement(p: TYP):
 	"""stop_statement : STOP"""
-	p[0] = ("stop_statement", )
+	p[0] = Stop(p.lineno(1))
 
 def p_skip_statement(p: TYP):
 	"""skip_statement : SKIP"""
-	p[0] = ("skip_statement", )
+	p[0] = Skip(p.lineno(1))
 
 def p_result_statement(p: TYP):
 	"""result_statement : RESULT optional_inline_args"""
-	p[0] = ("result_statement", p[2])
+	p[0] = Result(p[2][::-1], p.lineno(1))
 
 def p_print_statement(p: TYP):
 	"""print_statement : PRINT optional_inline_args"""
-	p[0] = ("print_statement", p[2])
+	p[0] = Print(p[2][::-1], p.lineno(1))
 
 # Expressions
 
@@ -160,19 +189,22 @@ def p_expression(p: TYP):
 				  | call
 				  | ask
 				  | IDENTIFIER"""
-	p[0] = p[1]
+	if p.slice[1].type == "IDENTIFIER":
+		p[0] = Name(p[1], p.lineno(1))
+	else:
+		p[0] = p[1]
 
 ## Call
 
 def p_call(p: TYP):
 	"""call : CALL IDENTIFIER optional_inline_args"""
-	p[0] = ("call", p[2], p[3])
+	p[0] = Call(p[2], p[3][::-1], p.lineno(1))
 
 ## Ask
 
 def p_ask(p: TYP):
 	"""ask : ASK optional_inline_args"""
-	p[0] = ("ask", p[2])
+	p[0] = Ask(p[2][::-1], p.lineno(1))
 
 ## Arithmetic, Comparison & Logical - Expressions
 
@@ -183,7 +215,7 @@ def p_arithmetic_expression(p: TYP):
 							 | expression DIVIDE expression
 							 | expression MODULO expression
 							 | expression EXPONENT expression"""
-	p[0] = ("arithmetic_expression", p[2], p[1], p[3])
+	p[0] = BinaryExpression(p[2], p[1], p[3], p.lineno(2))
 
 def p_comparison_expression(p: TYP):
 	"""comparison_expression : expression LT expression
@@ -196,16 +228,16 @@ def p_comparison_expression(p: TYP):
 		p[2] = "=="
 	elif p[2] == "isnt":
 		p[2] = "!="
-	p[0] = ("comparison_expression", p[2], p[1], p[3])
+	p[0] = BinaryExpression(p[2], p[1], p[3], p.lineno(2))
 
 def p_logical_expression(p: TYP):
 	"""logical_expression : expression AND expression
 						  | expression OR expression
 						  | NOT expression"""
 	if len(p) == 4:
-		p[0] = ("logical_expression", p[2], p[1], p[3])
+		p[0] = BinaryExpression(p[2], p[1], p[3], p.lineno(2))
 	else:
-		p[0] = ("logical_expression", p[1], p[2])
+		p[0] = NotExpression(p[2], p.lineno(1))
 
 ## Literals
 
@@ -219,23 +251,23 @@ def p_literals(p: TYP):
 
 def p_integer_literal(p: TYP):
 	"""integer_literal : INTEGER"""
-	p[0] = ("integer_literal", p[1])
+	p[0] = Literal(p[1], p.lineno(1))
 
 def p_float_literal(p: TYP):
 	"""float_literal : FLOAT"""
-	p[0] = ("float_literal", p[1])
+	p[0] = Literal(p[1], p.lineno(1))
 
 def p_string_literal(p: TYP):
 	"""string_literal : STRING"""
-	p[0] = ("string_literal", p[1])
+	p[0] = Literal(p[1], p.lineno(1))
 
 def p_boolean_literal(p: TYP):
 	"""boolean_literal : BOOLEAN"""
-	p[0] = ("boolean_literal", p[1])
+	p[0] = Literal(p[1], p.lineno(1))
 
 def p_null_literal(p: TYP):
 	"""null_literal : NULL"""
-	p[0] = ("null_literal",)
+	p[0] = Literal(None, p.lineno(1))
 
 # Empty
 
@@ -245,7 +277,12 @@ def p_empty(p: TYP):
 
 # Error
 
+# Syntax errors reported by this process, a parse is clean if it does not change
+syntax_error_count = 0
+
 def p_error(p: LexTokenT):
+	global syntax_error_count
+	syntax_error_count += 1
 	if p:
 		print(f"! ParserError: {p}")
 	else:
@@ -255,5 +292,63 @@ def p_error(p: LexTokenT):
 
 # ===== END OF PARSER =====
 
-def build_parser():
-	return yacc.yacc()
\ No newline at end of file
+def format_ast(node: Any, indent: str = "  ") -> str:
+	"""Formats a parsed program, in its tuple form, with one nested node per line.
+
+	Unlike pprint, nodes are visited with an explicit stack: chains of thousands
+	of operators stay printable."""
+	if isinstance(node, Node) or (isinstance(node, list) and all(isinstance(child, Node) for child in node)):
+		node = to_tuples(node)
+	lines: List[str] = []
+	# (is closing text, item, depth, suffix)
+	pending: List[Tuple[bool, Any, int, str]] = [(False, node, 0, "")]
+	while pending:
+		is_text, item, depth, suffix = pending.pop()
+		indentation = indent * depth
+		if is_text:
+			lines.append(indentation + item + suffix)
+		elif isinstance(item, (tuple, list)) and any(isinstance(child, (tuple, list)) for child in item):
+			opening, closing = ("(", ")") if isinstance(item, tuple) else ("[", "]")
+			# Leading atoms, like the node type, stay on the opening line
+			atoms = 0
+			while atoms < len(item) and not isinstance(item[atoms], (tuple, list)):
+				atoms += 1
+			lines.append(indentation + opening + "".join(f"{child!r}, " for child in item[:atoms]).rstrip())
+			pending.append((True, closing, depth, suffix))
+			for child in reversed(item[atoms:]):
+				pending.append((False, child, depth + 1, ","))
+		else:
+			lines.append(indentation + repr(item) + suffix)
+	return "\n".join(lines)
+
+def print_ast(program: Any):
+	print(format_ast(program))
+
+# Tables generated by write_tables(), shipped with the package
+TABLES_MODULE = "moon.parsetab"
+
+@cache
+def build_parser() -> yacc.LRParser:
+	"""Returns the parser of this process, built on first use from the packaged tables.
+
+	Nothing is written: if the tables do not match the grammar anymore, they are
+	regenerated in memory, and test_parser_tables fails until they are rebuilt."""
+	return yacc.yacc(
+		debug=False,
+		write_tables=False,
+		tabmodule=TABLES_MODULE,
+		errorlog=yacc.NullLogger(),
+	)
+
+def write_tables():
+	"""Regenerates the packaged tables after a change to the grammar.
+
+	Usage: python -c "from moon.parser import write_tables; write_tables()"
+	"""
+	yacc.yacc(
+		debug=False,
+		write_tables=True,
+		tabmodule=TABLES_MODULE.rsplit(".", 1)[-1],
+		outputdir=path.dirname(path.abspath(__file__)),
+		errorlog=yacc.NullLogger(),
+	)
\ No newline at end of file
@@ -0,0 +1,104 @@
+
+# parsetab.py
+# This file is automatically generated. Do not edit.
+# pylint: disable=W,C,R
+_tabversion = '3.10'
+
+_lr_method = 'LALR'
+
+_lr_signature = 'leftORleftANDrightNOTnonassocLTLEGTGEleftPLUSMINUSleftMULTIPLYDIVIDEMODULOrightEXPONENTACTION AND AS ASK BOOLEAN CALL COMMENT DEDENT DICT DIVIDE ELSE EXPONENT FAIL FLOAT FROM GE GT HAS IDENTIFIER IF INDENT INTEGER IS ISNT LE LIST LT MINUS MODULO MULTILINE_COMMENT MULTIPLY NEWLINE NOT NULL OR PLUS PRINT RAISE RESULT SKIP STOP STRING TABULATION TEST THING USE WHILEprogram : statementsstatements : statements statement\n\t\t\t\t  | statementsuite : NEWLINE INDENT statements DEDENTifelse_statements : IF expression suite optional_elseoptional_else : ELSE suite\n\t\t\t\t\t | emptywhile_statements : WHILE expression suiteoptional_inline_params : IDENTIFIER optional_inline_params\n\t\t\t\t\t\t\t  | emptyaction_statements : ACTION IDENTIFIER optional_inline_params suitelist_composite : LIST suite\n\t\t\t\t\t  | LIST NEWLINEdict_entry : dict_key IS expression NEWLINEdict_key : IDENTIFIERdict_suite : NEWLINE INDENT dict_entries DEDENTdict_entries : dict_entries dict_entry\n                    | dict_entrydict_composite : DICT dict_suite\n                      | DICT NEWLINEstatement : expression NEWLINE\n\t\t\t\t | stop_statement NEWLINE\n\t\t\t\t | skip_statement NEWLINE\n\t\t\t\t | result_statement NEWLINE\n\t\t\t\t | print_statement NEWLINE\n\t\t\t\t | variable_declaration_statement\n\t\t\t\t | ifelse_statements\n\t\t\t\t | while_statements\n\t\t\t\t | action_statements\n\t\t\t\t | list_composite\n\t\t\t\t | dict_compositeoptional_inline_args : expression optional_inline_args\n\t\t\t\t\t\t\t| emptyvariable_declaration_statement : IDENTIFIER IS expression NEWLINE\n\t\t\t\t\t\t\t\t\t  | IDENTIFIER IS list_compositestop_statement : STOPskip_statement : SKIPresult_statement : RESULT optional_inline_argsprint_statement : PRINT optional_inline_argsexpression : literals\n\t\t\t\t  | arithmetic_expression\n\t\t\t\t  | comparison_expression\n\t\t\t\t  | logical_expression\n\t\t\t\t  | call\n\t\t\t\t  | ask\n\t\t\t\t  | IDENTIFIERcall : CALL IDENTIFIER optional_inline_argsask : ASK optional_inline_argsarithmetic_expression : expression PLUS expression\n\t\t\t\t\t\t\t | expression MINUS expression\n\t\t\t\t\t\t\t | expression MULTIPLY expression\n\t\t\t\t\t\t\t | expression DIVIDE expression\n\t\t\t\t\t\t\t | expression MODULO expression\n\t\t\t\t\t\t\t | expression EXPONENT expressioncomparison_expression : expression LT expression\n\t\t\t\t\t\t\t | expression LE expression\n\t\t\t\t\t\t\t | expression IS expression\n\t\t\t\t\t\t\t | expression ISNT expression\n\t\t\t\t\t\t\t | expression GT expression\n\t\t\t\t\t\t\t | expression GE expressionlogical_expression : expression AND expression\n\t\t\t\t\t\t  | expression OR expression\n\t\t\t\t\t\t  | NOT expressionliterals : integer_literal\n\t\t\t\t| float_literal\n\t\t\t\t| string_literal\n\t\t\t\t| boolean_literal\n\t\t\t\t| null_literalinteger_literal : INTEGERfloat_literal : FLOATstring_literal : STRINGboolean_literal : BOOLEANnull_literal : NULLempty :'
+    
+_lr_action_items = {'IDENTIFIER':([0,2,3,9,10,11,12,13,14,15,16,17,18,19,20,24,25,26,27,28,31,32,33,34,35,36,37,38,39,40,41,42,43,44,45,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,66,67,68,72,73,74,75,76,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,95,96,97,99,100,103,104,105,106,107,109,111,112,113,114,117,118,119,120,121,123,],[21,21,-3,-26,-27,-28,-29,-30,-31,-40,-41,-42,-43,-44,-45,68,68,68,68,72,-64,-65,-66,-67,-68,68,78,68,-69,-70,-71,-72,-73,-2,-21,68,68,68,68,68,68,68,68,68,68,68,68,68,68,-22,-23,-24,-25,68,68,-33,-46,100,-12,-13,-19,-20,-63,68,-48,-49,-50,-51,-52,-53,-54,-55,-56,-57,-58,-59,-60,-61,-62,-35,-32,-74,-8,100,21,116,-47,-34,-5,-7,-11,21,116,-18,-6,-4,-16,-17,68,-14,]),'STOP':([0,2,3,9,10,11,12,13,14,44,45,60,61,62,63,73,74,75,76,95,97,99,103,106,107,109,111,112,117,118,119,],[22,22,-3,-26,-27,-28,-29,-30,-31,-2,-21,-22,-23,-24,-25,-12,-13,-19,-20,-35,-74,-8,22,-34,-5,-7,-11,22,-6,-4,-16,]),'SKIP':([0,2,3,9,10,11,12,13,14,44,45,60,61,62,63,73,74,75,76,95,97,99,103,106,107,109,111,112,117,118,119,],[23,23,-3,-26,-27,-28,-29,-30,-31,-2,-21,-22,-23,-24,-25,-12,-13,-19,-20,-35,-74,-8,23,-34,-5,-7,-11,23,-6,-4,-16,]),'RESULT':([0,2,3,9,10,11,12,13,14,44,45,60,61,62,63,73,74,75,76,95,97,99,103,106,107,109,111,112,117,118,119,],[24,24,-3,-26,-27,-28,-29,-30,-31,-2,-21,-22,-23,-24,-25,-12,-13,-19,-20,-35,-74,-8,24,-34,-5,-7,-11,24,-6,-4,-16,]),'PRINT':([0,2,3,9,10,11,12,13,14,44,45,60,61,62,63,73,74,75,76,95,97,99,103,106,107,109,111,112,117,118,119,],[25,25,-3,-26,-27,-28,-29,-30,-31,-2,-21,-22,-23,-24,-25,-12,-13,-19,-20,-35,-74,-8,25,-34,-5,-7,-11,25,-6,-4,-16,]),'IF':([0,2,3,9,10,11,12,13,14,44,45,60,61,62,63,73,74,75,76,95,97,99,103,106,107,109,111,112,117,118,119,],[26,26,-3,-26,-27,-28,-29,-30,-31,-2,-21,-22,-23,-24,-25,-12,-13,-19,-20,-35,-74,-8,26,-34,-5,-7,-11,26,-6,-4,-16,]),'WHILE':([0,2,3,9,10,11,12,13,14,44,45,60,61,62,63,73,74,75,76,95,97,99,103,106,107,109,111,112,117,118,119,],[27,27,-3,-26,-27,-28,-29,-30,-31,-2,-21,-22,-23,-24,-25,-12,-13,-19,-20,-35,-74,-8,27,-34,-5,-7,-11,27,-6,-4,-16,]),'ACTION':([0,2,3,9,10,11,12,13,14,44,45,60,61,62,63,73,74,75,76,95,97,99,103,106,107,109,111,112,117,118,119,],[28,28,-3,-26,-27,-28,-29,-30,-31,-2,-21,-22,-23,-24,-25,-12,-13,-19,-20,-35,-74,-8,28,-34,-5,-7,-11,28,-6,-4,-16,]),'LIST':([0,2,3,9,10,11,12,13,14,44,45,60,61,62,63,64,73,74,75,76,95,97,99,103,106,107,109,111,112,117,118,119,],[29,29,-3,-26,-27,-28,-29,-30,-31,-2,-21,-22,-23,-24,-25,29,-12,-13,-19,-20,-35,-74,-8,29,-34,-5,-7,-11,29,-6,-4,-16,]),'DICT':([0,2,3,9,10,11,12,13,14,44,45,60,61,62,63,73,74,75,76,95,97,99,103,106,107,109,111,112,117,118,119,],[30,30,-3,-26,-27,-28,-29,-30,-31,-2,-21,-22,-23,-24,-25,-12,-13,-19,-20,-35,-74,-8,30,-34,-5,-7,-11,30,-6,-4,-16,]),'NOT':([0,2,3,9,10,11,12,13,14,15,16,17,18,19,20,24,25,26,27,31,32,33,34,35,36,38,39,40,41,42,43,44,45,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,66,67,68,73,74,75,76,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,95,96,97,99,103,105,106,107,109,111,112,117,118,119,121,],[36,36,-3,-26,-27,-28,-29,-30,-31,-40,-41,-42,-43,-44,-45,36,36,36,36,-64,-65,-66,-67,-68,36,36,-69,-70,-71,-72,-73,-2,-21,36,36,36,36,36,36,36,36,36,36,36,36,36,36,-22,-23,-24,-25,36,36,-33,-46,-12,-13,-19,-20,-63,36,-48,-49,-50,-51,-52,-53,-54,-55,-56,-57,-58,-59,-60,-61,-62,-35,-32,-74,-8,36,-47,-34,-5,-7,-11,36,-6,-4,-16,36,]),'CALL':([0,2,3,9,10,11,12,13,14,15,16,17,18,19,20,24,25,26,27,31,32,33,34,35,36,38,39,40,41,42,43,44,45,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,66,67,68,73,74,75,76,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,95,96,97,99,103,105,106,107,109,111,112,117,118,119,121,],[37,37,-3,-26,-27,-28,-29,-30,-31,-40,-41,-42,-43,-44,-45,37,37,37,37,-64,-65,-66,-67,-68,37,37,-69,-70,-71,-72,-73,-2,-21,37,37,37,37,37,37,37,37,37,37,37,37,37,37,-22,-23,-24,-25,37,37,-33,-46,-12,-13,-19,-20,-63,37,-48,-49,-50,-51,-52,-53,-54,-55,-56,-57,-58,-59,-60,-61,-62,-35,-32,-74,-8,37,-47,-34,-5,-7,-11,37,-6,-4,-16,37,]),'ASK':([0,2,3,9,10,11,12,13,14,15,16,17,18,19,20,24,25,26,27,31,32,33,34,35,36,38,39,40,41,42,43,44,45,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,66,67,68,73,74,75,76,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,95,96,97,99,103,105,106,107,109,111,112,117,118,119,121,],[38,38,-3,-26,-27,-28,-29,-30,-31,-40,-41,-42,-43,-44,-45,38,38,38,38,-64,-65,-66,-67,-68,38,38,-69,-70,-71,-72,-73,-2,-21,38,38,38,38,38,38,38,38,38,38,38,38,38,38,-22,-23,-24,-25,38,38,-33,-46,-12,-13,-19,-20,-63,38,-48,-49,-50,-51,-52,-53,-54,-55,-56,-57,-58,-59,-60,-61,-62,-35,-32,-74,-8,38,-47,-34,-5,-7,-11,38,-6,-4,-16,38,]),'INTEGER':([0,2,3,9,10,11,12,13,14,15,16,17,18,19,20,24,25,26,27,31,32,33,34,35,36,38,39,40,41,42,43,44,45,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,66,67,68,73,74,75,76,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,95,96,97,99,103,105,106,107,109,111,112,117,118,119,121,],[39,39,-3,-26,-27,-28,-29,-30,-31,-40,-41,-42,-43,-44,-45,39,39,39,39,-64,-65,-66,-67,-68,39,39,-69,-70,-71,-72,-73,-2,-21,39,39,39,39,39,39,39,39,39,39,39,39,39,39,-22,-23,-24,-25,39,39,-33,-46,-12,-13,-19,-20,-63,39,-48,-49,-50,-51,-52,-53,-54,-55,-56,-57,-58,-59,-60,-61,-62,-35,-32,-74,-8,39,-47,-34,-5,-7,-11,39,-6,-4,-16,39,]),'FLOAT':([0,2,3,9,10,11,12,13,14,15,16,17,18,19,20,24,25,26,27,31,32,33,34,35,36,38,39,40,41,42,43,44,45,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,66,67,68,73,74,75,76,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,95,96,97,99,103,105,106,107,109,111,112,117,118,119,121,],[40,40,-3,-26,-27,-28,-29,-30,-31,-40,-41,-42,-43,-44,-45,40,40,40,40,-64,-65,-66,-67,-68,40,40,-69,-70,-71,-72,-73,-2,-21,40,40,40,40,40,40,40,40,40,40,40,40,40,40,-22,-23,-24,-25,40,40,-33,-46,-12,-13,-19,-20,-63,40,-48,-49,-50,-51,-52,-53,-54,-55,-56,-57,-58,-59,-60,-61,-62,-35,-32,-74,-8,40,-47,-34,-5,-7,-11,40,-6,-4,-16,40,]),'STRING':([0,2,3,9,10,11,12,13,14,15,16,17,18,19,20,24,25,26,27,31,32,33,34,35,36,38,39,40,41,42,43,44,45,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,66,67,68,73,74,75,76,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,95,96,97,99,103,105,106,107,109,111,112,117,118,119,121,],[41,41,-3,-26,-27,-28,-29,-30,-31,-40,-41,-42,-43,-44,-45,41,41,41,41,-64,-65,-66,-67,-68,41,41,-69,-70,-71,-72,-73,-2,-21,41,41,41,41,41,41,41,41,41,41,41,41,41,41,-22,-23,-24,-25,41,41,-33,-46,-12,-13,-19,-20,-63,41,-48,-49,-50,-51,-52,-53,-54,-55,-56,-57,-58,-59,-60,-61,-62,-35,-32,-74,-8,41,-47,-34,-5,-7,-11,41,-6,-4,-16,41,]),'BOOLEAN':([0,2,3,9,10,11,12,13,14,15,16,17,18,19,20,24,25,26,27,31,32,33,34,35,36,38,39,40,41,42,43,44,45,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,66,67,68,73,74,75,76,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,95,96,97,99,103,105,106,107,109,111,112,117,118,119,121,],[42,42,-3,-26,-27,-28,-29,-30,-31,-40,-41,-42,-43,-44,-45,42,42,42,42,-64,-65,-66,-67,-68,42,42,-69,-70,-71,-72,-73,-2,-21,42,42,42,42,42,42,42,42,42,42,42,42,42,42,-22,-23,-24,-25,42,42,-33,-46,-12,-13,-19,-20,-63,42,-48,-49,-50,-51,-52,-53,-54,-55,-56,-57,-58,-59,-60,-61,-62,-35,-32,-74,-8,42,-47,-34,-5,-7,-11,42,-6,-4,-16,42,]),'NULL':([0,2,3,9,10,11,12,13,14,15,16,17,18,19,20,24,25,26,27,31,32,33,34,35,36,38,39,40,41,42,43,44,45,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,66,67,68,73,74,75,76,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,95,96,97,99,103,105,106,107,109,111,112,117,118,119,121,],[43,43,-3,-26,-27,-28,-29,-30,-31,-40,-41,-42,-43,-44,-45,43,43,43,43,-64,-65,-66,-67,-68,43,43,-69,-70,-71,-72,-73,-2,-21,43,43,43,43,43,43,43,43,43,43,43,43,43,43,-22,-23,-24,-25,43,43,-33,-46,-12,-13,-19,-20,-63,43,-48,-49,-50,-51,-52,-53,-54,-55,-56,-57,-58,-59,-60,-61,-62,-35,-32,-74,-8,43,-47,-34,-5,-7,-11,43,-6,-4,-16,43,]),'$end':([1,2,3,9,10,11,12,13,14,44,45,60,61,62,63,73,74,75,76,95,97,99,106,107,109,111,117,118,119,],[0,-1,-3,-26,-27,-28,-29,-30,-31,-2,-21,-22,-23,-24,-25,-12,-13,-19,-20,-35,-74,-8,-34,-5,-7,-11,-6,-4,-16,]),'DEDENT':([3,9,10,11,12,13,14,44,45,60,61,62,63,73,74,75,76,95,97,99,106,107,109,111,112,113,114,117,118,119,120,123,],[-3,-26,-27,-28,-29,-30,-31,-2,-21,-22,-23,-24,-25,-12,-13,-19,-20,-35,-74,-8,-34,-5,-7,-11,118,119,-18,-6,-4,-16,-17,-14,]),'NEWLINE':([4,5,6,7,8,15,16,17,18,19,20,21,22,23,24,25,29,30,31,32,33,34,35,38,39,40,41,42,43,65,66,67,68,69,70,71,72,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,94,96,100,101,102,105,108,110,122,],[45,60,61,62,63,-40,-41,-42,-43,-44,-45,-46,-36,-37,-74,-74,74,76,-64,-65,-66,-67,-68,-74,-69,-70,-71,-72,-73,-38,-74,-33,-46,-39,98,98,-74,-63,-74,-48,-49,-50,-51,-52,-53,-54,-55,-56,-57,-58,-59,-60,-61,-62,106,-32,-74,98,-10,-47,98,-9,123,]),'PLUS':([4,15,16,17,18,19,20,21,31,32,33,34,35,38,39,40,41,42,43,66,67,68,70,71,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,94,96,105,122,],[46,-40,-41,-42,-43,-44,-45,-46,-64,-65,-66,-67,-68,-74,-69,-70,-71,-72,-73,46,-33,-46,46,46,46,-74,-48,-49,-50,-51,-52,-53,-54,46,46,46,46,46,46,46,46,46,-32,-47,46,]),'MINUS':([4,15,16,17,18,19,20,21,31,32,33,34,35,38,39,40,41,42,43,66,67,68,70,71,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,94,96,105,122,],[47,-40,-41,-42,-43,-44,-45,-46,-64,-65,-66,-67,-68,-74,-69,-70,-71,-72,-73,47,-33,-46,47,47,47,-74,-48,-49,-50,-51,-52,-53,-54,47,47,47,47,47,47,47,47,47,-32,-47,47,]),'MULTIPLY':([4,15,16,17,18,19,20,21,31,32,33,34,35,38,39,40,41,42,43,66,67,68,70,71,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,94,96,105,122,],[48,-40,-41,-42,-43,-44,-45,-46,-64,-65,-66,-67,-68,-74,-69,-70,-71,-72,-73,48,-33,-46,48,48,48,-74,-48,48,48,-51,-52,-53,-54,48,48,48,48,48,48,48,48,48,-32,-47,48,]),'DIVIDE':([4,15,16,17,18,19,20,21,31,32,33,34,35,38,39,40,41,42,43,66,67,68,70,71,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,94,96,105,122,],[49,-40,-41,-42,-43,-44,-45,-46,-64,-65,-66,-67,-68,-74,-69,-70,-71,-72,-73,49,-33,-46,49,49,49,-74,-48,49,49,-51,-52,-53,-54,49,49,49,49,49,49,49,49,49,-32,-47,49,]),'MODULO':([4,15,16,17,18,19,20,21,31,32,33,34,35,38,39,40,41,42,43,66,67,68,70,71,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,94,96,105,122,],[50,-40,-41,-42,-43,-44,-45,-46,-64,-65,-66,-67,-68,-74,-69,-70,-71,-72,-73,50,-33,-46,50,50,50,-74,-48,50,50,-51,-52,-53,-54,50,50,50,50,50,50,50,50,50,-32,-47,50,]),'EXPONENT':([4,15,16,17,18,19,20,21,31,32,33,34,35,38,39,40,41,42,43,66,67,68,70,71,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,94,96,105,122,],[51,-40,-41,-42,-43,-44,-45,-46,-64,-65,-66,-67,-68,-74,-69,-70,-71,-72,-73,51,-33,-46,51,51,51,-74,-48,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,-32,-47,51,]),'LT':([4,15,16,17,18,19,20,21,31,32,33,34,35,38,39,40,41,42,43,66,67,68,70,71,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,94,96,105,122,],[52,-40,-41,-42,-43,-44,-45,-46,-64,-65,-66,-67,-68,-74,-69,-70,-71,-72,-73,52,-33,-46,52,52,52,-74,-48,-49,-50,-51,-52,-53,-54,None,None,52,52,None,None,52,52,52,-32,-47,52,]),'LE':([4,15,16,17,18,19,20,21,31,32,33,34,35,38,39,40,41,42,43,66,67,68,70,71,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,94,96,105,122,],[53,-40,-41,-42,-43,-44,-45,-46,-64,-65,-66,-67,-68,-74,-69,-70,-71,-72,-73,53,-33,-46,53,53,53,-74,-48,-49,-50,-51,-52,-53,-54,None,None,53,53,None,None,53,53,53,-32,-47,53,]),'IS':([4,15,16,17,18,19,20,21,31,32,33,34,35,38,39,40,41,42,43,66,67,68,70,71,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,94,96,105,115,116,122,],[54,-40,-41,-42,-43,-44,-45,64,-64,-65,-66,-67,-68,-74,-69,-70,-71,-72,-73,54,-33,-46,54,54,-63,-74,-48,-49,-50,-51,-52,-53,-54,-55,-56,54,54,-59,-60,-61,-62,54,-32,-47,121,-15,54,]),'ISNT':([4,15,16,17,18,19,20,21,31,32,33,34,35,38,39,40,41,42,43,66,67,68,70,71,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,94,96,105,122,],[55,-40,-41,-42,-43,-44,-45,-46,-64,-65,-66,-67,-68,-74,-69,-70,-71,-72,-73,55,-33,-46,55,55,-63,-74,-48,-49,-50,-51,-52,-53,-54,-55,-56,55,55,-59,-60,-61,-62,55,-32,-47,55,]),'GT':([4,15,16,17,18,19,20,21,31,32,33,34,35,38,39,40,41,42,43,66,67,68,70,71,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,94,96,105,122,],[56,-40,-41,-42,-43,-44,-45,-46,-64,-65,-66,-67,-68,-74,-69,-70,-71,-72,-73,56,-33,-46,56,56,56,-74,-48,-49,-50,-51,-52,-53,-54,None,None,56,56,None,None,56,56,56,-32,-47,56,]),'GE':([4,15,16,17,18,19,20,21,31,32,33,34,35,38,39,40,41,42,43,66,67,68,70,71,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,94,96,105,122,],[57,-40,-41,-42,-43,-44,-45,-46,-64,-65,-66,-67,-68,-74,-69,-70,-71,-72,-73,57,-33,-46,57,57,57,-74,-48,-49,-50,-51,-52,-53,-54,None,None,57,57,None,None,57,57,57,-32,-47,57,]),'AND':([4,15,16,17,18,19,20,21,31,32,33,34,35,38,39,40,41,42,43,66,67,68,70,71,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,94,96,105,122,],[58,-40,-41,-42,-43,-44,-45,-46,-64,-65,-66,-67,-68,-74,-69,-70,-71,-72,-73,58,-33,-46,58,58,-63,-74,-48,-49,-50,-51,-52,-53,-54,-55,-56,58,58,-59,-60,-61,58,58,-32,-47,58,]),'OR':([4,15,16,17,18,19,20,21,31,32,33,34,35,38,39,40,41,42,43,66,67,68,70,71,77,78,79,80,81,82,83,84,85,86,87,88,89,90,91,92,93,94,96,105,122,],[59,-40,-41,-42,-43,-44,-45,-46,-64,-65,-66,-67,-68,-74,-69,-70,-71,-72,-73,59,-33,-46,59,59,-63,-74,-48,-49,-50,-51,-52,-53,-54,-55,-56,59,59,-59,-60,-61,-62,59,-32,-47,59,]),'INDENT':([74,76,98,],[103,104,103,]),'ELSE':([97,118,],[108,-4,]),}
+
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'program':([0,],[1,]),'statements':([0,103,],[2,112,]),'statement':([0,2,103,112,],[3,44,3,44,]),'expression':([0,2,24,25,26,27,36,38,46,47,48,49,50,51,52,53,54,55,56,57,58,59,64,66,78,103,112,121,],[4,4,66,66,70,71,77,66,80,81,82,83,84,85,86,87,88,89,90,91,92,93,94,66,66,4,4,122,]),'stop_statement':([0,2,103,112,],[5,5,5,5,]),'skip_statement':([0,2,103,112,],[6,6,6,6,]),'result_statement':([0,2,103,112,],[7,7,7,7,]),'print_statement':([0,2,103,112,],[8,8,8,8,]),'variable_declaration_statement':([0,2,103,112,],[9,9,9,9,]),'ifelse_statements':([0,2,103,112,],[10,10,10,10,]),'while_statements':([0,2,103,112,],[11,11,11,11,]),'action_statements':([0,2,103,112,],[12,12,12,12,]),'list_composite':([0,2,64,103,112,],[13,13,95,13,13,]),'dict_composite':([0,2,103,112,],[14,14,14,14,]),'literals':([0,2,24,25,26,27,36,38,46,47,48,49,50,51,52,53,54,55,56,57,58,59,64,66,78,103,112,121,],[15,15,15,15,15,15,15,15,15,15,15,15,15,15,15,15,15,15,15,15,15,15,15,15,15,15,15,15,]),'arithmetic_expression':([0,2,24,25,26,27,36,38,46,47,48,49,50,51,52,53,54,55,56,57,58,59,64,66,78,103,112,121,],[16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,]),'comparison_expression':([0,2,24,25,26,27,36,38,46,47,48,49,50,51,52,53,54,55,56,57,58,59,64,66,78,103,112,121,],[17,17,17,17,17,17,17,17,17,17,17,17,17,17,17,17,17,17,17,17,17,17,17,17,17,17,17,17,]),'logical_expression':([0,2,24,25,26,27,36,38,46,47,48,49,50,51,52,53,54,55,56,57,58,59,64,66,78,103,112,121,],[18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,]),'call':([0,2,24,25,26,27,36,38,46,47,48,49,50,51,52,53,54,55,56,57,58,59,64,66,78,103,112,121,],[19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,]),'ask':([0,2,24,25,26,27,36,38,46,47,48,49,50,51,52,53,54,55,56,57,58,59,64,66,78,103,112,121,],[20,20,20,20,20,20,20,20,20,20,20,20,20,20,20,20,20,20,20,20,20,20,20,20,20,20,20,20,]),'integer_literal':([0,2,24,25,26,27,36,38,46,47,48,49,50,51,52,53,54,55,56,57,58,59,64,66,78,103,112,121,],[31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,]),'float_literal':([0,2,24,25,26,27,36,38,46,47,48,49,50,51,52,53,54,55,56,57,58,59,64,66,78,103,112,121,],[32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,]),'string_literal':([0,2,24,25,26,27,36,38,46,47,48,49,50,51,52,53,54,55,56,57,58,59,64,66,78,103,112,121,],[33,33,33,33,33,33,33,33,33,33,33,33,33,33,33,33,33,33,33,33,33,33,33,33,33,33,33,33,]),'boolean_literal':([0,2,24,25,26,27,36,38,46,47,48,49,50,51,52,53,54,55,56,57,58,59,64,66,78,103,112,121,],[34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,]),'null_literal':([0,2,24,25,26,27,36,38,46,47,48,49,50,51,52,53,54,55,56,57,58,59,64,66,78,103,112,121,],[35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,]),'optional_inline_args':([24,25,38,66,78,],[65,69,79,96,105,]),'empty':([24,25,38,66,72,78,97,100,],[67,67,67,67,102,67,109,102,]),'suite':([29,70,71,101,108,],[73,97,99,111,117,]),'dict_suite':([30,],[75,]),'optional_inline_params':([72,100,],[101,110,]),'optional_else':([97,],[107,]),'dict_entries':([104,],[113,]),'dict_entry':([104,113,],[114,120,]),'dict_key':([104,113,],[115,115,]),}
+
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> program","S'",1,None,None,None),
+  ('program -> statements','program',1,'p_program','parser.py',24),
+  ('statements -> statements statement','statements',2,'p_statements','parser.py',30),
+  ('statements -> statement','statements',1,'p_statements','parser.py',31),
+  ('suite -> NEWLINE INDENT statements DEDENT','suite',4,'p_suite','parser.py',38),
+  ('ifelse_statements -> IF expression suite optional_else','ifelse_statements',4,'p_ifelse_statements','parser.py',44),
+  ('optional_else -> ELSE suite','optional_else',2,'p_optional_else','parser.py',48),
+  ('optional_else -> empty','optional_else',1,'p_optional_else','parser.py',49),
+  ('while_statements -> WHILE expression suite','while_statements',3,'p_while_statements','parser.py',58),
+  ('optional_inline_params -> IDENTIFIER optional_inline_params','optional_inline_params',2,'p_optional_inline_params','parser.py',64),
+  ('optional_inline_params -> empty','optional_inline_params',1,'p_optional_inline_params','parser.py',65),
+  ('action_statements -> ACTION IDENTIFIER optional_inline_params suite','action_statements',4,'p_action_statements','parser.py',72),
+  ('list_composite -> LIST suite','list_composite',2,'p_list_composite','parser.py',78),
+  ('list_composite -> LIST NEWLINE','list_composite',2,'p_list_composite','parser.py',79),
+  ('dict_entry -> dict_key IS expression NEWLINE','dict_entry',4,'p_dict_entry','parser.py',84),
+  ('dict_key -> IDENTIFIER','dict_key',1,'p_dict_key','parser.py',88),
+  ('dict_suite -> NEWLINE INDENT dict_entries DEDENT','dict_suite',4,'p_dict_suite','parser.py',92),
+  ('dict_entries -> dict_entries dict_entry','dict_entries',2,'p_dict_entries','parser.py',96),
+  ('dict_entries -> dict_entry','dict_entries',1,'p_dict_entries','parser.py',97),
+  ('dict_composite -> DICT dict_suite','dict_composite',2,'p_dict_composite','parser.py',104),
+  ('dict_composite -> DICT NEWLINE','dict_composite',2,'p_dict_composite','parser.py',105),
+  ('statement -> expression NEWLINE','statement',2,'p_statement','parser.py',114),
+  ('statement -> stop_statement NEWLINE','statement',2,'p_statement','parser.py',115),
+  ('statement -> skip_statement NEWLINE','statement',2,'p_statement','parser.py',116),
+  ('statement -> result_statement NEWLINE','statement',2,'p_statement','parser.py',117),
+  ('statement -> print_statement NEWLINE','statement',2,'p_statement','parser.py',118),
+  ('statement -> variable_declaration_statement','statement',1,'p_statement','parser.py',119),
+  ('statement -> ifelse_statements','statement',1,'p_statement','parser.py',120),
+  ('statement -> while_statements','statement',1,'p_statement','parser.py',121),
+  ('statement -> action_statements','statement',1,'p_statement','parser.py',122),
+  ('statement -> list_composite','statement',1,'p_statement','parser.py',123),
+  ('statement -> dict_composite','statement',1,'p_statement','parser.py',124),
+  ('optional_inline_args -> expression optional_inline_args','optional_inline_args',2,'p_optional_inline_args','parser.py',128),
+  ('optional_inline_args -> empty','optional_inline_args',1,'p_optional_inline_args','parser.py',129),
+  ('variable_declaration_statement -> IDENTIFIER IS expression NEWLINE','variable_declaration_statement',4,'p_variable_declaration_statement','parser.py',136),
+  ('variable_declaration_statement -> IDENTIFIER IS list_composite','variable_declaration_statement',3,'p_variable_declaration_statement','parser.py',137),
+  ('stop_statement -> STOP','stop_statement',1,'p_stop_statement','parser.py',141),
+  ('skip_statement -> SKIP','skip_statement',1,'p_skip_statement','parser.py',145),
+  ('result_statement -> RESULT optional_inline_args','result_statement',2,'p_result_statement','parser.py',149),
+  ('print_statement -> PRINT optional_inline_args','print_statement',2,'p_print_statement','parser.py',153),
+  ('expression -> literals','expression',1,'p_expression','parser.py',159),
+  ('expression -> arithmetic_expression','expression',1,'p_expression','parser.py',160),
+  ('expression -> comparison_expression','expression',1,'p_expression','parser.py',161),
+  ('expression -> logical_expression','expression',1,'p_expression','parser.py',162),
+  ('expression -> call','expression',1,'p_expression','parser.py',163),
+  ('expression -> ask','expression',1,'p_expression','parser.py',164),
+  ('expression -> IDENTIFIER','expression',1,'p_expression','parser.py',165),
+  ('call -> CALL IDENTIFIER optional_inline_args','call',3,'p_call','parser.py',171),
+  ('ask -> ASK optional_inline_args','ask',2,'p_ask','parser.py',177),
+  ('arithmetic_expression -> expression PLUS expression','arithmetic_expression',3,'p_arithmetic_expression','parser.py',183),
+  ('arithmetic_expression -> expression MINUS expression','arithmetic_expression',3,'p_arithmetic_expression','parser.py',184),
+  ('arithmetic_expression -> expression MULTIPLY expression','arithmetic_expression',3,'p_arithmetic_expression','parser.py',185),
+  ('arithmetic_expression -> expression DIVIDE expression','arithmetic_expression',3,'p_arithmetic_expression','parser.py',186),
+  ('arithmetic_expression -> expression MODULO expression','arithmetic_expression',3,'p_arithmetic_expression','parser.py',187),
+  ('arithmetic_expression -> expression EXPONENT expression','arithmetic_expression',3,'p_arithmetic_expression','parser.py',188),
+  ('comparison_expression -> expression LT expression','comparison_expression',3,'p_comparison_expression','parser.py',192),
+  ('comparison_expression -> expression LE expression','comparison_expression',3,'p_comparison_expression','parser.py',193),
+  ('comparison_expression -> expression IS expression','comparison_expression',3,'p_comparison_expression','parser.py',194),
+  ('comparison_expression -> expression ISNT expression','comparison_expression',3,'p_comparison_expression','parser.py',195),
+  ('comparison_expression -> expression GT expression','comparison_expression',3,'p_comparison_expression','parser.py',196),
+  ('comparison_expression -> expression GE expression','comparison_expression',3,'p_comparison_expression','parser.py',197),
+  ('logical_expression -> expression AND expression','logical_expression',3,'p_logical_expression','parser.py',205),
+  ('logical_expression -> expression OR expression','logical_expression',3,'p_logical_expression','parser.py',206),
+  ('logical_expression -> NOT expression','logical_expression',2,'p_logical_expression','parser.py',207),
+  ('literals -> integer_literal','literals',1,'p_literals','parser.py',216),
+  ('literals -> float_literal','literals',1,'p_literals','parser.py',217),
+  ('literals -> string_literal','literals',1,'p_literals','parser.py',218),
+  ('literals -> boolean_literal','literals',1,'p_literals','parser.py',219),
+  ('literals -> null_literal','literals',1,'p_literals','parser.py',220),
+  ('integer_literal -> INTEGER','integer_literal',1,'p_integer_literal','parser.py',224),
+  ('float_literal -> FLOAT','float_literal',1,'p_float_literal','parser.py',228),
+  ('string_literal -> STRING','string_literal',1,'p_string_literal','parser.py',232),
+  ('boolean_literal -> BOOLEAN','boolean_literal',1,'p_boolean_literal','parser.py',236),
+  ('null_literal -> NULL','null_literal',1,'p_null_literal','parser.py',240),
+  ('empty -> <empty>','empty',0,'p_empty','parser.py',246),
+]
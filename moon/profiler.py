@@ -0,0 +1,211 @@
+from json import dump
+from pathlib import Path
+from time import perf_counter, process_time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from . import nodes
+from .hooks import CALL, LOOP, RETURN, STATEMENT, Hooks
+from .interpreter import Action, TEnvironment, TProgram, TStatement
+
+# Profile of a script: the script's path with this suffix, unless given
+PROFILE_SUFFIX = ".profile.json"
+# Lines shown by Profiler.report(), the JSON profile has all of them
+REPORT_LINES = 20
+
+class LineStats:
+	"""Time spent on a source line, and how many times it ran."""
+	__slots__ = ("lineno", "hits", "iterations", "wall", "cpu")
+
+	def __init__(self, lineno: int) -> None:
+		self.lineno = lineno
+		self.hits = 0
+		self.iterations = 0 # Of the `while` loop starting on the line
+		self.wall = 0.0
+		self.cpu = 0.0
+
+	def as_dict(self) -> Dict[str, Any]:
+		return {"line": self.lineno, "hits": self.hits, "iterations": self.iterations, "wall": self.wall, "cpu": self.cpu}
+
+class ActionStats:
+	"""Calls of an action and the time spent in them, the actions they call included."""
+	__slots__ = ("name", "lineno", "calls", "wall", "cpu", "depth", "started")
+
+	def __init__(self, name: str, lineno: int) -> None:
+		self.name = name
+		self.lineno = lineno
+		self.calls = 0
+		self.wall = 0.0
+		self.cpu = 0.0
+		# Calls of the action running, recursive calls are only timed once
+		self.depth = 0
+		self.started = (0.0, 0.0)
+
+	def as_dict(self) -> Dict[str, Any]:
+		return {"name": self.name, "line": self.lineno, "calls": self.calls, "wall": self.wall, "cpu": self.cpu}
+
+def action_definitions(block: List[TStatement], names: Dict[int, Tuple[List[TStatement], str, int]]):
+	"""id(body) -> (body, name, line) of every action defined in a block, at any depth."""
+	for statement in block:
+		match statement.kind:
+			case nodes.ACTION_DEFINITION:
+				names[id(statement.block)] = (statement.block, statement.name, statement.lineno)
+				action_definitions(statement.block, names)
+			case nodes.IF_ELSE:
+				action_definitions(statement.if_block + (statement.else_block or []), names)
+			case nodes.WHILE:
+				action_definitions(statement.block, names)
+
+class Profiler:
+	"""Attributes the wall and CPU time of a run to the lines and the actions of a Moon program.
+
+	The time between two events of the run is charged to the line that was
+	running: a line's time is its own, without the actions it calls. An
+	action's time includes everything it calls. Lines also count how many
+	times they ran, `while` lines how many iterations their loop made.
+
+	Pass `hooks` to execute_program() between start() and stop():
+
+		profiler.start(program)
+		execute_program(program, hooks=profiler.hooks)
+		profiler.stop()"""
+
+	def __init__(self, source: Optional[str] = None) -> None:
+		self.source = source.splitlines() if source is not None else []
+		self.lines: Dict[int, LineStats] = dict()
+		# id(body) -> stats, of every action called
+		self.actions: Dict[int, ActionStats] = dict()
+		# id(body) -> (body, name, line), the body is kept alive so its id stays unique
+		self.names: Dict[int, Tuple[List[TStatement], str, int]] = dict()
+		self.wall = 0.0
+		self.cpu = 0.0
+		self.started = (0.0, 0.0)
+		# Line running since the last event, and when that event happened
+		self.line: Optional[LineStats] = None
+		self.last = (0.0, 0.0)
+		# Lines that called the actions running, and those actions
+		self.callers: List[Tuple[Optional[LineStats], ActionStats]] = []
+
+		self.hooks = Hooks()
+		self.hooks.add(STATEMENT, self.statement)
+		self.hooks.add(LOOP, self.loop)
+		self.hooks.add(CALL, self.call)
+		self.hooks.add(RETURN, self.returned)
+
+	def start(self, program: TProgram):
+		self.lines.clear()
+		self.actions.clear()
+		self.names.clear()
+		self.callers.clear()
+		action_definitions(program, self.names)
+		self.line = None
+		self.started = self.last = (perf_counter(), process_time())
+
+	def stop(self):
+		now = self.tick()
+		# Actions interrupted by an error
+		while self.callers:
+			self.line, stats = self.callers.pop()
+			self.leave(stats, now)
+		self.wall = now[0] - self.started[0]
+		self.cpu = now[1] - self.started[1]
+
+	# Events
+
+	def tick(self) -> Tuple[float, float]:
+		"""Charges the time since the last event to the line that was running."""
+		now = (perf_counter(), process_time())
+		line = self.line
+		if line is not None:
+			line.wall += now[0] - self.last[0]
+			line.cpu += now[1] - self.last[1]
+		self.last = now
+		return now
+
+	def enter_line(self, lineno: int) -> LineStats:
+		line = self.lines.get(lineno)
+		if line is None:
+			line = self.lines[lineno] = LineStats(lineno)
+		self.line = line
+		return line
+
+	def statement(self, statement: TStatement, environment: TEnvironment):
+		self.tick()
+		self.enter_line(statement.lineno).hits += 1
+
+	def loop(self, statement: nodes.While, environment: TEnvironment):
+		self.tick()
+		self.enter_line(statement.lineno).iterations += 1
+
+	def call(self, action: Action, param_values: List[Any]):
+		now = self.tick()
+		key = id(action.block)
+		stats = self.actions.get(key)
+		if stats is None:
+			stats = self.actions[key] = self.action_stats(action)
+		stats.calls += 1
+		if not stats.depth:
+			stats.started = now
+		stats.depth += 1
+		self.callers.append((self.line, stats))
+
+	def returned(self, action: Action, value: Any):
+		now = self.tick()
+		self.line, stats = self.callers.pop()
+		self.leave(stats, now)
+
+	def leave(self, stats: ActionStats, now: Tuple[float, float]):
+		stats.depth -= 1
+		if not stats.depth:
+			stats.wall += now[0] - stats.started[0]
+			stats.cpu += now[1] - stats.started[1]
+
+	def action_stats(self, action: Action) -> ActionStats:
+		block = action.block
+		if id(block) in self.names:
+			block, name, lineno = self.names[id(block)]
+			return ActionStats(name, lineno)
+		# Defined by code that is not part of the program, e.g. in the playground
+		return ActionStats("<action>", block[0].lineno if block else 0)
+
+	# Output
+
+	def as_dict(self) -> Dict[str, Any]:
+		return {
+			"wall": self.wall,
+			"cpu": self.cpu,
+			"lines": [self.lines[lineno].as_dict() for lineno in sorted(self.lines)],
+			"actions": [stats.as_dict() for stats in sorted(self.actions.values(), key=lambda stats: stats.lineno)],
+		}
+
+	def write(self, path: Union[str, Path]):
+		"""Writes the profile as JSON, times are in seconds."""
+		with open(path, "w", encoding="utf-8") as file:
+			dump(self.as_dict(), file, indent=1)
+
+	def report(self, limit: int = REPORT_LINES) -> str:
+		"""The slowest lines and actions first, times are in milliseconds."""
+		wall = self.wall or 1.0
+		lines = sorted(self.lines.values(), key=lambda line: line.wall, reverse=True)
+		report = [
+			f"Total: {self.wall * 1000:.3f} ms wall, {self.cpu * 1000:.3f} ms CPU",
+			"",
+			f"{'line':>6}{'hits':>10}{'iterations':>12}{'wall (ms)':>12}{'cpu (ms)':>12}{'wall %':>8}  source",
+		]
+		for line in lines[:limit]:
+			source = self.source[line.lineno - 1].strip() if 0 < line.lineno <= len(self.source) else ""
+			iterations = line.iterations if line.iterations else ""
+			report.append(
+				f"{line.lineno:>6}{line.hits:>10}{iterations:>12}{line.wall * 1000:>12.3f}{line.cpu * 1000:>12.3f}"
+				f"{line.wall / wall:>8.1%}  {source}".rstrip()
+			)
+		if len(lines) > limit:
+			report.append(f"{'':>6}... {len(lines) - limit} more lines")
+
+		if self.actions:
+			report += ["", f"{'action':<20}{'line':>6}{'calls':>10}{'wall (ms)':>12}{'cpu (ms)':>12}{'wall %':>8}"]
+			for stats in sorted(self.actions.values(), key=lambda stats: stats.wall, reverse=True):
+				report.append(
+					f"{stats.name:<20}{stats.lineno:>6}{stats.calls:>10}{stats.wall * 1000:>12.3f}{stats.cpu * 1000:>12.3f}"
+					f"{stats.wall / wall:>8.1%}"
+				)
+		return "\n".join(report)
@@ -0,0 +1,190 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from . import nodes
+from .interpreter import TProgram, TStatement, operator_chain
+
+class UndefinedNameError(KeyError):
+	"""Raised by check_program() when a program reads names that are never defined."""
+
+	def __init__(self, names: List[str]) -> None:
+		super().__init__(*names)
+		self.names = names
+
+	def __str__(self) -> str:
+		return f"Undefined name{'s' if len(self.names) > 1 else ''}: {', '.join(self.names)}"
+
+class Layout:
+	"""Fixed slots of an action frame.
+
+	A frame is a list: index 0 links to the enclosing frame (or to the environment
+	dictionary for actions defined at top level), parameters and locals follow."""
+	__slots__ = ("names", "slots", "parent", "fallbacks", "bound")
+
+	def __init__(self, params: List[str], parent: Optional["Layout"]) -> None:
+		self.names: List[str] = []
+		self.slots: Dict[str, int] = dict()
+		self.parent = parent
+		# Slots that may be unbound while an enclosing scope binds their name, which is then used
+		self.fallbacks: Set[str] = set()
+		# Names bound once the statements of the body resolved so far have run
+		self.bound: Set[str] = set(params)
+		for param in params:
+			self.add(param)
+
+	@property
+	def size(self) -> int:
+		return len(self.names) + 1
+
+	@property
+	def depth(self) -> int:
+		"""Number of frames between this one and the environment dictionary."""
+		depth, layout = 1, self.parent
+		while layout is not None:
+			depth, layout = depth + 1, layout.parent
+		return depth
+
+	def add(self, name: str):
+		if name not in self.slots:
+			self.names.append(name)
+			self.slots[name] = len(self.names)
+
+	def lookup(self, name: str) -> Optional[Tuple[int, int]]:
+		"""Returns (frames to walk up, slot) of a name, or None if it is not an action variable."""
+		depth, layout = 0, self
+		while layout is not None:
+			if name in layout.slots:
+				return depth, layout.slots[name]
+			depth, layout = depth + 1, layout.parent
+		return None
+
+	def chain(self, name: str) -> List[Tuple[int, Optional[int]]]:
+		"""Where a name may be bound, innermost first, as (frames to walk up, slot): its
+		value is in the first one bound. A slot of None is the environment dictionary."""
+		chain: List[Tuple[int, Optional[int]]] = []
+		depth, layout = 0, self
+		while layout is not None:
+			if name in layout.slots:
+				chain.append((depth, layout.slots[name]))
+				if name not in layout.fallbacks:
+					return chain
+			depth, layout = depth + 1, layout.parent
+		chain.append((depth, None))
+		return chain
+
+def assigned_names(block: List[TStatement]) -> List[str]:
+	"""Names assigned by a block, including nested if / while blocks but not nested action bodies."""
+	names = []
+	for statement in block:
+		match statement.kind:
+			case nodes.VARIABLE_DECLARATION | nodes.ACTION_DEFINITION:
+				names.append(statement.name)
+			case nodes.IF_ELSE:
+				names += assigned_names(statement.if_block) + assigned_names(statement.else_block or [])
+			case nodes.WHILE:
+				names += assigned_names(statement.block)
+	return names
+
+class Resolver:
+	"""Assigns a slot to every action variable and collects undefined names.
+
+	Resolution follows the Scope rules: an action assigning a name that an
+	enclosing scope binds updates that variable, otherwise it creates a local.
+	A name the enclosing scope has bound before the action is defined, e.g. a
+	top-level variable assigned before the action, is always updated there. Any
+	other name defined outside gets a slot that falls back to the enclosing
+	scopes while it is unbound, see Layout.chain()."""
+
+	def __init__(self, known: Iterable[str] = ()) -> None:
+		self.globals: Set[str] = set(known)
+		# Top-level names bound once the statements resolved so far have run
+		self.bound: Set[str] = set(known)
+		# id(block) -> layout of the action owning that block
+		self.layouts: Dict[int, Layout] = dict()
+		self.undefined: Dict[str, None] = dict()
+
+	def resolve_program(self, program: TProgram) -> Dict[int, Layout]:
+		self.globals.update(assigned_names(program))
+		self.body(program, None)
+		return self.layouts
+
+	def resolve_action(self, params: List[str], block: List[TStatement], parent: Optional[Layout]) -> Layout:
+		layout = Layout(params, parent)
+		for param in params:
+			if self.is_defined(param, parent):
+				layout.fallbacks.add(param)
+		for name in assigned_names(block):
+			if name in layout.slots or self.is_bound(name, parent):
+				continue
+			layout.add(name)
+			if self.is_defined(name, parent):
+				layout.fallbacks.add(name)
+		self.layouts[id(block)] = layout
+		self.body(block, layout)
+		return layout
+
+	def is_defined(self, name: str, layout: Optional[Layout]) -> bool:
+		return (layout is not None and layout.lookup(name) is not None) or name in self.globals
+
+	def is_bound(self, name: str, layout: Optional[Layout]) -> bool:
+		"""Whether the scope a name resolves to from layout has bound it by now."""
+		while layout is not None:
+			if name in layout.slots:
+				return name in layout.bound
+			layout = layout.parent
+		return name in self.bound
+
+	def body(self, block: List[TStatement], layout: Optional[Layout]):
+		"""Resolves a program or an action body, recording the names its statements bind in turn."""
+		bound = layout.bound if layout is not None else self.bound
+		for statement in block:
+			self.statement(statement, layout)
+			if statement.kind in (nodes.VARIABLE_DECLARATION, nodes.ACTION_DEFINITION):
+				bound.add(statement.name)
+
+	def block(self, block: List[TStatement], layout: Optional[Layout]):
+		for statement in block:
+			self.statement(statement, layout)
+
+	def statement(self, statement: TStatement, layout: Optional[Layout]):
+		match statement.kind:
+			case nodes.NAME:
+				self.name(statement.name, layout)
+			case nodes.VARIABLE_DECLARATION:
+				self.statement(statement.value, layout)
+			case nodes.BINARY_EXPRESSION:
+				first, links = operator_chain(statement)
+				self.block([first] + [right for _, right in links], layout)
+			case nodes.NOT_EXPRESSION:
+				self.statement(statement.operand, layout)
+			case nodes.IF_ELSE:
+				self.statement(statement.condition, layout)
+				self.block(statement.if_block, layout)
+				self.block(statement.else_block or [], layout)
+			case nodes.WHILE:
+				self.statement(statement.condition, layout)
+				self.block(statement.block, layout)
+			case nodes.ACTION_DEFINITION:
+				self.resolve_action(statement.params, statement.block, layout)
+			case nodes.CALL:
+				self.name(statement.name, layout)
+				self.block(statement.args, layout)
+			case nodes.RESULT | nodes.PRINT | nodes.ASK:
+				self.block(statement.expressions, layout)
+
+	def name(self, name: str, layout: Optional[Layout]):
+		if not self.is_defined(name, layout):
+			self.undefined[name] = None
+
+def resolve_program(program: TProgram, known: Iterable[str] = ()) -> Dict[int, Layout]:
+	"""Resolves every action of a program to its frame layout."""
+	return Resolver(known).resolve_program(program)
+
+def check_program(program: TProgram, known: Iterable[str] = ()):
+	"""Raises UndefinedNameError if a program reads names it never defines, without running it.
+
+	The backends only raise a KeyError once such a name is actually read, which
+	may never happen, e.g. on the right-hand side of a short-circuited `or`."""
+	resolver = Resolver(known)
+	resolver.resolve_program(program)
+	if resolver.undefined:
+		raise UndefinedNameError(list(resolver.undefined))
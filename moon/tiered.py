@@ -0,0 +1,254 @@
+from sys import _getframe, getrecursionlimit
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from . import nodes
+from .compiler import Compiler, TClosure
+from .interpreter import (
+	Action,
+	Scope,
+	TailCallType,
+	TInputCallback,
+	TOutputCallback,
+	TStatement,
+	run_action,
+)
+from .nodes import Node
+
+if TYPE_CHECKING:
+	from .hooks import Hooks
+	from .memo import ActionCache
+
+# Tiered execution types
+TTierLog = Callable[[str], None]
+
+# Loop iterations or action calls after which a loop or an action body is compiled
+TIER_THRESHOLD = 64
+# Python frames a call from compiled code nests besides those of the callee's nodes, see Tiers.frames()
+COMPILED_CALL_FRAMES = 2
+# More of them when the callee runs interpreted
+INTERPRETED_CALL_FRAMES = 8
+# Python frames under the recursion limit the calls of compiled code leave free: past it, calls run interpreted
+TIER_STACK_MARGIN = 200
+
+def call_nesting(block: List[TStatement]) -> int:
+	"""How many nodes and blocks nest the deepest call of a block, 0 if it makes none.
+
+	The body of an action it defines only runs once the action is called, its calls do not count."""
+	deepest = 0
+	pending: List[Tuple[Any, int]] = [(block, 1)]
+	while pending:
+		node, depth = pending.pop()
+		if isinstance(node, list):
+			pending += [(item, depth + 1) for item in node]
+		elif isinstance(node, dict):
+			pending += [(item, depth) for item in node.values()]
+		elif isinstance(node, Node) and node.kind != nodes.ACTION_DEFINITION:
+			if node.kind == nodes.CALL:
+				deepest = max(deepest, depth)
+			pending += [(getattr(node, field), depth + 1) for field in node.fields]
+	return deepest
+
+def stack_depth() -> int:
+	"""Python frames running, the caller's included."""
+	depth = 0
+	frame = _getframe(1)
+	while frame is not None:
+		depth += 1
+		frame = frame.f_back
+	return depth
+
+class TierEvent:
+	"""A region of a program leaving the interpreter, or given up on.
+
+	kind is "tier-up" when the region was compiled, its compiled form then runs
+	until the end of the run, or "deopt" when it could not be and stays interpreted."""
+	__slots__ = ("kind", "region", "lineno", "count", "seconds")
+
+	def __init__(self, kind: str, region: str, lineno: int, count: int, seconds: float) -> None:
+		self.kind = kind
+		self.region = region
+		self.lineno = lineno
+		self.count = count
+		self.seconds = seconds
+
+	def __str__(self) -> str:
+		unit = "iterations" if self.region == "loop" else "calls"
+		return f"[{self.kind}] {self.region} at line {self.lineno} after {self.count} {unit} ({self.seconds * 1000:.3f} ms)"
+
+	def __repr__(self) -> str:
+		return f"TierEvent({self.kind!r}, {self.region!r}, lineno={self.lineno}, count={self.count})"
+
+class TieredCompiler(Compiler):
+	"""Compiles hot regions to closures running on the interpreter's environments.
+
+	Action bodies are never slotted: a compiled region reads and writes the same
+	dictionaries and Scopes as the interpreted code around it. Calls from compiled
+	code go back through the interpreter, which runs the callee compiled if it is hot."""
+
+	def __init__(self, tiers: "Tiers", *args: Any, **kwargs: Any) -> None:
+		super().__init__(*args, **kwargs)
+		self.tiers = tiers
+		self.slotted = False
+
+	def call_action(self, action: Action, param_values: List[Any]) -> Any:
+		tiers = self.tiers
+		stack = tiers.stack
+		try:
+			compiled = tiers.compiled
+			entry = compiled.get(id(action.block))
+			while entry is not None and entry[1] is not None:
+				tiers.stack = stack + tiers.frames(action)
+				if tiers.stack >= tiers.max_stack:
+					break
+				# Already hot, the interpreter would only count the call
+				slotted, body, params_number, locals = entry[1]
+				result = body(Scope(action.scope, zip(action.params, param_values)))
+				if not isinstance(result, TailCallType):
+					return result
+				action, param_values = result.action, result.param_values
+				entry = compiled.get(id(action.block))
+
+			tiers.stack = stack + tiers.frames(action) + INTERPRETED_CALL_FRAMES
+			return self.interpret_call(action, param_values)
+		finally:
+			tiers.stack = stack
+
+	def interpret_call(self, action: Action, param_values: List[Any]) -> Any:
+		return run_action(
+			action,
+			param_values,
+			self.hooks,
+			self.output_callback,
+			self.input_callback,
+			self.action_cache,
+			self.tiers,
+		)
+
+	def hooked_call_action(self, action: Action, param_values: List[Any]) -> Any:
+		# With call or return hooks, every call goes through the interpreter: it reports them
+		tiers = self.tiers
+		stack = tiers.stack
+		tiers.stack = stack + tiers.frames(action) + INTERPRETED_CALL_FRAMES
+		try:
+			return self.interpret_call(action, param_values)
+		finally:
+			tiers.stack = stack
+
+class Tiers:
+	"""Counts the iterations of every `while` loop and the calls of every action run
+	by the interpreter, and compiles a loop or an action body once it crosses
+	`threshold`, with the closure compiler.
+
+	A loop crossing the threshold runs its remaining iterations compiled, from
+	the environment the interpreter left. Short scripts never pay for compiling,
+	long ones spend their time in compiled code. Every tier-up and deopt is kept
+	in `events`, and passed to `log` if given, e.g. print.
+
+	Calls from compiled code nest Python calls, those of the interpreter run on
+	its frame stack: once compiled calls nest `max_stack` Python frames, the
+	calls below them run interpreted, so a deep recursion is bounded by memory
+	only. A run may use the frames free under the recursion limit when it
+	starts, but for TIER_STACK_MARGIN.
+
+	execute_program(..., backend="tiered", tiers=tiers) uses it for a run."""
+
+	def __init__(self, threshold: int = TIER_THRESHOLD, log: Optional[TTierLog] = None) -> None:
+		if threshold < 1:
+			raise ValueError(f"threshold must be positive, got {threshold}")
+		self.threshold = threshold
+		self.log = log
+		# Python frames nested by the calls from compiled code running, and how many they may nest
+		self.stack = 0
+		self.max_stack = 0
+		self.events: List[TierEvent] = []
+		self.compiler: Optional[TieredCompiler] = None
+		# id(node) -> iterations of a loop, or calls of an action body
+		self.counts: Dict[int, int] = dict()
+		# id(node) -> (node, compiled closure, None if the node stays interpreted),
+		# the node is kept alive so its id stays unique
+		self.compiled: Dict[int, Tuple[Any, Any]] = dict()
+		# id(body) -> (body, Python frames a call of it nests), see frames()
+		self.nesting: Dict[int, Tuple[List[TStatement], int]] = dict()
+
+	def start(
+			self,
+			hooks: Optional["Hooks"] = None,
+			output_callback: TOutputCallback = print,
+			input_callback: TInputCallback = input,
+			action_cache: Optional["ActionCache"] = None,
+	):
+		"""Prepares a run: what was compiled for another run used its callbacks, it is dropped."""
+		self.compiler = TieredCompiler(self, hooks, output_callback, input_callback, None, action_cache)
+		self.counts.clear()
+		self.compiled.clear()
+		self.nesting.clear()
+		self.stack = 0
+		self.max_stack = getrecursionlimit() - stack_depth() - TIER_STACK_MARGIN
+
+	# Loops
+
+	def loop(self, statement: nodes.While) -> Optional[TClosure]:
+		"""The compiled form of a loop, None while it is interpreted."""
+		if self.stack >= self.max_stack:
+			return None
+		entry = self.compiled.get(id(statement))
+		return entry[1] if entry is not None else None
+
+	def iterated(self, statement: nodes.While) -> Optional[TClosure]:
+		"""Counts an iteration of an interpreted loop, returns its compiled form once it is hot."""
+		if self.stack >= self.max_stack:
+			return None
+		key = id(statement)
+		count = self.counts[key] = self.counts.get(key, 0) + 1
+		if count != self.threshold:
+			return None
+		return self.tier_up(statement, "loop", statement.lineno, lambda: self.compiler.compile_while_statements(statement)) # type: ignore
+
+	# Actions
+
+	def hot(self, action: Action) -> bool:
+		"""Counts a call of an action, returns whether its body runs compiled."""
+		if self.stack >= self.max_stack:
+			return False
+		block = action.block
+		key = id(block)
+		entry = self.compiled.get(key)
+		if entry is not None:
+			return entry[1] is not None
+
+		count = self.counts[key] = self.counts.get(key, 0) + 1
+		if count < self.threshold:
+			return False
+		lineno = block[0].lineno if block else 0
+		return self.tier_up(block, "action", lineno, lambda: self.compiler.compile_action(action.params, block)) is not None # type: ignore
+
+	def frames(self, action: Action) -> int:
+		"""Python frames a call of action from compiled code nests at most, with a compiled body."""
+		block = action.block
+		entry = self.nesting.get(id(block))
+		if entry is None:
+			entry = self.nesting[id(block)] = (block, COMPILED_CALL_FRAMES + call_nesting(block))
+		return entry[1]
+
+	def call(self, action: Action, param_values: List[Any]) -> Any:
+		"""Runs the compiled body of a hot action, a tail call is returned to the interpreter."""
+		slotted, body, params_number, locals = self.compiled[id(action.block)][1]
+		return body(Scope(action.scope, zip(action.params, param_values)))
+
+	def tier_up(self, node: Any, region: str, lineno: int, compile: Callable[[], Any]) -> Any:
+		start = perf_counter()
+		try:
+			compiled = compile()
+			kind = "tier-up"
+		except RecursionError:
+			# Too deeply nested to compile
+			compiled = None
+			kind = "deopt"
+		self.compiled[id(node)] = (node, compiled)
+
+		event = TierEvent(kind, region, lineno, self.counts[id(node)], perf_counter() - start)
+		self.events.append(event)
+		if self.log is not None:
+			self.log(str(event))
+		return compiled
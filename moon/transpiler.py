@@ -0,0 +1,384 @@
+import ast
+
+from functools import partial
+from itertools import count
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from . import nodes
+from .interpreter import (
+	MISSING,
+	Action,
+	Scope,
+	TEnvironment,
+	TInputCallback,
+	TOutputCallback,
+	TProgram,
+	TStatement,
+	TailCallType,
+	autocast,
+	custom_repr,
+	operator_chain,
+)
+
+if TYPE_CHECKING:
+	from .hooks import Hooks
+	from .memo import ActionCache
+
+# Transpiler types
+TPythonStatements = List[ast.stmt]
+TFunction = Callable[[TEnvironment], Any]
+
+ENVIRONMENT = "env"
+PROGRAM_NAME = "__moon_program__"
+# Longer operator chains are flattened, Python's compiler recurses on nested expressions
+MAX_CHAIN_NESTING = 32
+
+EXPRESSIONS = (
+	nodes.LITERAL, nodes.NAME, nodes.LIST_COMPOSITE, nodes.DICT_COMPOSITE,
+	nodes.BINARY_EXPRESSION, nodes.NOT_EXPRESSION, nodes.CALL, nodes.ASK,
+)
+
+ARITHMETIC_OPERATORS = {
+	"+": ast.Add,
+	"-": ast.Sub,
+	"*": ast.Mult,
+	"/": ast.Div,
+	"%": ast.Mod,
+	"**": ast.Pow,
+}
+
+COMPARISON_OPERATORS = {
+	"<": ast.Lt,
+	"<=": ast.LtE,
+	">": ast.Gt,
+	">=": ast.GtE,
+	"==": ast.Eq,
+	"!=": ast.NotEq,
+}
+
+def not_implemented(message: str):
+	raise NotImplementedError(message)
+
+def contains(statement: TStatement, kinds: Tuple[int, ...], enter_loops: bool) -> bool:
+	"""Whether a statement holds a node of one of kinds, without entering action bodies."""
+	if statement.kind in kinds:
+		return True
+	elif statement.kind == nodes.IF_ELSE:
+		return any(contains(s, kinds, enter_loops) for s in statement.if_block + (statement.else_block or []))
+	elif statement.kind == nodes.WHILE and enter_loops:
+		return any(contains(s, kinds, enter_loops) for s in statement.block)
+	return False
+
+class Transpiler:
+	"""Translates the AST into a Python module, compiled with compile() and run with exec().
+
+	Variables live in the same environment dictionary as with the other backends,
+	actions become Python functions and loops become Python loops. A `stop` or
+	`skip` outside of any loop, and a `result` outside of any action, leave the
+	enclosing top-level statement just like they do in execute_statement().
+
+	Hooks are called from the generated code, only the ones registered when the
+	transpiler is created."""
+
+	def __init__(
+			self,
+			hooks: Optional["Hooks"] = None,
+			output_callback: TOutputCallback = print,
+			input_callback: TInputCallback = input,
+			action_cache: Optional["ActionCache"] = None,
+	) -> None:
+		self.on_statement = hooks.on_statement if hooks is not None else None
+		self.on_loop = hooks.on_loop if hooks is not None else None
+		self.action_cache = action_cache
+		self.counter = count()
+		# Nodes passed to the hooks, the generated code reads them by index
+		self.nodes: List[TStatement] = []
+		# Actions defined by the generated code: (params, block)
+		self.actions: List[Tuple[List[str], List[TStatement]]] = []
+		# id(block) -> (block, function), the block is kept alive so its id stays unique
+		self.functions: Dict[int, Tuple[List[TStatement], TFunction]] = dict()
+		# Action bodies waiting for their function definition: (name, block)
+		self.pending: List[Tuple[str, List[TStatement]]] = []
+		self.defined: List[Tuple[str, List[TStatement]]] = []
+		self.namespace: Dict[str, Any] = {
+			"_autocast": autocast,
+			"_call": self.call,
+			"_define": self.define,
+			"_input": input_callback,
+			"_loop": self.on_loop,
+			"_nodes": self.nodes,
+			"_not_implemented": not_implemented,
+			"_output": output_callback,
+			"_repr": custom_repr,
+			"_statement": self.on_statement,
+			"_tail": self.tail,
+		}
+		if hooks is not None and hooks.calls():
+			self.run = partial(hooks.run_action, self.body) # type: ignore
+
+	# Runtime
+
+	def call(self, environment: TEnvironment, funcname: str, param_values: List[Any]) -> Any:
+		action: Action = environment[funcname]
+
+		key = self.action_cache.key(action, param_values) if self.action_cache is not None else None
+		if key is None:
+			return self.run(action, param_values)
+
+		result = self.action_cache.get(key) # type: ignore
+		if result is MISSING:
+			result = self.run(action, param_values)
+			self.action_cache.put(key, result) # type: ignore
+		return result
+
+	def run(self, action: Action, param_values: List[Any]) -> Any:
+		# Tail calls loop here instead of nesting Python frames
+		while True:
+			result = self.function(action.block)(Scope(action.scope, zip(action.params, param_values)))
+			if not isinstance(result, TailCallType):
+				return result
+			action, param_values = result.action, result.param_values
+
+	def body(self, action: Action, param_values: List[Any]) -> Any:
+		"""Runs the body of an action once, with hooks on calls, see Hooks.run_action()."""
+		return self.function(action.block)(Scope(action.scope, zip(action.params, param_values)))
+
+	def tail(self, environment: TEnvironment, funcname: str, param_values: List[Any]) -> TailCallType:
+		return TailCallType(environment[funcname], param_values)
+
+	def define(self, environment: TEnvironment, funcname: str, index: int):
+		params, block = self.actions[index]
+		environment[funcname] = Action(params, block, environment)
+
+	def function(self, block: List[TStatement]) -> TFunction:
+		"""Returns the Python function of an action body, compiling it on first use."""
+		key = id(block)
+		if key not in self.functions:
+			self.pending.append((f"__moon_action_{next(self.counter)}__", block))
+			self.load(self.module([]))
+		return self.functions[key][1]
+
+	def load(self, module: ast.Module):
+		exec(compile(module, "<moon>", "exec"), self.namespace)
+		for name, block in self.defined:
+			self.functions[id(block)] = (block, self.namespace[name])
+
+	# Module
+
+	def transpile(self, program: TProgram) -> ast.Module:
+		body: TPythonStatements = []
+		for statement in program:
+			if contains(statement, (nodes.RESULT,), enter_loops=True):
+				# Leaving a whole top-level statement, even from nested loops, requires a function
+				name = f"__moon_statement_{next(self.counter)}__"
+				body.append(self.function_definition(name, self.statement(statement, False, ast.Return)))
+				body.append(ast.Expr(self.call_function(name, ast.Name(ENVIRONMENT, ast.Load()))))
+			else:
+				body.extend(self.guarded_statement(statement))
+
+		return self.module([self.function_definition(PROGRAM_NAME, body or [ast.Pass()])])
+
+	def module(self, definitions: TPythonStatements) -> ast.Module:
+		"""Appends the definitions of every pending action body to a new module."""
+		self.defined = []
+		while self.pending:
+			# Action bodies may define more actions
+			name, block = self.pending.pop()
+			definitions.append(self.action_function(name, block))
+			self.defined.append((name, block))
+		return ast.fix_missing_locations(ast.Module(body=definitions, type_ignores=[]))
+
+	def action_function(self, name: str, block: List[TStatement]) -> ast.FunctionDef:
+		body: TPythonStatements = []
+		for statement in block:
+			body.extend(self.guarded_statement(statement, in_action=True))
+
+		last = block[-1]
+		if last.kind in EXPRESSIONS and isinstance(body[-1], ast.Expr):
+			# An action results in the value of its last statement
+			body[-1] = ast.Return(body[-1].value)
+		return self.function_definition(name, body)
+
+	def guarded_statement(self, statement: TStatement, in_action: bool = False) -> TPythonStatements:
+		"""A `stop` or `skip` outside of any loop leaves the statement through a one-pass loop."""
+		body = self.statement(statement, False, ast.Break, in_action)
+		if contains(statement, (nodes.STOP, nodes.SKIP), enter_loops=False):
+			return [ast.While(test=ast.Constant(True), body=body + [ast.Break()], orelse=[])]
+		return body
+
+	def function_definition(self, name: str, body: TPythonStatements) -> ast.FunctionDef:
+		return ast.FunctionDef(
+			name=name,
+			args=ast.arguments(
+				posonlyargs=[],
+				args=[ast.arg(arg=ENVIRONMENT)],
+				kwonlyargs=[],
+				kw_defaults=[],
+				defaults=[],
+			),
+			body=body,
+			decorator_list=[],
+		) # type: ignore
+
+	# Statements
+
+	def block(self, block: List[TStatement], in_loop: bool, leave: type, in_action: bool) -> TPythonStatements:
+		body: TPythonStatements = []
+		for statement in block:
+			body.extend(self.statement(statement, in_loop, leave, in_action))
+		return body
+
+	def statement(self, statement: TStatement, in_loop: bool, leave: type, in_action: bool = False) -> TPythonStatements:
+		body = self.traced_statement(statement, in_loop, leave, in_action)
+		if self.on_statement is not None:
+			return [self.hook("_statement", statement)] + body
+		return body
+
+	def hook(self, name: str, statement: TStatement) -> ast.Expr:
+		"""name(statement, env), the hook reads the node itself."""
+		self.nodes.append(statement)
+		node = ast.Subscript(value=ast.Name("_nodes", ast.Load()), slice=ast.Constant(len(self.nodes) - 1), ctx=ast.Load())
+		return ast.Expr(self.call_function(name, node, ast.Name(ENVIRONMENT, ast.Load())))
+
+	def traced_statement(self, statement: TStatement, in_loop: bool, leave: type, in_action: bool) -> TPythonStatements:
+		match statement.kind:
+			case nodes.VARIABLE_DECLARATION:
+				return [ast.Assign(targets=[self.variable(statement.name, ast.Store())], value=self.expression(statement.value))]
+
+			case nodes.IF_ELSE:
+				else_block = statement.else_block
+				return [ast.If(
+					test=self.expression(statement.condition),
+					body=self.block(statement.if_block, in_loop, leave, in_action),
+					orelse=self.block(else_block, in_loop, leave, in_action) if else_block else [],
+				)]
+
+			case nodes.WHILE:
+				body = self.block(statement.block, True, leave, in_action)
+				if self.on_loop is not None:
+					body.insert(0, self.hook("_loop", statement))
+				return [ast.While(
+					test=self.expression(statement.condition),
+					body=body,
+					orelse=[],
+				)]
+
+			case nodes.STOP:
+				return [ast.Break() if in_loop else leave()]
+
+			case nodes.SKIP:
+				return [ast.Continue() if in_loop else leave()]
+
+			case nodes.ACTION_DEFINITION:
+				block = statement.block
+				index = len(self.actions)
+				self.actions.append((statement.params, block))
+				self.pending.append((f"__moon_action_{next(self.counter)}__", block))
+				return [ast.Expr(self.call_function(
+					"_define",
+					ast.Name(ENVIRONMENT, ast.Load()),
+					ast.Constant(statement.name),
+					ast.Constant(index),
+				))]
+
+			case nodes.RESULT:
+				expressions = statement.expressions
+				value = self.expression(expressions[0])
+				if in_action and expressions[0].kind == nodes.CALL:
+					# The caller runs the call, see call()
+					value.func = ast.Name("_tail", ast.Load()) # type: ignore
+					return [ast.Return(value)]
+				elif in_action:
+					return [ast.Return(value)]
+				return [ast.Expr(value), ast.Return()]
+
+			case nodes.PRINT:
+				arguments = [self.call_function("_repr", self.expression(e)) for e in statement.expressions]
+				return [ast.Expr(self.call_function("_output", *arguments))]
+
+			case _:
+				return [ast.Expr(self.expression(statement))]
+
+	# Expressions
+
+	def expression(self, statement: TStatement) -> ast.expr:
+		match statement.kind:
+			case nodes.NAME:
+				return self.variable(statement.name, ast.Load())
+			case nodes.LITERAL:
+				return ast.Constant(statement.value)
+
+			case nodes.LIST_COMPOSITE:
+				return self.call_function("_not_implemented", ast.Constant("Lists are not yet implemented."))
+			case nodes.DICT_COMPOSITE:
+				return self.call_function("_not_implemented", ast.Constant("Dictionaries are not yet implemented."))
+
+			case nodes.NOT_EXPRESSION:
+				return ast.UnaryOp(op=ast.Not(), operand=self.expression(statement.operand))
+
+			case nodes.BINARY_EXPRESSION:
+				first, links = operator_chain(statement)
+				if len(links) > MAX_CHAIN_NESTING:
+					return self.flat_chain(self.expression(first), links)
+
+				value = self.expression(first)
+				for operator, right in links:
+					value = self.binary(operator, value, self.expression(right))
+				return value
+
+			case nodes.CALL:
+				return self.call_function(
+					"_call",
+					ast.Name(ENVIRONMENT, ast.Load()),
+					ast.Constant(statement.name),
+					ast.List(elts=[self.expression(arg) for arg in statement.args], ctx=ast.Load()),
+				)
+
+			case nodes.ASK:
+				arguments = ast.List(elts=[self.expression(e) for e in statement.expressions], ctx=ast.Load())
+				prompt = ast.Call(
+					func=ast.Attribute(value=ast.Constant(' '), attr="join", ctx=ast.Load()),
+					args=[arguments],
+					keywords=[],
+				)
+				return self.call_function("_autocast", self.call_function("_input", prompt))
+
+			case _:
+				return self.call_function("print", ast.Constant(f"Un-case {statement}"))
+
+	def binary(self, operator: str, left: ast.expr, right: ast.expr) -> ast.expr:
+		if operator == "and":
+			return ast.BoolOp(op=ast.And(), values=[left, right])
+		elif operator == "or":
+			return ast.BoolOp(op=ast.Or(), values=[left, right])
+		elif operator in COMPARISON_OPERATORS:
+			return ast.Compare(left=left, ops=[COMPARISON_OPERATORS[operator]()], comparators=[right])
+		return ast.BinOp(left=left, op=ARITHMETIC_OPERATORS[operator](), right=right)
+
+	def flat_chain(self, first: ast.expr, links: List[Tuple[str, TStatement]]) -> ast.Subscript:
+		"""(_c := a, _c := _c + b, _c := _c - c, ...)[-1], a chain of any length with a fixed depth."""
+		name = f"__moon_chain_{next(self.counter)}__"
+		steps: List[ast.expr] = [ast.NamedExpr(target=ast.Name(name, ast.Store()), value=first)]
+		for operator, right in links:
+			value = self.binary(operator, ast.Name(name, ast.Load()), self.expression(right))
+			steps.append(ast.NamedExpr(target=ast.Name(name, ast.Store()), value=value))
+		return ast.Subscript(value=ast.Tuple(elts=steps, ctx=ast.Load()), slice=ast.Constant(-1), ctx=ast.Load())
+
+	def variable(self, name: str, context: ast.expr_context) -> ast.Subscript:
+		return ast.Subscript(value=ast.Name(ENVIRONMENT, ast.Load()), slice=ast.Constant(name), ctx=context)
+
+	def call_function(self, name: str, *args: ast.expr) -> ast.Call:
+		return ast.Call(func=ast.Name(name, ast.Load()), args=list(args), keywords=[])
+
+def transpile_program(
+		program: TProgram,
+		/,
+		hooks: Optional["Hooks"] = None,
+		output_callback: TOutputCallback = print,
+		input_callback: TInputCallback = input,
+		action_cache: Optional["ActionCache"] = None,
+) -> TFunction:
+	"""Compiles a whole program into a Python function taking the global environment."""
+	transpiler = Transpiler(hooks, output_callback, input_callback, action_cache)
+	transpiler.load(transpiler.transpile(program))
+	return transpiler.namespace[PROGRAM_NAME]
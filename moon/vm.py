@@ -0,0 +1,599 @@
+from array import array
+from math import copysign
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
+
+from . import nodes
+from .interpreter import (
+	BINARY_OPERATORS,
+	MISSING,
+	Action,
+	Scope,
+	TEnvironment,
+	TInputCallback,
+	TOutputCallback,
+	TProgram,
+	TStatement,
+	autocast,
+	custom_repr,
+	operator_chain,
+)
+
+if TYPE_CHECKING:
+	from .hooks import Hooks
+	from .memo import ActionCache, TCacheKey
+
+# Inline cache of a call site: (defining scope, binding epoch, action, code of its
+# body), the scope is None when the action was found in the calling frame itself
+TCallCache = Tuple[Optional[TEnvironment], int, Action, "Code"]
+
+# Instruction format: every instruction is 4 integers, [opcode, a, b, c]
+INSTRUCTION_SIZE = 4
+
+# Opcodes, binary operators come first so that they index BINARY_FUNCTIONS
+BINARY_NAMES = list(BINARY_OPERATORS)
+OPERATORS_NUMBER = len(BINARY_NAMES)
+BINARY_END = OPERATORS_NUMBER    # a = b <operator> c             (registers)
+
+# Binary operators on a variable or a constant operand, one family of opcodes
+# per shape, in the same order: one instruction instead of two or three
+(
+	REGISTER_CONST,   # a = b <operator> constants[c]
+	REGISTER_NAME,    # a = b <operator> environment[names[c]]
+	NAME_CONST,       # a = environment[names[b]] <operator> constants[c]
+	NAME_NAME,        # a = environment[names[b]] <operator> environment[names[c]]
+) = range(BINARY_END, BINARY_END + 4 * OPERATORS_NUMBER, OPERATORS_NUMBER)
+FUSED_END = NAME_NAME + OPERATORS_NUMBER
+FUSED_SHAPES = ["REGISTER_CONST", "REGISTER_NAME", "NAME_CONST", "NAME_NAME"]
+
+# Indexed by any binary opcode
+BINARY_FUNCTIONS = list(BINARY_OPERATORS.values()) * 5
+
+(
+	LOAD_CONST,       # a = constants[b]
+	LOAD_NAME,        # a = environment[names[b]]
+	STORE_NAME,       # environment[names[a]] = b
+	MOVE,             # a = b
+	NOT,              # a = not b
+	JUMP,             # pc = a
+	JUMP_IF_FALSE,    # if not a: pc = b
+	JUMP_IF_TRUE,     # if a: pc = b
+	PRINT,            # output(a .. a+b)
+	ASK,              # a = ask(b .. b+c)
+	CALL,             # a = call names[b](a+1 .. a+1+c)
+	DEFINE,           # environment[names[a]] = Action(*constants[b], environment)
+	RETURN,           # return a
+	RETURN_NONE,      # return None
+	TRACE,            # on_statement(constants[a], environment)
+	NOT_IMPLEMENTED,  # raise NotImplementedError(constants[a])
+	UNCASE,           # print(constants[a])
+	TAILCALL,         # return call names[b](a+1 .. a+1+c), reusing the current frame
+	STORE_CALLED,     # environment[names[a]] = b, names[a] is called somewhere
+	TRACE_LOOP,       # on_loop(constants[a], environment)
+) = range(FUSED_END, FUSED_END + 20)
+
+OPCODE_NAMES = BINARY_NAMES + [
+	f"{operator} {shape}" for shape in FUSED_SHAPES for operator in BINARY_NAMES
+] + [
+	"LOAD_CONST", "LOAD_NAME", "STORE_NAME", "MOVE", "NOT",
+	"JUMP", "JUMP_IF_FALSE", "JUMP_IF_TRUE",
+	"PRINT", "ASK", "CALL", "DEFINE", "RETURN", "RETURN_NONE",
+	"TRACE", "NOT_IMPLEMENTED", "UNCASE", "TAILCALL", "STORE_CALLED",
+	"TRACE_LOOP",
+]
+
+EXPRESSIONS = (
+	nodes.LITERAL, nodes.NAME, nodes.LIST_COMPOSITE, nodes.DICT_COMPOSITE,
+	nodes.BINARY_EXPRESSION, nodes.NOT_EXPRESSION, nodes.CALL, nodes.ASK,
+)
+
+class Code:
+	"""A flat, compiled block of Moon: instructions, constant pool, names and register count.
+
+	caches holds the inline cache of every call instruction, indexed by the
+	position of the next instruction divided by INSTRUCTION_SIZE."""
+	__slots__ = ("instructions", "constants", "names", "registers", "caches")
+
+	def __init__(self) -> None:
+		self.instructions = array('i')
+		self.constants: List[Any] = []
+		self.names: List[str] = []
+		self.registers = 0
+		self.caches: List[Optional[TCallCache]] = []
+
+class BytecodeCompiler:
+	"""Compiles one block of the AST into a Code object.
+
+	Variables stay in the environment dictionary, registers hold temporaries.
+	A `stop` or `skip` outside of any loop, and a `result` outside of any
+	action, jump to the end of the enclosing top-level statement like they
+	do in execute_statement().
+
+	trace and trace_loops emit the instructions calling the statement and the
+	loop hooks, there are none otherwise."""
+
+	def __init__(self, in_action: bool, trace: bool = False, trace_loops: bool = False) -> None:
+		self.code = Code()
+		self.constant_indexes: Dict[Tuple[type, Any], int] = dict()
+		self.name_indexes: Dict[str, int] = dict()
+		self.in_action = in_action
+		self.trace = trace
+		self.trace_loops = trace_loops
+		self.top = 0
+		# (start, break patches) of every enclosing loop
+		self.loops: List[Tuple[int, List[int]]] = []
+		# Jumps leaving the current top-level (or action-level) statement
+		self.statement_exits: List[int] = []
+		# Action values defined by this block: (params, block)
+		self.actions: List[Tuple[List[str], List[TStatement]]] = []
+
+	# Emission
+
+	def emit(self, opcode: int, a: int = 0, b: int = 0, c: int = 0) -> int:
+		position = len(self.code.instructions)
+		self.code.instructions.extend((opcode, a, b, c))
+		return position
+
+	def position(self) -> int:
+		return len(self.code.instructions)
+
+	def patch(self, instruction: int, field: int, target: int):
+		self.code.instructions[instruction + field] = target
+
+	def constant(self, value: Any) -> int:
+		constants = self.code.constants
+		try:
+			# The type is part of the key so that 1, 1.0 and true stay distinct, the sign so that 0.0 and -0.0 do
+			key = (type(value), value, copysign(1.0, value) if type(value) is float else 0)
+			if key not in self.constant_indexes:
+				self.constant_indexes[key] = len(constants)
+				constants.append(value)
+			return self.constant_indexes[key]
+		except TypeError: # Unhashable, e.g. action values
+			constants.append(value)
+			return len(constants) - 1
+
+	def name(self, name: str) -> int:
+		if name not in self.name_indexes:
+			self.name_indexes[name] = len(self.code.names)
+			self.code.names.append(name)
+		return self.name_indexes[name]
+
+	def allocate(self, count: int = 1) -> int:
+		register = self.top
+		self.top += count
+		self.code.registers = max(self.code.registers, self.top)
+		return register
+
+	def free(self, count: int = 1):
+		self.top -= count
+
+	# Blocks
+
+	def compile(self, block: List[TStatement]) -> Code:
+		for index, statement in enumerate(block):
+			self.statement_exits = []
+			is_last = index == len(block) - 1
+			if self.in_action and is_last and statement.kind in EXPRESSIONS:
+				# An action results in the value of its last statement
+				self.traced(statement)
+				self.returned(statement)
+			else:
+				self.statement(statement)
+			for exit in self.statement_exits:
+				self.patch(exit, 1, self.position())
+		self.emit(RETURN_NONE)
+		self.code.caches = [None] * (len(self.code.instructions) // INSTRUCTION_SIZE + 1)
+		return self.code
+
+	def block(self, block: List[TStatement]):
+		for statement in block:
+			self.statement(statement)
+
+	def traced(self, statement: TStatement):
+		if self.trace:
+			self.emit(TRACE, self.constant(statement))
+
+	def returned(self, expression: TStatement):
+		"""Returns the value of an expression from an action, a call is a tail call."""
+		if expression.kind == nodes.CALL:
+			args = expression.args
+			base = self.arguments(args)
+			self.emit(TAILCALL, base, self.name(expression.name), len(args))
+			self.free(len(args) + 1)
+			return
+
+		register = self.allocate()
+		self.expression(expression, register)
+		self.emit(RETURN, register)
+		self.free()
+
+	def arguments(self, args: List[TStatement]) -> int:
+		"""Evaluates call arguments right after a register reserved for the result."""
+		base = self.allocate(len(args) + 1)
+		for index, arg in enumerate(args):
+			self.expression(arg, base + 1 + index)
+		return base
+
+	# Statements
+
+	def statement(self, statement: TStatement):
+		self.traced(statement)
+		match statement.kind:
+			case nodes.VARIABLE_DECLARATION:
+				register = self.allocate()
+				self.expression(statement.value, register)
+				self.emit(STORE_NAME, self.name(statement.name), register)
+				self.free()
+
+			case nodes.IF_ELSE:
+				else_block = statement.else_block
+				register = self.allocate()
+				self.expression(statement.condition, register)
+				self.free()
+				to_else = self.emit(JUMP_IF_FALSE, register)
+				self.block(statement.if_block)
+				if else_block:
+					to_end = self.emit(JUMP)
+					self.patch(to_else, 2, self.position())
+					self.block(else_block)
+					self.patch(to_end, 1, self.position())
+				else:
+					self.patch(to_else, 2, self.position())
+
+			case nodes.WHILE:
+				start = self.position()
+				register = self.allocate()
+				self.expression(statement.condition, register)
+				self.free()
+				exit = self.emit(JUMP_IF_FALSE, register)
+				if self.trace_loops:
+					self.emit(TRACE_LOOP, self.constant(statement))
+				breaks: List[int] = []
+				self.loops.append((start, breaks))
+				self.block(statement.block)
+				self.loops.pop()
+				self.emit(JUMP, start)
+				self.patch(exit, 2, self.position())
+				for instruction in breaks:
+					self.patch(instruction, 1, self.position())
+
+			case nodes.STOP:
+				if self.loops:
+					self.loops[-1][1].append(self.emit(JUMP))
+				else:
+					self.statement_exits.append(self.emit(JUMP))
+
+			case nodes.SKIP:
+				if self.loops:
+					self.emit(JUMP, self.loops[-1][0])
+				else:
+					self.statement_exits.append(self.emit(JUMP))
+
+			case nodes.ACTION_DEFINITION:
+				action = (statement.params, statement.block)
+				self.actions.append(action)
+				self.emit(DEFINE, self.name(statement.name), self.constant(action))
+
+			case nodes.RESULT:
+				expressions = statement.expressions
+				if self.in_action:
+					self.returned(expressions[0])
+				else:
+					register = self.allocate()
+					self.expression(expressions[0], register)
+					self.free()
+					self.statement_exits.append(self.emit(JUMP))
+
+			case nodes.PRINT:
+				expressions = statement.expressions
+				first = self.allocate(len(expressions))
+				for index, expression in enumerate(expressions):
+					self.expression(expression, first + index)
+				self.emit(PRINT, first, len(expressions))
+				self.free(len(expressions))
+
+			case _:
+				register = self.allocate()
+				self.expression(statement, register)
+				self.free()
+
+	# Expressions
+
+	def expression(self, statement: TStatement, target: int):
+		match statement.kind:
+			case nodes.NAME:
+				self.emit(LOAD_NAME, target, self.name(statement.name))
+			case nodes.LITERAL:
+				self.emit(LOAD_CONST, target, self.constant(statement.value))
+
+			case nodes.LIST_COMPOSITE:
+				self.emit(NOT_IMPLEMENTED, self.constant("Lists are not yet implemented."))
+			case nodes.DICT_COMPOSITE:
+				self.emit(NOT_IMPLEMENTED, self.constant("Dictionaries are not yet implemented."))
+
+			case nodes.NOT_EXPRESSION:
+				self.expression(statement.operand, target)
+				self.emit(NOT, target, target)
+
+			case nodes.BINARY_EXPRESSION:
+				# The left spine of a chain is compiled in a loop, not through recursion
+				first, links = operator_chain(statement)
+				operator, right = links[0]
+				if first.kind == nodes.NAME and operator not in ("and", "or") and right.kind in (nodes.NAME, nodes.LITERAL):
+					# `variable <operator> variable|literal` is a single instruction
+					shape = NAME_NAME if right.kind == nodes.NAME else NAME_CONST
+					self.emit(shape + BINARY_NAMES.index(operator), target, self.name(first.name), self.operand(right))
+					links = links[1:]
+				else:
+					self.expression(first, target)
+
+				for operator, right in links:
+					if operator in ("and", "or"):
+						jump = self.emit(JUMP_IF_FALSE if operator == "and" else JUMP_IF_TRUE, target)
+						self.expression(right, target)
+						self.patch(jump, 2, self.position())
+						continue
+					elif right.kind in (nodes.NAME, nodes.LITERAL):
+						shape = REGISTER_NAME if right.kind == nodes.NAME else REGISTER_CONST
+						self.emit(shape + BINARY_NAMES.index(operator), target, target, self.operand(right))
+						continue
+
+					register = self.allocate()
+					self.expression(right, register)
+					self.emit(BINARY_NAMES.index(operator), target, target, register)
+					self.free()
+
+			case nodes.CALL:
+				args = statement.args
+				base = self.arguments(args)
+				self.emit(CALL, base, self.name(statement.name), len(args))
+				self.emit(MOVE, target, base)
+				self.free(len(args) + 1)
+
+			case nodes.ASK:
+				expressions = statement.expressions
+				first = self.allocate(len(expressions))
+				for index, expression in enumerate(expressions):
+					self.expression(expression, first + index)
+				self.emit(ASK, target, first, len(expressions))
+				self.free(len(expressions))
+
+			case _:
+				self.emit(UNCASE, self.constant(f"Un-case {statement}"))
+
+	def operand(self, statement: TStatement) -> int:
+		"""Index of a variable name or of a constant, for the fused binary instructions."""
+		if statement.kind == nodes.NAME:
+			return self.name(statement.name)
+		return self.constant(statement.value)
+
+class VirtualMachine:
+	"""Runs Code objects, compiling action bodies to bytecode on first use.
+
+	Moon calls do not nest Python calls: the caller's frame is pushed on an
+	explicit stack and the callee runs in the same loop, so recursion is only
+	bounded by memory. A tail call replaces the current frame instead.
+
+	Call instructions cache the action they resolved and its code. An action
+	found outside of the calling frame is reused while the frame has the same
+	parent scope and no name called anywhere has been bound since: assigning
+	such a name goes through STORE_CALLED, which, like DEFINE, starts a new
+	binding epoch.
+
+	Statement and loop hooks have their own instructions, compiled in only when
+	they are registered."""
+
+	def __init__(
+			self,
+			hooks: Optional["Hooks"] = None,
+			output_callback: TOutputCallback = print,
+			input_callback: TInputCallback = input,
+			action_cache: Optional["ActionCache"] = None,
+	) -> None:
+		self.on_statement = hooks.on_statement if hooks is not None else None
+		self.on_loop = hooks.on_loop if hooks is not None else None
+		self.on_call = hooks.on_call if hooks is not None else None
+		self.on_return = hooks.on_return if hooks is not None else None
+		self.output_callback = output_callback
+		self.input_callback = input_callback
+		self.action_cache = action_cache
+		# id(block) -> (block, code), the block is kept alive so its id stays unique
+		self.codes: Dict[int, Tuple[List[TStatement], Code]] = dict()
+		# Every code compiled so far, and the names called in any of them
+		self.compiled: List[Code] = []
+		self.called: Set[str] = set()
+
+	def compile(self, block: List[TStatement], in_action: bool) -> Code:
+		compiler = BytecodeCompiler(in_action, self.on_statement is not None, self.on_loop is not None)
+		code = compiler.compile(block)
+		self.watch(code)
+		for params, action_block in compiler.actions:
+			self.action_code(action_block)
+		return code
+
+	def watch(self, code: Code):
+		"""Turns the stores of called names into STORE_CALLED, in code and in every code
+		compiled before it that stores a name code is the first to call."""
+		instructions = code.instructions
+		called = {code.names[instructions[pc + 2]] for pc in range(0, len(instructions), INSTRUCTION_SIZE) if instructions[pc] in (CALL, TAILCALL)}
+		self.compiled.append(code)
+		new_names = called - self.called
+		self.called |= called
+
+		for compiled in (self.compiled if new_names else [code]):
+			watched = self.called if compiled is code else new_names
+			compiled_instructions = compiled.instructions
+			for pc in range(0, len(compiled_instructions), INSTRUCTION_SIZE):
+				if compiled_instructions[pc] == STORE_NAME and compiled.names[compiled_instructions[pc + 1]] in watched:
+					compiled_instructions[pc] = STORE_CALLED
+
+	def action_code(self, block: List[TStatement]) -> Code:
+		key = id(block)
+		if key not in self.codes:
+			self.codes[key] = (block, self.compile(block, in_action=True))
+		return self.codes[key][1]
+
+	def run(self, code: Code, environment: TEnvironment) -> Any:
+		instructions = code.instructions
+		constants = code.constants
+		names = code.names
+		caches = code.caches
+		registers: List[Any] = [None] * code.registers
+		binary_functions = BINARY_FUNCTIONS
+		pc = 0
+		action_cache = self.action_cache
+		on_call, on_return = self.on_call, self.on_return
+		# Suspended callers: (code, registers, environment, pc, result register, cache key of the call, returning)
+		frames: List[Tuple[Code, List[Any], TEnvironment, int, int, Optional["TCacheKey"], Optional[List[Action]]]] = []
+		key = None
+		# With a return hook, the action run by the current frame and the ones it tail called
+		returning: Optional[List[Action]] = None
+		# Bumped whenever a called name may resolve to something else
+		epoch = 0
+
+		while True:
+			opcode = instructions[pc]
+			a = instructions[pc + 1]
+			b = instructions[pc + 2]
+			c = instructions[pc + 3]
+			pc += INSTRUCTION_SIZE
+
+			if opcode < BINARY_END:
+				registers[a] = binary_functions[opcode](registers[b], registers[c])
+			elif opcode < FUSED_END:
+				if opcode < REGISTER_NAME:
+					registers[a] = binary_functions[opcode](registers[b], constants[c])
+				elif opcode < NAME_CONST:
+					registers[a] = binary_functions[opcode](registers[b], environment[names[c]])
+				elif opcode < NAME_NAME:
+					registers[a] = binary_functions[opcode](environment[names[b]], constants[c])
+				else:
+					registers[a] = binary_functions[opcode](environment[names[b]], environment[names[c]])
+			elif opcode == LOAD_NAME:
+				registers[a] = environment[names[b]]
+			elif opcode == LOAD_CONST:
+				registers[a] = constants[b]
+			elif opcode == STORE_NAME:
+				environment[names[a]] = registers[b]
+			elif opcode == JUMP_IF_FALSE:
+				if not registers[a]:
+					pc = b
+			elif opcode == JUMP:
+				pc = a
+			elif opcode == JUMP_IF_TRUE:
+				if registers[a]:
+					pc = b
+			elif opcode == MOVE:
+				registers[a] = registers[b]
+			elif opcode == NOT:
+				registers[a] = not registers[b]
+			elif opcode == CALL or opcode == TAILCALL:
+				name = names[b]
+				entry = caches[pc // INSTRUCTION_SIZE]
+				if name in environment or type(environment) is not Scope:
+					# Found in the calling frame itself: only the code of the action is cached
+					action: Action = environment[name]
+					if entry is None or entry[2] is not action:
+						entry = caches[pc // INSTRUCTION_SIZE] = (None, epoch, action, self.action_code(action.block))
+				elif entry is None or entry[0] is not environment.parent or entry[1] != epoch: # type: ignore
+					action = environment[name]
+					entry = caches[pc // INSTRUCTION_SIZE] = (environment.parent, epoch, action, self.action_code(action.block)) # type: ignore
+				else:
+					action = entry[2]
+				param_values = registers[a + 1:a + 1 + c]
+				if opcode == CALL:
+					if action_cache is not None:
+						key = action_cache.key(action, param_values)
+						if key is not None:
+							value = action_cache.get(key)
+							if value is not MISSING:
+								registers[a] = value
+								continue
+					frames.append((code, registers, environment, pc, a, key, returning))
+					key = None
+					returning = [action] if on_return is not None else None
+				elif returning is not None:
+					returning.append(action)
+				if on_call is not None:
+					on_call(action, param_values)
+				sub_environment = Scope(action.scope, zip(action.params, param_values))
+				code = entry[3]
+				instructions = code.instructions
+				constants = code.constants
+				names = code.names
+				caches = code.caches
+				registers = [None] * code.registers
+				environment = sub_environment
+				pc = 0
+			elif opcode == PRINT:
+				self.output_callback(*[custom_repr(value) for value in registers[a:a + b]])
+			elif opcode == ASK:
+				prompt = ' '.join(registers[b:b + c])
+				registers[a] = autocast(self.input_callback(prompt))
+			elif opcode == RETURN or opcode == RETURN_NONE:
+				value = registers[a] if opcode == RETURN else None
+				if returning is not None:
+					for action in reversed(returning):
+						on_return(action, value) # type: ignore
+				if not frames:
+					return value
+				code, registers, environment, pc, target, key, returning = frames.pop()
+				instructions = code.instructions
+				constants = code.constants
+				names = code.names
+				caches = code.caches
+				registers[target] = value
+				if key is not None:
+					action_cache.put(key, value) # type: ignore
+					key = None
+			elif opcode == STORE_CALLED:
+				environment[names[a]] = registers[b]
+				epoch += 1
+			elif opcode == DEFINE:
+				environment[names[a]] = Action(*constants[b], environment)
+				epoch += 1
+			elif opcode == TRACE:
+				self.on_statement(constants[a], environment) # type: ignore
+			elif opcode == TRACE_LOOP:
+				self.on_loop(constants[a], environment) # type: ignore
+			elif opcode == NOT_IMPLEMENTED:
+				raise NotImplementedError(constants[a])
+			elif opcode == UNCASE:
+				print(constants[a])
+
+def compile_bytecode(program: TProgram, trace: bool = False) -> Code:
+	"""Compiles a whole program into a top-level Code object."""
+	return BytecodeCompiler(in_action=False, trace=trace).compile(program)
+
+def disassemble(code: Code) -> str:
+	lines = []
+	instructions = code.instructions
+	for pc in range(0, len(instructions), INSTRUCTION_SIZE):
+		opcode, a, b, c = instructions[pc:pc + INSTRUCTION_SIZE]
+		detail = ""
+		if opcode in (TRACE, TRACE_LOOP):
+			detail = f"line {code.constants[a].lineno}"
+		elif opcode in (LOAD_CONST, NOT_IMPLEMENTED, UNCASE):
+			detail = repr(code.constants[b if opcode == LOAD_CONST else a])
+		elif opcode in (LOAD_NAME, CALL, TAILCALL):
+			detail = code.names[b]
+		elif opcode in (STORE_NAME, STORE_CALLED, DEFINE):
+			detail = code.names[a]
+		elif BINARY_END <= opcode < FUSED_END:
+			left = code.names[b] if opcode >= NAME_CONST else ""
+			right = code.names[c] if opcode in range(REGISTER_NAME, NAME_CONST) or opcode >= NAME_NAME else repr(code.constants[c])
+			detail = f"{left} {right}".strip()
+		lines.append(f"{pc:>6} {OPCODE_NAMES[opcode]:<20}{a:>4}{b:>4}{c:>4}  {detail}".rstrip())
+	return "\n".join(lines)
+
+def execute_bytecode(
+		program: TProgram,
+		/,
+		hooks: Optional["Hooks"] = None,
+		output_callback: TOutputCallback = print,
+		input_callback: TInputCallback = input,
+		environment: Optional[TEnvironment] = None,
+		action_cache: Optional["ActionCache"] = None,
+) -> None:
+	vm = VirtualMachine(hooks, output_callback, input_callback, action_cache)
+	vm.run(vm.compile(program, in_action=False), environment if environment is not None else dict())
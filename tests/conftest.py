@@ -0,0 +1,7 @@
+import pytest
+
+from moon.interpreter import BACKENDS
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    return request.param
@@ -0,0 +1,9 @@
+from moon.lexer import build_lexer
+from moon.parser import build_parser
+
+def parse_code(code):
+    lexer = build_lexer()
+    lexer.input(code)
+
+    parser = build_parser()
+    return parser.parse(code+'\n', lexer=lexer)
@@ -0,0 +1,153 @@
+import io
+import os
+import pickle
+
+import pytest
+
+import moon.cache
+import moon.parser
+from moon.cache import CACHE_DIRECTORY, FORMAT_VERSION, MAGIC, ProgramCache, dump_program, load_program, source_hash
+from moon.cli import run_compiled, run_file
+
+from helpers import parse_code
+
+SOURCE = "action square n\n\tresult n * n\nx is 1 + 2\nprint call square x\n"
+
+class Removal:
+    """Removes a file when it is unpickled."""
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return os.remove, (str(self.path),)
+
+def malicious_program(path):
+    header = (FORMAT_VERSION, moon.cache.moon_version, moon.cache.grammar_version(), source_hash(SOURCE))
+    file = io.BytesIO(MAGIC + pickle.dumps(header) + pickle.dumps([Removal(path)]))
+    file.name = "malicious.mnc"
+    return file
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / "script.mn"
+    path.write_text(SOURCE, encoding="utf-8")
+    return path
+
+def test_round_trip():
+    program = parse_code(SOURCE)
+    file = io.BytesIO()
+
+    dump_program(program, file, source_hash(SOURCE))
+    file.seek(0)
+
+    assert load_program(file, source_hash(SOURCE)) == program
+
+def test_only_nodes_are_unpickled(script):
+    with pytest.raises(pickle.UnpicklingError):
+        load_program(malicious_program(script))
+    with pytest.raises(SystemExit):
+        run_compiled(malicious_program(script), False)
+
+    assert script.exists()
+
+def test_malicious_entries_miss(script):
+    cache = ProgramCache()
+    cache.path(script).parent.mkdir()
+    cache.path(script).write_bytes(malicious_program(script).getvalue())
+
+    assert cache.load(script, source_hash(SOURCE)) is None
+    assert script.exists()
+
+def truncated_program(cut):
+    file = io.BytesIO()
+    dump_program(parse_code(SOURCE), file, source_hash(SOURCE))
+    header = (FORMAT_VERSION, moon.cache.moon_version, moon.cache.grammar_version(), source_hash(SOURCE))
+    # Cut inside the program, after the header
+    file = io.BytesIO(file.getvalue()[:len(MAGIC) + len(pickle.dumps(header, pickle.HIGHEST_PROTOCOL)) + cut])
+    file.name = "truncated.mnc"
+    return file
+
+@pytest.mark.parametrize("cut", [0, 1, 40])
+def test_truncated_programs(cut, script):
+    with pytest.raises(pickle.UnpicklingError):
+        load_program(truncated_program(cut))
+    with pytest.raises(SystemExit, match="not a compiled Moon program"):
+        run_compiled(truncated_program(cut), False)
+
+    cache = ProgramCache()
+    cache.path(script).parent.mkdir()
+    cache.path(script).write_bytes(truncated_program(cut).getvalue())
+    with open(script, encoding="utf-8") as file:
+        program = cache.parse(file)
+
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert program == parse_code(SOURCE)
+
+@pytest.mark.parametrize("attribute, value", [
+    ("moon_version", "0.0.0-other"),
+    ("grammar_version", lambda: "other"),
+    ("FORMAT_VERSION", -1),
+])
+def test_other_versions_miss(attribute, value, monkeypatch):
+    file = io.BytesIO()
+    dump_program(parse_code(SOURCE), file, source_hash(SOURCE))
+    monkeypatch.setattr(moon.cache, attribute, value)
+    file.seek(0)
+
+    assert load_program(file, source_hash(SOURCE)) is None
+
+def test_hit_and_invalidation(script):
+    cache = ProgramCache()
+    with open(script, encoding="utf-8") as file:
+        first = cache.parse(file)
+    with open(script, encoding="utf-8") as file:
+        second = cache.parse(file)
+
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second == first
+    assert cache.path(script) == script.parent / CACHE_DIRECTORY / "script.mn.mnc"
+
+    script.write_text(SOURCE + "print x\n", encoding="utf-8")
+    with open(script, encoding="utf-8") as file:
+        third = cache.parse(file)
+
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert len(third) == len(first) + 1
+
+def test_errors_are_not_stored(tmp_path, capsys):
+    path = tmp_path / "broken.mn"
+    path.write_text("x is\nprint 1\n", encoding="utf-8")
+    cache = ProgramCache()
+
+    with open(path, encoding="utf-8") as file:
+        cache.parse(file)
+
+    assert "Error" in capsys.readouterr().out
+    assert not cache.path(path).exists()
+
+def test_unwritable_directory(script, monkeypatch):
+    def fail(*args, **kwargs):
+        raise PermissionError("read-only")
+    monkeypatch.setattr(os, "replace", fail)
+
+    with open(script, encoding="utf-8") as file:
+        program = ProgramCache().parse(file)
+
+    assert program == parse_code(SOURCE)
+    assert list((script.parent / CACHE_DIRECTORY).iterdir()) == []
+
+def test_run_file_skips_the_front_end(script, monkeypatch, capsys):
+    with open(script, encoding="utf-8") as file:
+        run_file(file, False)
+    monkeypatch.setattr(moon.parser, "build_parser", None)
+    with open(script, encoding="utf-8") as file:
+        run_file(file, False)
+
+    assert capsys.readouterr().out == "9\n9\n"
+
+def test_run_file_without_cache(script, capsys):
+    with open(script, encoding="utf-8") as file:
+        run_file(file, False, cache=False)
+
+    assert capsys.readouterr().out == "9\n"
+    assert not (script.parent / CACHE_DIRECTORY).exists()
@@ -0,0 +1,144 @@
+import json
+import pickle
+import subprocess
+import sys
+
+import pytest
+
+from typer.testing import CliRunner
+
+from moon.cache import CACHE_DIRECTORY, MAGIC
+from moon.cli import cli
+
+SOURCE = "action square n\n\tresult n * n\nx is 1 + 2\nprint call square x\n"
+
+runner = CliRunner()
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / "script.mn"
+    path.write_text(SOURCE, encoding="utf-8")
+    return path
+
+@pytest.mark.parametrize("arguments", [
+    ["{script}"],
+    ["run", "{script}"],
+    ["-b", "vm", "{script}"],
+    ["run", "{script}", "-b", "closure"],
+    ["--no-cache", "{script}"],
+    ["-O", "{script}"],
+    ["run", "{script}", "--optimize", "-b", "vm"],
+])
+def test_run_script(arguments, script):
+    result = runner.invoke(cli, [argument.format(script=script) for argument in arguments])
+
+    assert result.exit_code == 0, result.output
+    assert result.output == "9\n"
+    assert (script.parent / CACHE_DIRECTORY).exists() != ("--no-cache" in arguments)
+
+@pytest.mark.parametrize("arguments", [["-"], ["run", "-"], ["-b", "vm", "-"]])
+def test_run_stdin(arguments, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    result = runner.invoke(cli, arguments, input=SOURCE)
+
+    assert result.exit_code == 0, result.output
+    assert result.output == "9\n"
+    assert not (tmp_path / CACHE_DIRECTORY).exists()
+
+def test_compile_and_run(script):
+    result = runner.invoke(cli, ["compile", str(script)])
+    artifact = script.with_suffix(".mnc")
+
+    assert result.exit_code == 0, result.output
+    assert artifact.read_bytes().startswith(MAGIC)
+
+    script.unlink()
+    for arguments in (["run", str(artifact)], [str(artifact)], ["-b", "vm", str(artifact)]):
+        result = runner.invoke(cli, arguments)
+        assert result.exit_code == 0, result.output
+        assert result.output == "9\n"
+
+def test_run_truncated_program(script):
+    runner.invoke(cli, ["compile", str(script)])
+    artifact = script.with_suffix(".mnc")
+    with open(artifact, "rb") as file:
+        file.read(len(MAGIC))
+        pickle.load(file)
+        header_end = file.tell()
+    # Cut right after the header
+    artifact.write_bytes(artifact.read_bytes()[:header_end])
+    result = runner.invoke(cli, ["run", str(artifact)])
+
+    assert result.exit_code != 0
+    assert "is not a compiled Moon program" in result.output
+
+def test_compile_output(script, tmp_path):
+    output = tmp_path / "build.mnc"
+    result = runner.invoke(cli, ["compile", str(script), "-o", str(output)])
+
+    assert result.exit_code == 0, result.output
+    assert output.exists()
+
+def test_compile_errors(tmp_path):
+    path = tmp_path / "broken.mn"
+    path.write_text("x is\nprint 1\n", encoding="utf-8")
+    result = runner.invoke(cli, ["compile", str(path)])
+
+    assert result.exit_code != 0
+    assert not path.with_suffix(".mnc").exists()
+
+def test_compiled_programs_skip_the_front_end(script):
+    runner.invoke(cli, ["compile", str(script)])
+    code = (
+        "import sys\n"
+        "from moon.cli import cli\n"
+        f"sys.argv = ['moon', {str(script.with_suffix('.mnc'))!r}]\n"
+        "try:\n"
+        "    cli()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(sorted(name for name in sys.modules if name.startswith(('ply', 'moon.lexer', 'moon.parser'))))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout == "9\n[]\n"
+
+def test_undefined_names_are_reported(tmp_path):
+    path = tmp_path / "undefined.mn"
+    path.write_text("if false\n\tprint missing\nprint 1\n", encoding="utf-8")
+    result = runner.invoke(cli, [str(path)])
+
+    assert result.exit_code == 0, result.output
+    assert result.stdout == "1\n"
+    assert result.stderr == "[warning] Undefined name: missing\n"
+
+def test_compile_reports_undefined_names(tmp_path):
+    path = tmp_path / "undefined.mn"
+    path.write_text("if false\n\tprint missing\nprint 1\n", encoding="utf-8")
+    result = runner.invoke(cli, ["compile", str(path)])
+
+    assert result.exit_code == 0, result.output
+    assert result.stdout == f"Compiled {path} to {path.with_suffix('.mnc')}\n"
+    assert result.stderr == "[warning] Undefined name: missing\n"
+
+def test_debug_logs_tier_ups(tmp_path):
+    path = tmp_path / "loop.mn"
+    path.write_text("x is 0\nwhile x < 100\n\tx is x + 1\nprint x\n", encoding="utf-8")
+    result = runner.invoke(cli, ["-d", "--no-cache", str(path)])
+
+    assert result.exit_code == 0, result.output
+    assert "[tier-up] loop at line 2 after 64 iterations" in result.output
+
+@pytest.mark.parametrize("arguments", [
+    ["--profile", "{script}"],
+    ["run", "{script}", "--profile", "-b", "vm"],
+])
+def test_profile(arguments, script):
+    result = runner.invoke(cli, [argument.format(script=script) for argument in arguments])
+    profile = script.with_suffix(".profile.json")
+
+    assert result.exit_code == 0, result.output
+    assert result.output.startswith("9\n===== Profile =====")
+    assert "print call square x" in result.output
+    assert profile.exists()
+    assert [action["name"] for action in json.loads(profile.read_text(encoding="utf-8"))["actions"]] == ["square"]
@@ -0,0 +1,115 @@
+import sys
+
+import pytest
+
+from moon.compiler import Compiler
+from moon.hooks import CALL, LOOP, OUTPUT, RETURN, STATEMENT, Hooks
+from moon.interpreter import Action, execute_program
+from moon.vm import INSTRUCTION_SIZE, TRACE, TRACE_LOOP, VirtualMachine
+
+from helpers import parse_code
+
+def recording_hooks(events, every=1):
+    hooks = Hooks()
+    hooks.add(STATEMENT, lambda statement, environment: events.append((STATEMENT, statement.lineno)), every)
+    hooks.add(LOOP, lambda statement, environment: events.append((LOOP, statement.lineno)), every)
+    hooks.add(CALL, lambda action, param_values: events.append((CALL, action.block[0].lineno, list(param_values))), every)
+    hooks.add(RETURN, lambda action, value: events.append((RETURN, action.block[0].lineno, "action" if isinstance(value, Action) else value)), every)
+    hooks.add(OUTPUT, lambda *values: events.append((OUTPUT, *values)), every)
+    return hooks
+
+def record(code, backend="interpreter", every=1):
+    events = []
+    execute_program(parse_code(code), output_callback=lambda *values: None, backend=backend, hooks=recording_hooks(events, every))
+    return events
+
+def test_statement_events(backend):
+    events = record("x is 1\nif x is 1\n\tprint x + 2\nprint 2", backend)
+
+    assert events == [(STATEMENT, 1), (STATEMENT, 2), (STATEMENT, 3), (OUTPUT, "3"), (STATEMENT, 4), (OUTPUT, "2")]
+
+def test_loop_events(backend):
+    events = record("x is 0\nwhile x < 3\n\tx is x + 1", backend)
+
+    assert events == [(STATEMENT, 1), (STATEMENT, 2)] + [(LOOP, 2), (STATEMENT, 3)] * 3
+
+def test_call_and_return_events(backend):
+    events = record("action square n\n\tresult n * n\nprint call square 3", backend)
+
+    assert events == [(STATEMENT, 1), (STATEMENT, 3), (CALL, 2, [3]), (STATEMENT, 2), (RETURN, 2, 9), (OUTPUT, "9")]
+
+def test_tail_calls_return_in_order(backend):
+    events = record("action first n\n\tresult call second n + 1\naction second n\n\tresult n * 2\ncall first 1", backend)
+
+    assert [event for event in events if event[0] in (CALL, RETURN)] == [
+        (CALL, 2, [1]),
+        (CALL, 4, [2]),
+        (RETURN, 4, 4),
+        (RETURN, 2, 4),
+    ]
+
+@pytest.mark.parametrize("input_code", [
+    "x is 0\nwhile true\n\tx is x + 1\n\tif x < 3\n\t\tskip\n\tprint x\n\tif x is 5\n\t\tstop\nprint x",
+    "action f n\n\ti is 0\n\twhile true\n\t\ti is i + 1\n\t\tif i is n\n\t\t\tresult i * 2\nx is 0\nwhile x < 4\n\tprint call f x + 1\n\tx is x + 1",
+    "action down n\n\tif n is 0\n\t\tresult 0\n\tresult call down n - 1\nprint call down 5",
+    "action make k\n\taction get\n\t\tresult k\n\tresult get\ng is call make 1\nprint call g",
+    "action f\n\tstop\n\tprint 1\ncall f",
+])
+@pytest.mark.parametrize("every", [1, 3])
+def test_backends_report_the_same_events(input_code, every, backend):
+    assert record(input_code, backend, every) == record(input_code, "interpreter", every)
+
+def test_sampling():
+    events = []
+    hooks = Hooks()
+    hooks.add(STATEMENT, lambda statement, environment: events.append(statement.lineno), every=2)
+    execute_program(parse_code("a is 1\nb is 2\nc is 3\nd is 4\ne is 5"), hooks=hooks)
+
+    assert events == [2, 4]
+
+def test_hooks_run_in_order():
+    events = []
+    hooks = Hooks()
+    hooks.add(OUTPUT, lambda *values: events.append("first"))
+    hooks.add(OUTPUT, lambda *values: events.append("second"))
+    execute_program(parse_code("print 1"), output_callback=lambda *values: events.append("output"), hooks=hooks)
+
+    assert events == ["first", "second", "output"]
+
+def test_remove():
+    events = []
+    hooks = Hooks()
+    hook = lambda statement, environment: events.append(statement.lineno)
+    hooks.add(STATEMENT, hook)
+    hooks.remove(STATEMENT, hook)
+
+    assert not hooks
+    assert hooks.on_statement is None
+
+def test_hooks_are_compiled_out():
+    program = parse_code("x is 0\nwhile x < 3\n\tx is x + 1")
+    call_hooks = Hooks()
+    call_hooks.add(CALL, lambda action, param_values: None)
+
+    opcodes = VirtualMachine(call_hooks).compile(program, in_action=False).instructions[::INSTRUCTION_SIZE]
+    assert TRACE not in opcodes and TRACE_LOOP not in opcodes
+    # Call hooks do not need the variables of a call
+    assert Compiler(call_hooks).slotted
+
+    loop_hooks = Hooks()
+    loop_hooks.add(LOOP, lambda statement, environment: None)
+
+    opcodes = VirtualMachine(loop_hooks).compile(program, in_action=False).instructions[::INSTRUCTION_SIZE]
+    assert TRACE not in opcodes and TRACE_LOOP in opcodes
+    assert not Compiler(loop_hooks).slotted
+
+@pytest.mark.parametrize("event, every", [("unknown", 1), (STATEMENT, 0)])
+def test_invalid_hooks(event, every):
+    with pytest.raises(ValueError):
+        Hooks().add(event, print, every)
+
+def test_deep_recursion_is_reported():
+    depth = sys.getrecursionlimit() * 2
+    events = record(f"action down n\n\tif n is 0\n\t\tresult 0\n\tprevious is call down n - 1\n\tresult previous\ncall down {depth}")
+
+    assert sum(event[0] == CALL for event in events) == sum(event[0] == RETURN for event in events) == depth + 1
@@ -0,0 +1,108 @@
+import random
+
+import pytest
+
+from pathlib import Path
+
+from moon.lexer import chunk_ends
+from moon.incremental import IncrementalDocument
+from moon.nodes import Node
+
+from helpers import parse_code
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+
+def linenos(program):
+    """Line numbers of every node, in the order they are visited."""
+    lines, pending = [], list(reversed(program))
+    while pending:
+        node = pending.pop()
+        lines.append(node.lineno)
+        for field in reversed(node.fields):
+            value = getattr(node, field)
+            if isinstance(value, Node):
+                pending.append(value)
+            elif isinstance(value, list):
+                pending.extend(reversed([item for item in value if isinstance(item, Node)]))
+    return lines
+
+SOURCE = "x is 1\nif x\n\tprint 1\nelse\n\tprint 2\n# comment\naction f n\n\tresult n\nprint call f x\n"
+
+@pytest.mark.parametrize("input_code, expected", [
+    ("", [0]),
+    ("x is 1\ny is 2\n", [7, 14]),
+    ("if x\n\tprint 1\nelse\n\tprint 2\nz", [28, 29]),
+    ("x is 1 # comment\ny is 2\n", [24]),
+    ("x is \"a\nb\"\ny", [11, 12]),
+    ("x is (a\nb)\ny", [11, 12]),
+])
+def test_chunk_ends(input_code, expected):
+    assert chunk_ends(input_code)[0] == expected
+
+@pytest.mark.parametrize("code", [SOURCE, *[example.read_text() for example in sorted(EXAMPLES.glob("*.mn"))]])
+def test_document_program(code):
+    program = IncrementalDocument(code).program
+
+    assert program == parse_code(code)
+    assert linenos(program) == linenos(parse_code(code))
+
+def test_document_line_numbers():
+    assert [statement.lineno for statement in IncrementalDocument("x is 1\ny is 2\nprint x\nprint y\n").program] == [1, 2, 3, 4]
+
+@pytest.mark.parametrize("start, end, replacement", [
+    (5, 6, "2"),
+    (7, 7, "y is 3\n"),
+    (0, 7, ""),
+    (21, 21, "\tprint 3\n"),
+    (21, 35, ""),
+    (35, 35, "\tprint 3\n"),
+    (len(SOURCE), len(SOURCE), "print x"),
+    (0, len(SOURCE), "print 1\n"),
+])
+def test_document_edit(start, end, replacement):
+    document = IncrementalDocument(SOURCE)
+
+    program = document.edit(start, end, replacement)
+
+    text = SOURCE[:start] + replacement + SOURCE[end:]
+    assert document.text == text
+    assert program == parse_code(text)
+    assert linenos(program) == linenos(parse_code(text))
+
+def test_document_edit_reuses_chunks():
+    document = IncrementalDocument(SOURCE)
+    chunks = list(document.chunks)
+
+    document.edit(5, 6, "2")
+
+    assert document.chunks[0] is not chunks[0]
+    assert document.chunks[1:] == chunks[1:]
+
+def test_document_edits():
+    document = IncrementalDocument(SOURCE)
+    text = SOURCE
+    randomizer = random.Random(0)
+
+    for _ in range(200):
+        start = randomizer.randint(0, len(text))
+        end = min(start + randomizer.randint(0, 10), len(text))
+        replacement = randomizer.choice(["", "1", "\n", "y is 2\n", "print y\n", "if y\n\tprint 1\n"])
+        program = document.edit(start, end, replacement)
+        text = text[:start] + replacement + text[end:]
+
+        assert document.text == text
+        assert document.offsets() == [sum(len(chunk.text) for chunk in document.chunks[:index]) for index in range(len(document.chunks))]
+        assert list(map(id, program)) == [id(statement) for chunk in document.chunks for statement in chunk.program]
+        assert [chunk.line for chunk in document.chunks] == [text[:offset].count("\n") + 1 for offset in document.offsets()]
+
+def test_document_open_string():
+    document = IncrementalDocument("x is 1\ny is 2\nz is 3\n")
+
+    document.edit(12, 12, "\"")
+    document.edit(22, 22, "\"")
+
+    assert document.program == parse_code("x is 1\ny is \"2\nz is 3\n\"")
+
+def test_document_edit_out_of_bounds():
+    with pytest.raises(IndexError):
+        IncrementalDocument("x is 1\n").edit(0, 10, "")
@@ -1,10 +1,12 @@
+import sys
+
 import pytest
 
 from moon.lexer import build_lexer
 from moon.parser import build_parser
-from moon.interpreter import execute_program
+from moon.interpreter import can_signal, execute_program
 
-def code_to_output(code):
+def code_to_output(code, backend="interpreter"):
     code = code.lstrip('\n')
 
     lexer = build_lexer()
@@ -13,7 +15,7 @@ def code_to_output(code):
     parser = build_parser()
     parsed_code = parser.parse(code+'\n', lexer=lexer)
 
-    execute_program(parsed_code)
+    execute_program(parsed_code, backend=backend)
 
 @pytest.mark.parametrize("input_code, expected_output", [
     ("print 1", "1"),
@@ -23,8 +25,8 @@ def code_to_output(code):
     ("print false", "false"),
     ("print null", "null"),
 ])
-def test_print_statement(input_code, expected_output, capsys):
-    code_to_output(input_code)
+def test_print_statement(input_code, expected_output, backend, capsys):
+    code_to_output(input_code, backend)
 
     captured = capsys.readouterr()
 
@@ -38,8 +40,8 @@ def test_print_statement(input_code, expected_output, capsys):
     ("print 1 % 1", "0"),
     ("print 1 ** 1", "1"),
 ])
-def test_arithmetic_expressions(input_code, expected_output, capsys):
-    code_to_output(input_code)
+def test_arithmetic_expressions(input_code, expected_output, backend, capsys):
+    code_to_output(input_code, backend)
 
     captured = capsys.readouterr()
 
@@ -53,8 +55,8 @@ def test_arithmetic_expressions(input_code, expected_output, capsys):
     ("print 1 is 1", "true"),
     ("print 1 isnt 1", "false"),
 ])
-def test_comparison_expressions(input_code, expected_output, capsys):
-    code_to_output(input_code)
+def test_comparison_expressions(input_code, expected_output, backend, capsys):
+    code_to_output(input_code, backend)
 
     captured = capsys.readouterr()
 
@@ -65,8 +67,8 @@ def test_comparison_expressions(input_code, expected_output, capsys):
     ("print true or true", "true"),
     ("print not true", "false"),
 ])
-def test_logical_expressions(input_code, expected_output, capsys):
-    code_to_output(input_code)
+def test_logical_expressions(input_code, expected_output, backend, capsys):
+    code_to_output(input_code, backend)
 
     captured = capsys.readouterr()
 
@@ -78,8 +80,8 @@ def test_logical_expressions(input_code, expected_output, capsys):
     ("print 5 + 5 % 5", "5"),
     ("print 5 + 5 ** 5", "3130"),
 ])
-def test_arithmetic_expressions_precedence(input_code, expected_output, capsys):
-    code_to_output(input_code)
+def test_arithmetic_expressions_precedence(input_code, expected_output, backend, capsys):
+    code_to_output(input_code, backend)
 
     captured = capsys.readouterr()
 
@@ -90,8 +92,8 @@ def test_arithmetic_expressions_precedence(input_code, expected_output, capsys):
     ("x is 5\ny is 6\nprint x + y", "11"),
     ("x is 5\ny is 6\nprint x + y * 5", "35"),
 ])
-def test_variable_declaration_statements(input_code, expected_output, capsys):
-    code_to_output(input_code)
+def test_variable_declaration_statements(input_code, expected_output, backend, capsys):
+    code_to_output(input_code, backend)
 
     captured = capsys.readouterr()
 
@@ -104,8 +106,8 @@ def test_variable_declaration_statements(input_code, expected_output, capsys):
     ("print false isnt true", "true"),
     ("print true is true", "true"),
 ])
-def test_boolean_literals(input_code, expected_output, capsys):
-    code_to_output(input_code)
+def test_boolean_literals(input_code, expected_output, backend, capsys):
+    code_to_output(input_code, backend)
 
     captured = capsys.readouterr()
 
@@ -115,8 +117,8 @@ def test_boolean_literals(input_code, expected_output, capsys):
     ("if true\n\tprint \"True block\"\nprint \"Outside if\"", "True block\nOutside if"),
     ("if false\n\tprint \"False block\"\nprint \"Outside if\"", "Outside if"),
 ])
-def test_if_statements(input_code, expected_output, capsys):
-    code_to_output(input_code)
+def test_if_statements(input_code, expected_output, backend, capsys):
+    code_to_output(input_code, backend)
 
     captured = capsys.readouterr()
 
@@ -125,8 +127,8 @@ def test_if_statements(input_code, expected_output, capsys):
 @pytest.mark.parametrize("input_code, expected_output", [
     ("x is 0\nwhile x < 5\n\tx is x + 1\nprint x", "5"),
 ])
-def test_while_statements(input_code, expected_output, capsys):
-    code_to_output(input_code)
+def test_while_statements(input_code, expected_output, backend, capsys):
+    code_to_output(input_code, backend)
 
     captured = capsys.readouterr()
 
@@ -137,9 +139,169 @@ def test_while_statements(input_code, expected_output, capsys):
     ("x is 0\nwhile true\n\tprint x\n\tx is x + 1\n\tif x > 5\n\t\tif x is 10\n\t\t\tstop", "0\n1\n2\n3\n4\n5\n6\n7\n8\n9"),
     ("x is 0\nwhile true\n\tx is x + 1\n\tif x is 3\n\t\tskip\n\tprint x\n\n\tif x is 10\n\t\tstop", "1\n2\n4\n5\n6\n7\n8\n9\n10"),
 ])
-def test_stop_statements(input_code, expected_output, capsys):
-    code_to_output(input_code)
+def test_stop_statements(input_code, expected_output, backend, capsys):
+    code_to_output(input_code, backend)
+
+    captured = capsys.readouterr()
+
+    assert captured.out.rstrip() == expected_output
+
+@pytest.mark.parametrize("input_code, expected_output", [
+    ("print false and call undefined", "false"),
+    ("print true or call undefined", "true"),
+    ("print \"\" or 5", "5"),
+    ("print -2 ** 2", "4"),
+    ("x is \"it's\"\nprint x + \" \\\"quoted\\\"\"", "it's \\\"quoted\\\""),
+])
+def test_operator_engine(input_code, expected_output, backend, capsys):
+    code_to_output(input_code, backend)
+
+    captured = capsys.readouterr()
+
+    assert captured.out.rstrip() == expected_output
+
+@pytest.mark.parametrize("input_code, expected_output", [
+    ("action double x\n\tresult x * 2\nprint call double 21", "42"),
+    ("action countdown n\n\tif n is 0\n\t\tresult 0\n\tresult call countdown n - 1\nprint call countdown 50", "0"),
+    ("action sign n\n\tif n < 0\n\t\tresult -1\n\telse\n\t\tresult 1\n\tresult 0\nprint call sign 5", "1"),
+    ("total is 0\naction add n\n\ttotal is total + n\ncall add 3\ncall add 4\nprint total", "7"),
+    ("action set\n\tlocal is 1\ncall set\nprint 2", "2"),
+    ("action find\n\tx is 0\n\twhile true\n\t\tx is x + 1\n\t\tif x is 3\n\t\t\tresult x\nprint call find", "3"),
+])
+def test_action_statements(input_code, expected_output, backend, capsys):
+    code_to_output(input_code, backend)
+
+    captured = capsys.readouterr()
+
+    assert captured.out.rstrip() == expected_output
+
+def test_action_locals_do_not_leak(backend):
+    with pytest.raises(KeyError):
+        code_to_output("action set\n\tlocal is 1\ncall set\nprint local", backend)
+
+def test_statement_callback(backend):
+    code = "x is 1\nprint x + 1\n"
+    environments = []
+
+    parsed_code = build_parser().parse(code, lexer=build_lexer())
+    execute_program(parsed_code, statement_callback=environments.append, output_callback=lambda *args: None, backend=backend)
+
+    assert environments
+    assert all(environment.get("x") in (None, 1) for environment in environments)
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        code_to_output("print 1", "unknown")
+
+@pytest.mark.parametrize("input_code, expected_output", [
+    ("if true\n\tprint 1\n\tstop\n\tprint 2\nprint 3", "1\n3"),
+    ("x is 0\nwhile true\n\twhile true\n\t\tx is x + 1\n\t\tif x is 3\n\t\t\tresult x\nprint x", "3"),
+    ("action f\n\tif true\n\t\tskip\n\t\tprint 1\n\tprint 2\ncall f", "2"),
+    ("action f\n\tstop\nprint call f", "null"),
+    ("action f\n\t40 + 2\nprint call f", "42"),
+    ("action f\n\tprint 1\nprint call f", "1\nnull"),
+    ("x is 0\nwhile x < 5\n\tx is x + 1\n\tif x % 2 is 0\n\t\tskip\n\tprint x", "1\n3\n5"),
+    ("action f\n\twhile true\n\t\tstop\n\tresult 1\nprint call f", "1"),
+])
+def test_control_flow_signals(input_code, expected_output, backend, capsys):
+    code_to_output(input_code, backend)
+
+    captured = capsys.readouterr()
+
+    assert captured.out.rstrip() == expected_output
+
+@pytest.mark.parametrize("input_code, expected_output", [
+    ("n is 5\naction f n\n\tn is n + 1\n\tresult n\nprint call f 1\nprint n", "2\n5"),
+    ("action outer\n\tx is 1\n\taction inner\n\t\tx is x + 1\n\tcall inner\n\tresult x\nprint call outer", "2"),
+    ("count is 0\naction tick\n\tcount is count + 1\naction twice\n\tcall tick\n\tcall tick\ncall twice\nprint count", "2"),
+    ("action fact n\n\tif n < 2\n\t\tresult 1\n\tprevious is call fact n - 1\n\tresult previous * n\nprint call fact 5", "120"),
+    # Enclosing variables are updated once they are bound
+    ("action f\n\tx is 3\n\tresult x\nprint call f\nx is 0\nprint call f\nprint x", "3\n3\n3"),
+    ("action make\n\taction bump\n\t\tc is c + 1\n\t\tresult c\n\tc is 0\n\tresult bump\nb is call make\nprint call b\nprint call b", "1\n2"),
+])
+def test_call_frames(input_code, expected_output, backend, capsys):
+    code_to_output(input_code, backend)
+
+    captured = capsys.readouterr()
+
+    assert captured.out.rstrip() == expected_output
+
+def test_call_frames_are_lexically_scoped(backend):
+    with pytest.raises(KeyError):
+        code_to_output("action show\n\tprint hidden\naction caller\n\thidden is 1\n\tcall show\ncall caller", backend)
+
+@pytest.mark.parametrize("input_code, expected_output", [
+    ("action g x\n\tresult 1\naction redefine\n\taction g x\n\t\tresult 2\nprint call g call redefine", "2"),
+    ("action g x\n\tresult 1\naction redefine\n\taction g x\n\t\tresult 2\naction f\n\tresult call g call redefine\nprint call f", "2"),
+])
+def test_arguments_are_evaluated_before_the_callee(input_code, expected_output, backend, capsys):
+    code_to_output(input_code, backend)
 
     captured = capsys.readouterr()
 
-    assert captured.out.rstrip() == expected_output
\ No newline at end of file
+    assert captured.out.rstrip() == expected_output
+
+def test_arguments_fail_before_an_undefined_callee(backend):
+    with pytest.raises(TypeError):
+        code_to_output("print call g 1 + \"s\"", backend)
+
+def test_unbound_globals_are_not_assigned(backend):
+    with pytest.raises(KeyError):
+        code_to_output("action f\n\tx is 3\ncall f\naction g\n\tresult x\nprint call g\nx is 0", backend)
+
+@pytest.mark.parametrize("input_code, expected", [
+    ("x is 1\nprint x", False),
+    ("while true\n\tstop", False),
+    ("while true\n\tif true\n\t\tresult 1", True),
+    ("if true\n\tskip", True),
+    ("action f\n\tstop", False),
+])
+def test_can_signal(input_code, expected):
+    lexer = build_lexer()
+    lexer.input(input_code)
+
+    parser = build_parser()
+    assert can_signal(parser.parse(input_code+'\n', lexer=lexer)) is expected
+
+@pytest.mark.parametrize("input_code, expected_output", [
+    ("action down n\n\tif n is 0\n\t\tresult 0\n\tresult call down n - 1\nprint call down 5000", "0"),
+    ("action even n\n\tif n is 0\n\t\tresult true\n\tresult call odd n - 1\naction odd n\n\tif n is 0\n\t\tresult false\n\tresult call even n - 1\nprint call even 5001", "false"),
+    ("action show n\n\tprint n\nresult call show 1\nprint 2", "1\n2"),
+])
+def test_tail_calls(input_code, expected_output, backend, capsys):
+    code_to_output(input_code, backend)
+
+    captured = capsys.readouterr()
+
+    assert captured.out.rstrip() == expected_output
+
+@pytest.mark.parametrize("input_code, expected_output", [
+    ("print " + " + ".join(["1"] * 5000), "5000"),
+    ("x is 10000\nprint x" + " - 1" * 5000, "5000"),
+    ("print " + " and ".join(["true"] * 5000), "true"),
+    ("print false" + " or false" * 5000 + " or 3", "3"),
+    ("action f n\n\tresult n" + " + n" * 3000 + "\nprint call f 1", "3001"),
+])
+def test_long_operator_chains(input_code, expected_output, backend, capsys):
+    code_to_output(input_code, backend)
+
+    captured = capsys.readouterr()
+
+    assert captured.out.rstrip() == expected_output
+
+@pytest.mark.parametrize("backend", ["interpreter", "tiered"])
+def test_deep_recursion(backend, capsys):
+    depth = sys.getrecursionlimit() * 2
+    code_to_output(f"action total n\n\tif n is 0\n\t\tresult 0\n\tprevious is call total n - 1\n\tresult previous + n\nprint call total {depth}", backend)
+
+    captured = capsys.readouterr()
+
+    assert captured.out.rstrip() == str(depth * (depth + 1) // 2)
+
+@pytest.mark.parametrize("backend", ["closure", "python"])
+def test_deep_recursion_limit(backend):
+    # These backends nest a Python call per Moon call, see BACKENDS
+    depth = sys.getrecursionlimit() * 2
+
+    with pytest.raises(RecursionError):
+        code_to_output(f"action total n\n\tif n is 0\n\t\tresult 0\n\tprevious is call total n - 1\n\tresult previous + n\nprint call total {depth}", backend)
@@ -1,6 +1,14 @@
+import io
+import mmap
 import pytest
 
+from pathlib import Path
+
 from moon import build_lexer
+from moon.lexer import StreamingLexer, TokenBuffer, chunk_ends, scan_chunk_ends
+from moon.parser import build_parser
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
 
 # Test valid boolean
 @pytest.mark.parametrize("valid_boolean", [
@@ -1225,4 +1233,160 @@ def test_line_numbers(input_str, expected_line_number):
 	if len(tokens) > 0:
 		assert tokens[-1].lineno == expected_line_number
 	else:
-		assert len(lexer.errors) == 0
\ No newline at end of file
+		assert len(lexer.errors) == 0
+
+# Test lexers cloned from the prototype
+def test_cloned_lexers_are_independent():
+	# Arrange
+	first = build_lexer()
+	second = build_lexer()
+
+	# Act
+	first.input("x is 1\n$")
+	first_tokens = list(first)
+	second.input("y\n\tz")
+	second_tokens = list(second)
+
+	# Assert
+	assert first.lexer is not second.lexer
+	assert first.lexer.lexre is second.lexer.lexre
+	assert [token.type for token in first_tokens] == ["IDENTIFIER", "IS", "INTEGER", "NEWLINE"]
+	assert [token.type for token in second_tokens] == ["IDENTIFIER", "NEWLINE", "INDENT", "IDENTIFIER", "DEDENT"]
+	assert len(first.errors) == 1
+	assert len(second.errors) == 0
+	assert second_tokens[-2].lineno == 2
+
+# Test the fused tokenizer against the default one
+@pytest.mark.parametrize("code", [
+	"",
+	"\n\tx",
+	"\tx\n\ty",
+	"if a\n\tb\n\n\nc",
+	"x\n\t\n\ty",
+	"x\n\t# comment\n\t\ty\nz",
+	"x\n\t(multi\nline)\n\t\ty",
+	"a\n\t b\n \tc\n",
+	"a\n$\tb\n",
+	"x\n\t\t",
+	"x\n\t# comment",
+	*[example.read_text() for example in sorted(EXAMPLES.glob("*.mn"))],
+])
+def test_fused_tokenizer(code):
+	# Arrange
+	default_lexer = build_lexer()
+	fused_lexer = build_lexer(fused=True)
+
+	# Act
+	default_lexer.input(code)
+	default_tokens = [(token.type, token.value, token.lineno, token.lexpos) for token in default_lexer]
+	fused_lexer.input(code)
+	fused_tokens = [(token.type, token.value, token.lineno, token.lexpos) for token in fused_lexer]
+
+	# Assert
+	assert fused_tokens == default_tokens
+	assert fused_lexer.errors == default_lexer.errors
+
+# Test the array-backed token buffer
+@pytest.mark.parametrize("code", [
+	"",
+	"x is 1\nif x\n\tprint \"a\" 2.5 true\n",
+	"a\n$\tb\n",
+	*[example.read_text() for example in sorted(EXAMPLES.glob("*.mn"))],
+])
+def test_token_buffer(code):
+	# Arrange
+	lexer = build_lexer()
+	lexer.input(code)
+	expected = [(token.type, token.value, token.lineno, token.lexpos) for token in lexer]
+
+	# Act
+	buffer = TokenBuffer.from_code(code)
+
+	# Assert
+	assert len(buffer) == len(expected)
+	assert [buffer.row(index) for index in range(len(buffer))] == expected
+	assert [(token.type, token.value, token.lineno, token.lexpos) for token in buffer] == expected
+	assert buffer.errors == lexer.errors
+
+def test_token_buffer_parse():
+	# Arrange
+	code = "action double x\n\tresult x * 2\nprint call double 21\n"
+	lexer = build_lexer()
+
+	# Act
+	expected = build_parser().parse(code, lexer=lexer)
+	parsed = build_parser().parse(None, lexer=TokenBuffer.from_code(code).reader())
+
+	# Assert
+	assert parsed == expected
+	assert not hasattr(TokenBuffer.from_code(code)[0], "__dict__")
+
+# Test the streaming lexer against the default one
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+@pytest.mark.parametrize("code", [
+	"",
+	"x is \"a\nb\"\nprint x\n# comment\n\n(multi\nline)\nif x\n\tprint \"é€\"\nelse\n\tprint 2\n",
+	"a\n$\tb\n",
+	*[example.read_text() for example in sorted(EXAMPLES.glob("*.mn"))],
+])
+def test_streaming_lexer(code, chunk_size):
+	# Arrange
+	lexer = build_lexer()
+	lexer.input(code + "\n")
+	expected = [(token.type, token.value, token.lineno, token.lexpos) for token in lexer]
+
+	# Act
+	text_stream = StreamingLexer(io.StringIO(code), chunk_size=chunk_size)
+	text_tokens = [(token.type, token.value, token.lineno, token.lexpos) for token in text_stream]
+	binary_tokens = [(token.type, token.value, token.lineno, token.lexpos) for token in StreamingLexer(io.BytesIO(code.encode()), chunk_size=chunk_size)]
+
+	# Assert
+	assert text_tokens == expected
+	assert binary_tokens == expected
+	assert text_stream.errors == lexer.errors
+
+# Test the location printed for an error in a later piece
+@pytest.mark.parametrize("fused", [False, True])
+def test_streaming_lexer_error_location(fused, capsys):
+	# Arrange
+	code = "x is 1\ny is 2\nprint x\nprint $\n"
+
+	# Act
+	tokens = list(StreamingLexer(io.StringIO(code), chunk_size=7, fused=fused))
+	printed = capsys.readouterr().out
+
+	# Assert
+	assert tokens
+	assert printed == "Error: '$' at line 4:28\n"
+
+# Test scans resumed as the source is read against scans of the whole source
+@pytest.mark.parametrize("code", [
+	"x is \"a\nb\"\nprint x\n# comment\n\n(multi\nline)\nif x\n\tprint \"é€\"\nelse\n\tprint 2\n",
+	*[example.read_text() for example in sorted(EXAMPLES.glob("*.mn"))],
+])
+def test_scan_chunk_ends(code):
+	# Arrange
+	expected, clean = chunk_ends(code)
+	ends, position = [], 0
+
+	# Act
+	for length in range(1, len(code) + 1):
+		position, clean = scan_chunk_ends(code[:length], position, ends)
+
+	# Assert
+	assert clean
+	assert ends == expected[:-1]
+
+def test_streaming_lexer_parse(tmp_path):
+	# Arrange
+	code = "".join(example.read_text() for example in sorted(EXAMPLES.glob("*.mn")))
+	path = tmp_path / "examples.mn"
+	path.write_text(code)
+
+	# Act
+	expected = build_parser().parse(code + "\n", lexer=build_lexer())
+	with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as source:
+		parsed = build_parser().parse(lexer=StreamingLexer(source, chunk_size=64))
+
+	# Assert
+	assert parsed == expected
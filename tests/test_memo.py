@@ -0,0 +1,78 @@
+import pytest
+
+from moon.interpreter import execute_program
+from moon.memo import ActionCache, PurityChecker
+
+from helpers import parse_code
+
+SQUARES = "action square n\n\tresult n * n\ncount is 0\nwhile count < 6\n\tprint call square count % 3\n\tcount is count + 1"
+
+@pytest.mark.parametrize("input_code, expected", [
+    ("action square n\n\tresult n * n", ["square"]),
+    ("action f n\n\tx is n\n\twhile x > 0\n\t\tx is x - 1\n\tresult x", ["f"]),
+    ("action fact n\n\tif n < 2\n\t\tresult 1\n\tresult n * call fact n - 1", ["fact"]),
+    ("action show n\n\tprint n", []),
+    ("action prompt\n\tresult ask \"?\"", []),
+    ("total is 0\naction add n\n\ttotal is total + n", []),
+    ("limit is 3\naction below n\n\tresult n < limit", []),
+    ("action show n\n\tprint n\naction twice n\n\tcall show n", []),
+    ("action square n\n\tresult n * n\nsquare is 1", []),
+    ("action outer\n\taction inner\n\t\tresult 1\n\tresult call inner", []),
+])
+def test_purity(input_code, expected):
+    assert list(PurityChecker(parse_code(input_code)).pure_actions()) == expected
+
+def test_known_names_are_not_pure():
+    assert PurityChecker(parse_code("action f n\n\tresult n"), known={"f"}).pure_actions() == {}
+
+def test_action_cache(backend):
+    output = []
+    cache = ActionCache()
+    execute_program(parse_code(SQUARES), output_callback=output.append, backend=backend, action_cache=cache)
+
+    assert output == ["0", "1", "4", "0", "1", "4"]
+    assert (cache.stats["square"].hits, cache.stats["square"].misses) == (3, 3)
+    assert (cache.hits, cache.misses) == (3, 3)
+
+def test_action_cache_across_runs(backend):
+    cache = ActionCache()
+    program = parse_code(SQUARES)
+    execute_program(program, backend=backend, action_cache=cache)
+    execute_program(program, backend=backend, action_cache=cache)
+
+    assert (cache.stats["square"].hits, cache.stats["square"].misses) == (9, 3)
+
+    execute_program(parse_code("action cube n\n\tresult n * n * n\ncall cube 2"), backend=backend, action_cache=cache)
+
+    assert list(cache.stats) == ["cube"]
+    assert len(cache.pure) == len(cache.results) == 1
+
+def test_action_cache_keys_types(backend):
+    output = []
+    code = "action same n\n\tresult n\nprint call same 1\nprint call same true\nprint call same 1.0"
+    execute_program(parse_code(code), output_callback=output.append, backend=backend, action_cache=ActionCache())
+
+    assert output == ["1", "true", "1.0"]
+
+def test_action_cache_keys_signed_zeros(backend):
+    output = []
+    code = "action same x\n\tresult x\nprint call same 0.0\nprint call same -0.0"
+    execute_program(parse_code(code), output_callback=output.append, backend=backend, action_cache=ActionCache())
+
+    assert output == ["0.0", "-0.0"]
+
+@pytest.mark.parametrize("policy, hits", [("lru", 1), ("fifo", 0)])
+def test_eviction_policies(policy, hits):
+    # 0 and 1 are cached, 0 is used again, then 2 evicts one of them before 0 is called last
+    code = "action square n\n\tresult n * n\ncall square 0\ncall square 1\ncall square 0\ncall square 2\ncall square 0"
+    cache = ActionCache(maxsize=2, policy=policy)
+    execute_program(parse_code(code), action_cache=cache)
+
+    assert len(cache.results) == 2
+    assert cache.hits == 1 + hits
+
+def test_invalid_cache():
+    with pytest.raises(ValueError):
+        ActionCache(maxsize=0)
+    with pytest.raises(ValueError):
+        ActionCache(policy="random") # type: ignore
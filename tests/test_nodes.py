@@ -0,0 +1,71 @@
+import sys
+
+from pathlib import Path
+
+import pytest
+
+from moon import nodes
+from moon.interpreter import BACKENDS, execute_program, operator_chain
+from moon.nodes import (
+    BinaryExpression,
+    Call,
+    IfElse,
+    Literal,
+    Name,
+    Print,
+    as_nodes,
+    from_tuples,
+    to_tuples,
+)
+
+from helpers import parse_code
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+@pytest.mark.parametrize("path", sorted(EXAMPLES.glob("*.mn")), ids=lambda path: path.name)
+def test_tuple_round_trip(path):
+    program = parse_code(path.read_text(encoding="utf-8"))
+
+    assert from_tuples(to_tuples(program)) == program
+
+def test_kinds():
+    program = parse_code("x is 1 + y\nprint call f x")
+
+    assert [statement.kind for statement in program] == [nodes.VARIABLE_DECLARATION, nodes.PRINT]
+    assert program[0].value == BinaryExpression("+", Literal(1), Name("y"))
+    assert program[1] == Print([Call("f", [Name("x")])])
+
+def test_line_numbers():
+    program = parse_code("x is 1\n\nif x > 0\n\tprint x\nelse\n\tprint 1\n\n\tprint 2")
+
+    condition = program[1].condition
+    assert [statement.lineno for statement in program] == [1, 3]
+    assert (condition.lineno, condition.left.lineno, condition.right.lineno) == (3, 3, 3)
+    assert program[1].if_block[0].lineno == 4
+    assert [statement.lineno for statement in program[1].else_block] == [6, 8]
+    assert program[1].else_block[1].expressions[0].lineno == 8
+
+def test_equality_ignores_line_numbers():
+    assert IfElse(Name("x", 3), [], None, 3) == IfElse(Name("x"), [], None)
+    assert Literal(1) != Name("1")
+
+def test_long_chains_do_not_recurse():
+    depth = sys.getrecursionlimit() * 2
+    program = from_tuples(to_tuples(parse_code(" + ".join(["1"] * depth))))
+
+    first, links = operator_chain(program[0])
+    assert first == Literal(1)
+    assert len(links) == depth - 1
+
+def test_nodes_are_compact():
+    assert not hasattr(Literal(1), "__dict__")
+    assert not hasattr(BinaryExpression("+", Literal(1), Literal(2)), "__dict__")
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_tuple_programs(backend, capsys):
+    program = to_tuples(parse_code("action double n\n\tresult n * 2\nprint call double 21"))
+
+    assert as_nodes(program) == parse_code("action double n\n\tresult n * 2\nprint call double 21")
+    execute_program(program, backend=backend)
+
+    assert capsys.readouterr().out.rstrip() == "42"
@@ -0,0 +1,141 @@
+import pytest
+
+from moon.interpreter import BACKENDS, execute_program
+from moon.nodes import to_tuples
+from moon.optimizer import (
+    BranchFolding,
+    ConstantFolding,
+    DeadCodeElimination,
+    InvariantHoisting,
+    PassManager,
+)
+
+from helpers import parse_code
+
+def optimized(code, optimization):
+    return to_tuples(optimization.run(parse_code(code)))
+
+def output(program, backend):
+    lines = []
+    execute_program(program, output_callback=lambda *values: lines.append(" ".join(values)), backend=backend)
+    return lines
+
+@pytest.mark.parametrize("input_code, expected", [
+    ("x is 60 * 60", "x is 3600"),
+    ("x is 1 + 2 * 3 - 4", "x is 3"),
+    ("x is \"a\" + \"b\"", "x is \"ab\""),
+    ("x is 2 < 3 and y", "x is y"),
+    ("x is 0 and y", "x is 0"),
+    ("x is 1 or y", "x is 1"),
+    ("x is not 1 > 2", "x is true"),
+    ("print call f 1 + 1", "print call f 2"),
+    ("x is y + 1 + 2", "x is y + 1 + 2"),
+    ("x is 1 / 0", "x is 1 / 0"),
+    ("x is \"a\" - 1", "x is \"a\" - 1"),
+    ("x is 2 ** 100000", "x is 2 ** 100000"),
+    ("x is \"a\" * 100000", "x is \"a\" * 100000"),
+])
+def test_constant_folding(input_code, expected):
+    assert optimized(input_code, ConstantFolding()) == to_tuples(parse_code(expected))
+
+def test_folding_long_chains():
+    code = "x is " + " + ".join(["1"] * 5000)
+
+    assert optimized(code, ConstantFolding()) == to_tuples(parse_code("x is 5000"))
+
+@pytest.mark.parametrize("input_code, expected", [
+    ("if true\n\tprint 1\nelse\n\tprint 2", "print 1"),
+    ("if false\n\tprint 1\nelse\n\tprint 2", "print 2"),
+    ("if false\n\tprint 1\nprint 3", "print 3"),
+    ("while false\n\tprint 1\nprint 3", "print 3"),
+    ("while true\n\tif true\n\t\tstop", "while true\n\tstop"),
+    # Kept: a top-level stop leaves the whole if statement
+    ("if true\n\tstop\n\tprint 1", "if true\n\tstop\n\tprint 1"),
+    # Kept: the last statement of an action is its result
+    ("action f\n\tif true\n\t\t1", "action f\n\tif true\n\t\t1"),
+    ("action f\n\tif false\n\t\tprint 1", "action f\n\tif false\n\t\tprint 1"),
+])
+def test_branch_folding(input_code, expected):
+    assert optimized(input_code, BranchFolding()) == to_tuples(parse_code(expected))
+
+@pytest.mark.parametrize("input_code, expected", [
+    ("while x\n\tstop\n\tprint 1", "while x\n\tstop"),
+    ("while x\n\tif y\n\t\tskip\n\t\tprint 1\n\tprint 2", "while x\n\tif y\n\t\tskip\n\tprint 2"),
+    ("action f\n\tresult 1\n\tprint 2", "action f\n\tresult 1"),
+    # Kept: top-level statements, and stop or skip in an action body, only leave themselves
+    ("result 1\nprint 2", "result 1\nprint 2"),
+    ("action f\n\tskip\n\tprint 2", "action f\n\tskip\n\tprint 2"),
+])
+def test_dead_code_elimination(input_code, expected):
+    assert optimized(input_code, DeadCodeElimination()) == to_tuples(parse_code(expected))
+
+def test_invariant_hoisting():
+    program = InvariantHoisting().run(parse_code("i is 0\nwhile i < n * 2\n\ttotal is n * 60 + total\n\ti is i + 1"))
+    guard = program[1]
+    (first, second, loop) = guard.if_block
+
+    assert to_tuples(guard.condition) == to_tuples(parse_code("i < n * 2")[0])
+    assert to_tuples([first.value, second.value]) == to_tuples(parse_code("n * 2\nn * 60"))
+    assert to_tuples(loop.condition) == ("comparison_expression", "<", "i", first.name)
+    assert to_tuples(loop.block[0].value) == ("arithmetic_expression", "+", second.name, "total")
+
+@pytest.mark.parametrize("input_code", [
+    # Assigned in the loop
+    "while i < n * 2\n\tn is n - 1",
+    # May be assigned by the action
+    "while i < n * 2\n\ti is call f i",
+    # Not evaluated on every iteration
+    "while i < 10 and n * 2\n\ti is i + 1",
+    "while i < 10\n\tif i > 5\n\t\tx is n * 2\n\ti is i + 1",
+    "while i < 10\n\tprint i\n\tx is n * 2\n\ti is i + 1",
+    # After an operation which could raise first
+    "while i < 10\n\tx is i / y + n * 2\n\ti is i + 1",
+    "while i < 10\n\tx is x + n * 2\n\ti is i + 1",
+])
+def test_invariant_hoisting_is_guarded(input_code):
+    assert optimized(input_code, InvariantHoisting()) == to_tuples(parse_code(input_code))
+
+def test_parsed_program_is_unchanged():
+    program = parse_code("x is 1 + 2\nwhile x < n * 2\n\tx is x + 1\n\tstop\n\tprint x")
+    before = to_tuples(program)
+
+    PassManager().run(program)
+
+    assert to_tuples(program) == before
+
+def test_pass_manager_switches():
+    passes = PassManager(disabled={"fold"})
+    program = passes.run(parse_code("x is 1 + 2"))
+
+    assert to_tuples(program) == to_tuples(parse_code("x is 1 + 2"))
+    assert set(passes.timings) == {"branches", "unreachable", "hoist"}
+
+    passes.enable("fold")
+    program = passes.run(program)
+
+    assert to_tuples(program) == to_tuples(parse_code("x is 3"))
+    assert all(seconds >= 0 for seconds in passes.timings.values())
+    with pytest.raises(KeyError):
+        passes.enable("inline")
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("input_code", [
+    "n is 3\ni is 0\ntotal is 0\nwhile i < n * 2\n\ttotal is total + n * 60\n\ti is i + 1\n\tif i is 2\n\t\tskip\n\tprint i total\nprint total",
+    "action f n\n\ti is 0\n\twhile i < n + 1\n\t\ti is i + 1\n\t\tif false\n\t\t\tprint 0\n\tresult i * 2 + 3\nprint call f 4",
+    "x is 0\nwhile true\n\tx is x + 1\n\tif x > 60 / 20\n\t\tstop\n\t\tprint x\nprint x",
+    # Invariants equal with == but not alike
+    "a is 2\ni is 0\nwhile i < 2\n\tx is a * 1\n\ty is a * 1.0\n\tz is a + true\n\tprint x y z\n\ti is i + 1",
+    "a is -0.0\ni is 0\nwhile i < 2\n\tx is a + 0.0\n\ty is a + -0.0\n\tz is a + false\n\tprint x y z\n\ti is i + 1",
+])
+def test_optimized_programs_behave_the_same(input_code, backend):
+    program = parse_code(input_code)
+
+    assert output(PassManager().run(program), backend) == output(program, backend)
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_hoisted_variables_are_removed(backend):
+    environment = dict()
+    program = PassManager().run(parse_code("n is 3\ni is 0\nwhile i < n * 2\n\ti is i + 1"))
+    execute_program(program, environment=environment, backend=backend)
+
+    assert environment == {"n": 3, "i": 6}
@@ -1,14 +1,19 @@
 import pytest
 
+from ply.yacc import ParserReflect
+
+import moon.parser
+import moon.parsetab
 from moon.lexer import build_lexer
-from moon.parser import build_parser
+from moon.nodes import to_tuples
+from moon.parser import build_parser, format_ast
 
 def parse_code(code):
     lexer = build_lexer()
     lexer.input(code)
 
     parser = build_parser()
-    return parser.parse(code+'\n', lexer=lexer)
+    return to_tuples(parser.parse(code+'\n', lexer=lexer))
 
 # Literals
 
@@ -237,4 +242,37 @@ def test_while_statements(input_code, expected_output):
     ("action func_name a b\n\tprint 1\n\tprint 2", [("action_statements", "func_name", ['a', 'b'], [("print_statement", [("integer_literal", 1)]), ("print_statement", [("integer_literal", 2)])])]),
 ])
 def test_action_statements(input_code, expected_output):
-    assert parse_code(input_code) == expected_output
\ No newline at end of file
+    assert parse_code(input_code) == expected_output
+
+def test_format_long_chain():
+    code = "print " + " + ".join(["1"] * 5000)
+    formatted = format_ast(parse_code(code))
+
+    assert formatted.startswith("[\n  ('print_statement',")
+    assert formatted.count("('integer_literal', 1)") == 5000
+
+def test_parser_tables():
+    # After a change to the grammar, rebuild the tables with moon.parser.write_tables()
+    grammar = ParserReflect(vars(moon.parser))
+    grammar.get_all()
+
+    assert moon.parsetab._lr_signature == grammar.signature()
+
+def test_parser_is_built_once():
+    assert build_parser() is build_parser()
+
+@pytest.mark.parametrize("input_code, expected_output", [
+    ("print 1 2 3", [("print_statement", [("integer_literal", 1), ("integer_literal", 2), ("integer_literal", 3)])]),
+    ("x is call f a b\nresult a b", [("variable_declaration_statement", "x", ("call", "f", ["a", "b"])), ("result_statement", ["a", "b"])]),
+    ("ask \"a\" \"b\"", [("ask", [("string_literal", "a"), ("string_literal", "b")])]),
+    ("dict\n\ta is 1\n\tb is 2", [("dict_composite", {"a": ("integer_literal", 1), "b": ("integer_literal", 2)})]),
+])
+def test_sequence_order(input_code, expected_output):
+    assert parse_code(input_code) == expected_output
+
+def test_long_sequences():
+    program = parse_code("\n".join(f"x is {index}" for index in range(5000)) + "\nprint " + " ".join(map(str, range(5000))))
+
+    assert len(program) == 5001
+    assert [statement[2][1] for statement in program[:-1]] == list(range(5000))
+    assert [arg[1] for arg in program[-1][1]] == list(range(5000))
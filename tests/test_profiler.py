@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from moon.interpreter import execute_program
+from moon.profiler import Profiler
+
+from helpers import parse_code
+
+SOURCE = """action square n
+\tresult n * n
+action total n
+\tif n is 0
+\t\tresult 0
+\tresult n + call total n - 1
+x is 0
+while x < 5
+\tx is x + 1
+\tcall square x
+print call total 3"""
+
+def profile(code, backend="interpreter"):
+    program = parse_code(code)
+    profiler = Profiler(code)
+    profiler.start(program)
+    execute_program(program, output_callback=lambda *values: None, backend=backend, hooks=profiler.hooks)
+    profiler.stop()
+    return profiler
+
+def test_line_counts(backend):
+    lines = profile(SOURCE, backend).lines
+
+    assert {lineno: (line.hits, line.iterations) for lineno, line in lines.items()} == {
+        1: (1, 0), 2: (5, 0),
+        3: (1, 0), 4: (4, 0), 5: (1, 0), 6: (3, 0),
+        7: (1, 0), 8: (1, 5), 9: (5, 0), 10: (5, 0),
+        11: (1, 0),
+    }
+
+def test_action_stats(backend):
+    profiler = profile(SOURCE, backend)
+    actions = sorted(profiler.actions.values(), key=lambda stats: stats.lineno)
+
+    assert [(stats.name, stats.lineno, stats.calls) for stats in actions] == [("square", 1, 5), ("total", 3, 4)]
+    # Recursive calls are timed once, within the whole run
+    assert all(0 <= stats.wall <= profiler.wall for stats in actions)
+
+def test_times_add_up():
+    profiler = profile(SOURCE)
+    wall = sum(line.wall for line in profiler.lines.values())
+
+    assert 0 < wall <= profiler.wall
+    assert all(line.wall >= 0 and line.cpu >= 0 for line in profiler.lines.values())
+
+def test_report():
+    profiler = profile(SOURCE)
+    lines = profiler.report(limit=3).splitlines()
+    slowest = sorted(profiler.lines.values(), key=lambda line: line.wall, reverse=True)[:3]
+
+    assert lines[0].startswith("Total:")
+    assert [int(line.split()[0]) for line in lines[3:6]] == [line.lineno for line in slowest]
+    assert lines[6].strip() == "... 8 more lines"
+    assert any(line.startswith("square") for line in lines)
+
+def test_json_profile(tmp_path):
+    path = tmp_path / "script.profile.json"
+    profile(SOURCE).write(path)
+    data = json.loads(path.read_text(encoding="utf-8"))
+
+    assert set(data) == {"wall", "cpu", "lines", "actions"}
+    assert [line["line"] for line in data["lines"]] == list(range(1, 12))
+    assert data["lines"][7]["iterations"] == 5
+    assert [(action["name"], action["calls"]) for action in data["actions"]] == [("square", 5), ("total", 4)]
+
+def test_interrupted_run():
+    program = parse_code("action divide\n\tresult 1 / 0\ncall divide")
+    profiler = Profiler()
+    profiler.start(program)
+    with pytest.raises(ZeroDivisionError):
+        execute_program(program, hooks=profiler.hooks)
+    profiler.stop()
+
+    assert not profiler.callers
+    assert next(iter(profiler.actions.values())).calls == 1
@@ -0,0 +1,55 @@
+import pytest
+
+from moon.resolver import UndefinedNameError, check_program, resolve_program
+
+from helpers import parse_code
+
+def test_action_slots():
+    program = parse_code("total is 0\naction add a b\n\tsum is a + b\n\ttotal is sum\n\tresult sum")
+    block = program[1].block
+    layout = resolve_program(program)[id(block)]
+
+    # Slot 0 links to the enclosing frame, `total` stays a top-level variable
+    assert layout.names == ["a", "b", "sum"]
+    assert layout.lookup("sum") == (0, 3)
+    assert layout.lookup("total") is None
+    assert layout.depth == 1
+
+def test_nested_action_slots():
+    program = parse_code("action outer\n\tx is 1\n\taction inner\n\t\tx is x + 1\n\t\ty is x\n\tcall inner")
+    outer = program[0].block
+    inner = outer[1].block
+    layouts = resolve_program(program)
+
+    assert layouts[id(outer)].names == ["x", "inner"]
+    assert layouts[id(inner)].names == ["y"]
+    assert layouts[id(inner)].lookup("x") == (1, 1)
+    assert layouts[id(inner)].depth == 2
+
+def test_fallback_slots():
+    program = parse_code("action f\n\tx is 3\nx is 0\naction g\n\tx is 1")
+    layouts = resolve_program(program)
+    f, g = layouts[id(program[0].block)], layouts[id(program[2].block)]
+
+    # Bound when g is defined, not yet when f is: f's own `x` falls back to the global one
+    assert f.names == ["x"]
+    assert f.chain("x") == [(0, 1), (1, None)]
+    assert g.names == []
+    assert g.chain("x") == [(1, None)]
+
+@pytest.mark.parametrize("code, names", [
+    ("print x", ["x"]),
+    ("action show\n\tprint hidden\ncall show", ["hidden"]),
+    ("if true\n\tprint a + b", ["a", "b"]),
+    ("call missing", ["missing"]),
+])
+def test_undefined_names(code, names):
+    with pytest.raises(UndefinedNameError) as error:
+        check_program(parse_code(code))
+
+    assert error.value.names == names
+    assert isinstance(error.value, KeyError)
+
+def test_known_names():
+    check_program(parse_code("print x + 1"), known={"x"})
+    check_program(parse_code("action show\n\tprint later\nlater is 1\ncall show"))
@@ -0,0 +1,69 @@
+import sys
+
+import pytest
+
+from moon.compiler import Compiler
+from moon.interpreter import execute_program
+from moon.tiered import Tiers
+
+from helpers import parse_code
+
+def output(code, backend="tiered", tiers=None):
+    lines = []
+    execute_program(parse_code(code), output_callback=lambda *values: lines.append(" ".join(values)), backend=backend, tiers=tiers)
+    return lines
+
+PROGRAMS = [
+    "x is 0\nwhile x < 10\n\tx is x + 1\nprint x",
+    "x is 0\nwhile true\n\tx is x + 1\n\tif x < 4\n\t\tskip\n\tprint x\n\tif x is 8\n\t\tstop\nprint x",
+    "action f n\n\ti is 0\n\twhile true\n\t\ti is i + 1\n\t\tif i is n\n\t\t\tresult i * 2\nx is 0\nwhile x < 6\n\tprint call f x + 1\n\tx is x + 1",
+    "action down n\n\tif n is 0\n\t\tresult 0\n\tresult call down n - 1\nx is 0\nwhile x < 5\n\tprint call down x\n\tx is x + 1",
+    "action make k\n\taction get\n\t\tresult k\n\tresult get\nx is 0\nwhile x < 4\n\tg is call make x\n\tprint call g\n\tx is x + 1",
+    "total is 0\naction add n\n\ttotal is total + n\nx is 0\nwhile x < 5\n\tcall add x\n\tx is x + 1\nprint total",
+    "action g x\n\tresult 1\naction redefine\n\taction g x\n\t\tresult 2\nx is 0\nwhile x < 3\n\taction g x\n\t\tresult 1\n\tprint call g call redefine\n\tx is x + 1",
+]
+
+@pytest.mark.parametrize("threshold", [1, 2, 3, 1000])
+@pytest.mark.parametrize("input_code", PROGRAMS)
+def test_tiers_behave_like_the_interpreter(input_code, threshold):
+    assert output(input_code, tiers=Tiers(threshold)) == output(input_code, "interpreter")
+
+def test_hot_loops_are_compiled():
+    tiers = Tiers(3)
+    output("x is 0\nwhile x < 10\n\tx is x + 1\nprint x", tiers=tiers)
+
+    assert [(event.kind, event.region, event.lineno, event.count) for event in tiers.events] == [("tier-up", "loop", 2, 3)]
+
+def test_hot_actions_are_compiled():
+    tiers = Tiers(2)
+    output("action square n\n\tresult n * n\nprint call square 2\nprint call square 3\nprint call square 4", tiers=tiers)
+
+    assert [(event.kind, event.region, event.lineno, event.count) for event in tiers.events] == [("tier-up", "action", 2, 2)]
+
+def test_cold_code_is_interpreted():
+    tiers = Tiers()
+    output("x is 0\nwhile x < 10\n\tx is x + 1\nprint x", tiers=tiers)
+
+    assert tiers.events == []
+
+def test_deopt(monkeypatch):
+    def fail(self, statement):
+        raise RecursionError()
+    monkeypatch.setattr(Compiler, "compile_while_statements", fail)
+    logged = []
+    tiers = Tiers(2, log=logged.append)
+
+    assert output("x is 0\nwhile x < 10\n\tx is x + 1\nprint x", tiers=tiers) == ["10"]
+    assert [event.kind for event in tiers.events] == ["deopt"]
+    assert logged == [str(tiers.events[0])]
+    assert logged[0].startswith("[deopt] loop at line 2 after 2 iterations")
+
+def test_threshold_is_positive():
+    with pytest.raises(ValueError):
+        Tiers(0)
+
+def test_deep_recursion_of_compiled_actions():
+    depth = sys.getrecursionlimit() * 2
+    code = f"action total n\n\tif n is 0\n\t\tresult 0\n\tprevious is call total n - 1\n\tresult previous + n\nprint call total {depth}"
+
+    assert output(code, tiers=Tiers(2)) == [str(depth * (depth + 1) // 2)]
@@ -0,0 +1,107 @@
+from array import array
+
+import pytest
+
+from moon.vm import (
+    BINARY_NAMES,
+    CALL,
+    INSTRUCTION_SIZE,
+    JUMP,
+    JUMP_IF_FALSE,
+    LOAD_CONST,
+    LOAD_NAME,
+    NAME_CONST,
+    NAME_NAME,
+    REGISTER_CONST,
+    STORE_CALLED,
+    STORE_NAME,
+    TAILCALL,
+    VirtualMachine,
+    compile_bytecode,
+    disassemble,
+    execute_bytecode,
+)
+
+from helpers import parse_code
+
+def test_instruction_format():
+    code = compile_bytecode(parse_code("x is 1 + 2\nprint x"))
+
+    assert isinstance(code.instructions, array)
+    assert len(code.instructions) % INSTRUCTION_SIZE == 0
+    assert code.constants == [1, 2]
+    assert code.names == ["x"]
+
+def test_signed_zero_constants():
+    output = []
+    execute_bytecode(parse_code("print -0.0\nprint 0.0"), output_callback=output.append)
+
+    assert output == ["-0.0", "0.0"]
+
+def test_loop_jumps():
+    code = compile_bytecode(parse_code("x is 0\nwhile x < 5\n\tif x is 3\n\t\tstop\n\tx is x + 1"))
+    instructions = code.instructions
+    opcodes = instructions[::INSTRUCTION_SIZE]
+    end = len(instructions) - INSTRUCTION_SIZE
+
+    # The loop exit and the `stop` both jump right after the loop
+    assert instructions[opcodes.index(JUMP_IF_FALSE) * INSTRUCTION_SIZE + 2] == end
+    assert any(instructions[pc + 1] == end for pc in range(0, end, INSTRUCTION_SIZE) if instructions[pc] == JUMP)
+
+def test_disassemble():
+    listing = disassemble(compile_bytecode(parse_code("print 1 + 2")))
+
+    assert "LOAD_CONST" in listing
+    assert "PRINT" in listing
+    assert listing.splitlines()[-1].split()[1] == "RETURN_NONE"
+
+def test_tail_calls():
+    vm = VirtualMachine()
+    vm.compile(parse_code("action down n\n\tresult call down n - 1"), in_action=False)
+    action_code = next(code for block, code in vm.codes.values())
+
+    assert TAILCALL in action_code.instructions[::INSTRUCTION_SIZE]
+    assert CALL not in action_code.instructions[::INSTRUCTION_SIZE]
+
+def test_deep_recursion():
+    output = []
+    code = "action total n\n\tif n is 0\n\t\tresult 0\n\tprevious is call total n - 1\n\tresult previous + n\nprint call total 5000"
+    execute_bytecode(parse_code(code), output_callback=output.append)
+
+    assert output == ["12502500"]
+
+def test_fused_binary_instructions():
+    code = compile_bytecode(parse_code("x is y + 1\nz is x < y\nw is x * 2 - 1"))
+    opcodes = list(code.instructions[::INSTRUCTION_SIZE])
+
+    assert opcodes.count(NAME_CONST + BINARY_NAMES.index("+")) == 1
+    assert opcodes.count(NAME_NAME + BINARY_NAMES.index("<")) == 1
+    assert opcodes.count(REGISTER_CONST + BINARY_NAMES.index("-")) == 1
+    assert LOAD_NAME not in opcodes and LOAD_CONST not in opcodes
+    assert "+ NAME_CONST" in disassemble(code)
+
+def test_called_names_are_watched():
+    vm = VirtualMachine()
+    code = vm.compile(parse_code("f is 1\nx is 2\naction g\n\tresult call f"), in_action=False)
+    opcodes = list(code.instructions[::INSTRUCTION_SIZE])
+
+    assert opcodes.count(STORE_CALLED) == 1
+    assert opcodes.count(STORE_NAME) == 1
+
+@pytest.mark.parametrize("input_code, expected", [
+    # Redefined
+    ("action f\n\tresult 1\naction g\n\tresult call f\nprint call g\naction f\n\tresult 2\nprint call g", ["1", "2"]),
+    # Assigned
+    ("action one\n\tresult 1\naction two\n\tresult 2\naction g\n\tresult call f\nf is one\nprint call g\nf is two\nprint call g", ["1", "2"]),
+    # Assigned from an action, to the enclosing scope
+    ("action one\n\tresult 1\naction two\n\tresult 2\nf is one\naction g flag\n\tif flag\n\t\tf is two\n\tx is call f\n\tresult x\nprint call g false\nprint call g true", ["1", "2"]),
+    # Shadowed by a parameter
+    ("action f\n\tresult 1\naction h\n\tresult 2\naction g f\n\tresult call f\nprint call g h\nprint call f", ["2", "1"]),
+    # Defined in other scopes
+    ("action make k\n\taction inner\n\t\tresult k\n\taction get\n\t\tresult call inner\n\tresult get\na is call make 1\nb is call make 2\nprint call a\nprint call b\nprint call a", ["1", "2", "1"]),
+])
+def test_call_caches(input_code, expected):
+    output = []
+    execute_bytecode(parse_code(input_code), output_callback=output.append)
+
+    assert output == expected